@@ -2,15 +2,16 @@ import streamlit as st
 import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
-import zipfile
-import io
-import base64
+import time
 from scripts.tech_metrics_wrapper import TechMetricsGenerator
 from scripts.marketing_wrapper import MarketingDataGenerator
 from scripts.loan_risk_wrapper import LoanRiskGenerator
 from scripts.credit_card_wrapper import CreditCardGenerator
 from scripts.tax_data_wrapper import TaxDataGenerator
 from scripts.financial_data_wrapper import FinancialDataGenerator  # Import the new generator
+from scripts.job_manager import JobManager, AdmissionRejected, QUEUED, SUCCEEDED, FAILED, CANCELLED
+from scripts.table_stats import table_stats
+from scripts.exporters import available_formats, export_bundle, export_table, file_name, mime_type
 
 # Page configuration
 st.set_page_config(
@@ -53,6 +54,56 @@ if 'generated_data' not in st.session_state:
     st.session_state.generated_data = None
 if 'generator_instance' not in st.session_state:
     st.session_state.generator_instance = None
+if 'job_id' not in st.session_state:
+    st.session_state.job_id = None
+if 'full_run_estimate' not in st.session_state:
+    st.session_state.full_run_estimate = None
+if 'table_stats' not in st.session_state:
+    st.session_state.table_stats = {}
+if 'dataset_id' not in st.session_state:
+    st.session_state.dataset_id = None
+if 'exports' not in st.session_state:
+    st.session_state.exports = {}
+
+@st.cache_resource
+def get_job_manager():
+    """Job manager shared by all sessions: one bounded worker pool and memory budget for every generator run."""
+    return JobManager(max_workers=2)
+
+job_manager = get_job_manager()
+
+def format_bytes(num_bytes):
+    """Human-readable size, e.g. 1.2 GB."""
+    for unit in ['B', 'KB', 'MB', 'GB']:
+        if num_bytes < 1024 or unit == 'GB':
+            return f"{num_bytes:,.1f} {unit}" if unit != 'B' else f"{num_bytes:,.0f} B"
+        num_bytes /= 1024
+
+def format_duration(seconds):
+    """Human-readable duration, e.g. 4 min 10 s."""
+    if seconds < 60:
+        return f"{seconds:.0f} s"
+    if seconds < 3600:
+        return f"{seconds // 60:.0f} min {seconds % 60:.0f} s"
+    return f"{seconds // 3600:.0f} h {seconds % 3600 // 60:.0f} min"
+
+# Collect the result of this session's job once it has finished
+job_notice = None
+active_job = job_manager.get(st.session_state.job_id) if st.session_state.job_id else None
+if active_job is not None and active_job.finished:
+    if active_job.status == SUCCEEDED:
+        st.session_state.generated_data = active_job.result
+        st.session_state.generator_instance = active_job.generator
+        st.session_state.table_stats = active_job.table_stats
+        st.session_state.dataset_id = active_job.id
+        st.session_state.exports = {}
+        st.session_state.full_run_estimate = active_job.generator.full_run_estimate if active_job.preview else None
+    job_notice = active_job
+    job_manager.forget(active_job.id)
+    st.session_state.job_id = None
+    active_job = None
+elif active_job is None:
+    st.session_state.job_id = None
 
 # Define available generators
 GENERATORS = {
@@ -188,32 +239,83 @@ if selected_generator:
         # Generate button
         col1, col2, col3 = st.columns([1, 1, 3])
         with col1:
-            generate_button = st.button("🚀 Generate Data", type="primary", use_container_width=True)
+            generate_button = st.button("🚀 Generate Data", type="primary", use_container_width=True,
+                                        disabled=active_job is not None)
+        with col2:
+            preview_button = st.button("👁 Preview", use_container_width=True, disabled=active_job is not None,
+                                       help=param_config.get('preview', 'Generate a small sample first'))
+        with col3:
+            # Predicted cost of a full run with the current parameters
+            if hasattr(generator_class, 'estimate_rows'):
+                cost = job_manager.cost_model.estimate(generator_class(**params))
+                calibration = f"{cost['calibration_runs']} recorded runs" if cost['calibration_runs'] else "uncalibrated"
+                st.caption(f"Estimated full run: **{cost['rows']:,} rows**, {format_bytes(cost['bytes'])} in memory, "
+                           f"~{format_duration(cost['runtime_seconds'])} ({calibration})")
+                if cost['peak_memory_bytes'] > job_manager.memory_budget_bytes:
+                    st.warning(f"Needs about {format_bytes(cost['peak_memory_bytes'])} at peak, more than the "
+                               f"{format_bytes(job_manager.memory_budget_bytes)} available. Reduce the parameters or use Preview.")
         
-        # Generate data when button is clicked
-        if generate_button:
-            with st.spinner("Generating data... This may take a moment."):
-                try:
-                    # Create generator instance with parameters
-                    generator = generator_class(**params)
-                    
-                    # Generate data
-                    generated_data = generator.generate()
-                    
-                    # Store in session state
-                    st.session_state.generated_data = generated_data
-                    st.session_state.generator_instance = generator
-                    
-                    st.success("✅ Data generated successfully!")
-                    
-                except Exception as e:
-                    st.error(f"Error generating data: {str(e)}")
-                    st.exception(e)
+        # Start a background job when button is clicked
+        if generate_button or preview_button:
+            # Create generator instance with parameters
+            generator = generator_class(**params)
+            try:
+                active_job = job_manager.submit(gen_info["name"], generator, preview=preview_button)
+                st.session_state.job_id = active_job.id
+            except AdmissionRejected as e:
+                st.error(f"Generation not started: {str(e)}")
+        
+        # Live progress of the running job
+        if active_job is not None:
+            fraction = active_job.progress_fraction()
+            stage = active_job.stage
+            if active_job.status == QUEUED:
+                ahead = job_manager.queue_position(active_job.id)
+                stage = f"Waiting for a free worker ({ahead} job(s) ahead)" if ahead else "Waiting for a free worker"
+            elif active_job.subscribers > 1:
+                stage = f"{stage} (shared with {active_job.subscribers - 1} other request(s))"
+            st.progress(fraction or 0.0, text=f"{active_job.name}: {stage}...")
+            col1, col2, col3, col4 = st.columns(4)
+            with col1:
+                st.metric("Rows Generated", f"{active_job.rows:,}" if active_job.rows is not None else "-")
+            with col2:
+                st.metric("Elapsed", f"{active_job.elapsed_seconds():.0f} s")
+            with col3:
+                eta = active_job.eta_seconds()
+                st.metric("Stage ETA", f"{eta:.0f} s" if eta is not None else "-")
+            with col4:
+                cancel_button = st.button("✖ Cancel", use_container_width=True)
+            if cancel_button:
+                job_manager.cancel(active_job.id)
+                st.session_state.job_id = None
+                active_job = None
+                st.warning("Generation was cancelled.")
+        
+        # Outcome of the job that just finished
+        if job_notice is not None:
+            if job_notice.status == SUCCEEDED and job_notice.preview:
+                st.success(f"✅ Preview generated in {job_notice.elapsed_seconds():.0f} s!")
+            elif job_notice.status == SUCCEEDED:
+                st.success(f"✅ Data generated successfully in {job_notice.elapsed_seconds():.0f} s!")
+            elif job_notice.status == FAILED:
+                st.error(f"Error generating data: {str(job_notice.error)}")
+                st.code(job_notice.error_traceback)
+            elif job_notice.status == CANCELLED:
+                st.warning("Generation was cancelled.")
         
         # Display results if data has been generated
         if st.session_state.generated_data:
             st.subheader("Generated Data")
             
+            # Estimated size of the full run when the data is a preview sample
+            estimate = st.session_state.full_run_estimate
+            if estimate is not None:
+                st.info(f"👁 Showing a preview sample. The full run is estimated at "
+                        f"{estimate['EstimatedRows'].sum():,} rows and {estimate['EstimatedBytes'].sum() / 1024**2:,.1f} MB in memory.")
+                with st.expander("Estimated Full Run by Table"):
+                    st.dataframe(estimate.assign(EstimatedMB=(estimate['EstimatedBytes'] / 1024**2).round(1))
+                                 .drop(columns='EstimatedBytes'), use_container_width=True, hide_index=True)
+            
             # Create tabs for different dataframes
             dataframes = st.session_state.generated_data
             tab_names = list(dataframes.keys())
@@ -222,14 +324,18 @@ if selected_generator:
             for idx, (tab_name, df) in enumerate(dataframes.items()):
                 with tabs[idx]:
                     # Show dataframe info
+                    # Statistics measured once when the data was generated, not on every rerun
+                    stats = st.session_state.table_stats.get(tab_name)
+                    if stats is None:
+                        stats = table_stats({tab_name: df})[tab_name]
+                        st.session_state.table_stats[tab_name] = stats
                     col1, col2, col3 = st.columns(3)
                     with col1:
-                        st.metric("Rows", f"{len(df):,}")
+                        st.metric("Rows", f"{stats['rows']:,}")
                     with col2:
-                        st.metric("Columns", f"{len(df.columns):,}")
+                        st.metric("Columns", f"{stats['columns']:,}")
                     with col3:
-                        memory_usage = df.memory_usage(deep=True).sum() / 1024**2
-                        st.metric("Memory", f"{memory_usage:.1f} MB")
+                        st.metric("Memory", f"{stats['memory_bytes'] / 1024**2:.1f} MB")
                     
                     # Show sample data
                     st.write("**Sample Data (first 10 rows):**")
@@ -242,34 +348,41 @@ if selected_generator:
             # Download section
             st.subheader("Download Generated Data")
             
+            export_format = st.selectbox(
+                "Export Format",
+                available_formats(),
+                help="Parquet and Arrow IPC keep column types and are much smaller and faster to load than CSV"
+            )
+            
+            # Files are built once per dataset and format, then reused on every rerun
+            export_key = (st.session_state.dataset_id, export_format)
+            if export_key not in st.session_state.exports:
+                with st.spinner(f"Building {export_format} files..."):
+                    exported = {name: export_table(df, export_format) for name, df in dataframes.items()}
+                    st.session_state.exports[export_key] = (exported, export_bundle(exported, export_format))
+            exported, bundle = st.session_state.exports[export_key]
+            
             col1, col2 = st.columns(2)
             
             with col1:
-                # Individual CSV downloads
+                # Individual file downloads
                 st.write("**Download Individual Files:**")
-                for name, df in dataframes.items():
-                    csv = df.to_csv(index=False)
-                    b64 = base64.b64encode(csv.encode()).decode()
-                    href = f'<a href="data:file/csv;base64,{b64}" download="{name}.csv">📥 Download {name}.csv</a>'
-                    st.markdown(href, unsafe_allow_html=True)
+                for name, data in exported.items():
+                    st.download_button(
+                        label=f"📥 Download {file_name(name, export_format)} ({format_bytes(len(data))})",
+                        data=data,
+                        file_name=file_name(name, export_format),
+                        mime=mime_type(export_format),
+                        key=f"download_{name}"
+                    )
             
             with col2:
                 # ZIP download
                 st.write("**Download All Files (ZIP):**")
                 
-                # Create ZIP file in memory
-                zip_buffer = io.BytesIO()
-                with zipfile.ZipFile(zip_buffer, 'w', zipfile.ZIP_DEFLATED) as zip_file:
-                    for name, df in dataframes.items():
-                        csv_buffer = io.StringIO()
-                        df.to_csv(csv_buffer, index=False)
-                        zip_file.writestr(f"{name}.csv", csv_buffer.getvalue())
-                
-                zip_buffer.seek(0)
-                
                 st.download_button(
-                    label="📦 Download All (ZIP)",
-                    data=zip_buffer.getvalue(),
+                    label=f"📦 Download All (ZIP, {format_bytes(len(bundle))})",
+                    data=bundle,
                     file_name=f"{selected_generator}_data_{datetime.now().strftime('%Y%m%d_%H%M%S')}.zip",
                     mime="application/zip",
                     type="primary"
@@ -304,4 +417,9 @@ st.markdown(
     </div>
     """,
     unsafe_allow_html=True
-)
\ No newline at end of file
+)
+
+# Keep polling while this session's job runs, so its progress refreshes without blocking on the run
+if active_job is not None:
+    time.sleep(1)
+    st.rerun()
@@ -2,8 +2,10 @@ import pandas as pd
 import numpy as np
 import random
 from datetime import datetime, timedelta
-import uuid
 import calendar # Keep for potential future use
+from id_service import IdService
+from partitioned_writer import PartitionedCsvWriter
+from progress import report_progress
 
 # --- Configuration (Simplified) ---
 START_DATE = datetime(2023, 5, 1) # Approx 2 years prior
@@ -12,7 +14,33 @@ NUM_CARDHOLDERS = 750 # Number of unique cardholders
 AVG_APPS_PER_DAY = 30      # Increased average applications per day (previously 10)
 APPROVAL_RATE = 0.55 # 55% of applications are approved
 ACTIVATION_RATE = 0.85 # 85% of approved accounts are activated
-TRANSACTIONS_PER_ACTIVATED_ACCOUNT = 5 # Fixed number of transactions per activated account
+TRANSACTIONS_PER_ACTIVATED_ACCOUNT = 5 # Mean number of transactions per activated account
+
+# --- Configuration for Transactions ---
+TRANSACTION_INTENSITY = {
+    "DISTRIBUTION": "negative_binomial", # 'negative_binomial', 'poisson' or 'fixed'
+    "MEAN": TRANSACTIONS_PER_ACTIVATED_ACCOUNT,
+    "DISPERSION": 1.5, # Negative binomial shape; lower values give more dormant and heavy-spending accounts
+}
+# Merchant category mix for purchases/returns: share of spend and lognormal amount parameters
+MERCHANT_CATEGORY_MIX = {
+    "Grocery":        {"weight": 0.20, "amount_mu": 4.3, "amount_sigma": 0.6},
+    "Dining":         {"weight": 0.16, "amount_mu": 3.8, "amount_sigma": 0.7},
+    "Fuel":           {"weight": 0.10, "amount_mu": 3.9, "amount_sigma": 0.4},
+    "Retail":         {"weight": 0.18, "amount_mu": 5.0, "amount_sigma": 0.9},
+    "Electronics":    {"weight": 0.07, "amount_mu": 6.3, "amount_sigma": 0.8},
+    "Travel":         {"weight": 0.08, "amount_mu": 6.6, "amount_sigma": 0.8},
+    "Utilities":      {"weight": 0.08, "amount_mu": 5.0, "amount_sigma": 0.5},
+    "Healthcare":     {"weight": 0.05, "amount_mu": 5.2, "amount_sigma": 0.9},
+    "Entertainment":  {"weight": 0.08, "amount_mu": 4.2, "amount_sigma": 0.8},
+}
+MERCHANT_MIX_CONCENTRATION = 20.0 # Dirichlet concentration of per-account mixes around MERCHANT_CATEGORY_MIX
+TRANSACTION_TYPE_WEIGHTS = {'Purchase': 0.75, 'Payment': 0.15, 'Fee': 0.05, 'Return': 0.05}
+MAX_TRANSACTION_AMOUNT = 7500
+TRANSACTIONS_OUTPUT_DIR = 'transactions' # Date-partitioned output: transactions/month=YYYY-MM/part-00000.csv
+TRANSACTION_PARTITION_FREQ = 'M' # 'D' (daily), 'M' (monthly) or 'Y' (yearly) partitions
+TRANSACTION_ACCOUNT_CHUNK_SIZE = 50000 # Accounts processed per chunk; bounds memory use
+SORT_TRANSACTION_PARTITIONS = True # Sort each partition by TransactionDate once generation finishes
 
 STATES = ['AL', 'AK', 'AZ', 'AR', 'CA', 'CO', 'CT', 'DE', 'FL', 'GA',
           'HI', 'ID', 'IL', 'IN', 'IA', 'KS', 'KY', 'LA', 'ME', 'MD',
@@ -20,6 +48,22 @@ STATES = ['AL', 'AK', 'AZ', 'AR', 'CA', 'CO', 'CT', 'DE', 'FL', 'GA',
           'NM', 'NY', 'NC', 'ND', 'OH', 'OK', 'OR', 'PA', 'RI', 'SC',
           'SD', 'TN', 'TX', 'UT', 'VT', 'VA', 'WA', 'WV', 'WI', 'WY']
 
+# --- Configuration for Cardholders ---
+# Income bands (ordered low to high) and their share of the cardholder base
+INCOME_BANDS = {'<25k': 0.15, '25k-50k': 0.25, '50k-75k': 0.22, '75k-100k': 0.15, '100k-150k': 0.14, '150k+': 0.09}
+CREDIT_SCORE_CONFIG = {
+    "MEAN": 690, "STD": 65, # FICO-like score distribution for the middle income band
+    "INCOME_BAND_SHIFT": 15, # Points added per income band above the middle
+    "MIN": 300, "MAX": 850,
+}
+TENURE_GAMMA = (1.8, 3.5) # (shape, scale) of years the cardholder has banked with us
+# Logistic approval model; the intercept is calibrated so the overall approval rate matches APPROVAL_RATE
+APPROVAL_MODEL = {
+    "SCORE_WEIGHT": 1.6, # Per 100 credit score points above 700
+    "INCOME_WEIGHT": 0.25, # Per income band
+    "TENURE_WEIGHT": 0.3, # Per log-year of tenure
+}
+
 # --- Configuration for Delinquency ---
 DELINQUENCY_CONFIG = {
     "BASE_RATE": 0.07,  # General delinquency rate (7%) for accounts 30+ DPD
@@ -32,6 +76,11 @@ DELINQUENCY_CONFIG = {
 }
 CREDIT_LIMIT_OPTIONS = [500, 1000, 2500, 5000, 7500, 10000, 15000, 20000]
 
+# --- Configuration for IDs ---
+ID_KEY = "cc-applications" # Key for the ID permutation; change it to get a different-looking ID space
+ID_SERVICE = IdService(key=ID_KEY)
+ID_SERVICE.register("TRX_", width=10) # Transactions can run into the billions; 8 hex digits caps at ~4.3B
+
 # --- Helper Functions ---
 def random_date(start, end):
     """Generate a random datetime between start and end."""
@@ -51,48 +100,149 @@ def random_date(start, end):
     )
 
 def generate_ids(prefix, n):
-    """Generates a list of unique IDs."""
-    n = max(0, n)
-    return [f"{prefix}_{uuid.uuid4().hex[:8].upper()}" for _ in range(n)]
+    """Mints n unique IDs (e.g. APP_3F9A01C2); counter-based, so IDs never repeat across calls."""
+    return ID_SERVICE.mint(f"{prefix}_", max(0, n))
+
+def draw_transaction_counts(n_accounts):
+    """Draws the number of transactions for each account from TRANSACTION_INTENSITY."""
+    mean = TRANSACTION_INTENSITY["MEAN"]
+    distribution = TRANSACTION_INTENSITY["DISTRIBUTION"]
+    if distribution == "fixed":
+        return np.full(n_accounts, int(mean), dtype=np.int64)
+    if distribution == "poisson":
+        return np.random.poisson(mean, n_accounts)
+    if distribution == "negative_binomial":
+        # Parameterised by mean and shape: variance = mean + mean^2 / shape
+        shape = TRANSACTION_INTENSITY["DISPERSION"]
+        return np.random.negative_binomial(shape, shape / (shape + mean), n_accounts)
+    raise ValueError(f"Unknown transaction intensity distribution: {distribution}")
+
+def generate_transaction_chunk(account_ids, cardholder_ids_arr, activation_seconds, end_seconds):
+    """Generates all transactions for a chunk of activated accounts as a DataFrame."""
+    counts = draw_transaction_counts(len(account_ids))
+    # Accounts activated after END_DATE have no transaction window
+    counts[activation_seconds > end_seconds] = 0
+    n = int(counts.sum())
+    if n == 0:
+        return pd.DataFrame()
+    owner = np.repeat(np.arange(len(account_ids)), counts)
+
+    # Uniform timestamp (second resolution) between activation and END_DATE
+    window = end_seconds - activation_seconds[owner]
+    trans_seconds = activation_seconds[owner] + (np.random.random(n) * (window + 1)).astype(np.int64)
+
+    type_names = np.array(list(TRANSACTION_TYPE_WEIGHTS.keys()))
+    type_weights = np.array(list(TRANSACTION_TYPE_WEIGHTS.values()), dtype=float)
+    trans_type = type_names[np.random.choice(len(type_names), n, p=type_weights / type_weights.sum())]
+
+    # Each account gets its own merchant mix drawn around the global mix
+    category_names = np.array(list(MERCHANT_CATEGORY_MIX.keys()))
+    category_weights = np.array([c["weight"] for c in MERCHANT_CATEGORY_MIX.values()], dtype=float)
+    category_weights /= category_weights.sum()
+    account_mix = np.random.dirichlet(category_weights * MERCHANT_MIX_CONCENTRATION, len(account_ids))
+    account_cdf = np.cumsum(account_mix, axis=1)
+    category_idx = (np.random.random(n)[:, None] > account_cdf[owner]).sum(axis=1)
+    category_idx = np.minimum(category_idx, len(category_names) - 1)
+
+    # Purchases/returns are priced by merchant category; payments and fees keep the account-level distribution
+    mu = np.array([c["amount_mu"] for c in MERCHANT_CATEGORY_MIX.values()])[category_idx]
+    sigma = np.array([c["amount_sigma"] for c in MERCHANT_CATEGORY_MIX.values()])[category_idx]
+    is_merchant = np.isin(trans_type, ['Purchase', 'Return'])
+    mu = np.where(is_merchant, mu, 6.8)
+    sigma = np.where(is_merchant, sigma, 0.8)
+    trans_amount = np.minimum(np.round(np.random.lognormal(mu, sigma), 2), MAX_TRANSACTION_AMOUNT)
+    trans_amount = np.where(trans_type == 'Payment', -trans_amount, trans_amount)
+
+    chunk_df = pd.DataFrame({
+        'TransactionID': generate_ids("TRX", n),
+        'AccountID': account_ids[owner],
+        'CardholderID': cardholder_ids_arr[owner],
+        'TransactionDate': trans_seconds.astype('datetime64[s]').astype('datetime64[ns]'),
+        'TransactionAmount': trans_amount,
+        'TransactionType': trans_type,
+        'MerchantCategory': np.where(is_merchant, category_names[category_idx], trans_type),
+    })
+    return chunk_df.sort_values(by='TransactionDate', kind='stable')
+
+def approval_logits(credit_scores, income_band_idx, tenure_years):
+    """Vectorised approval score (before calibration) from cardholder attributes."""
+    return (APPROVAL_MODEL["SCORE_WEIGHT"] * (credit_scores - 700) / 100.0
+            + APPROVAL_MODEL["INCOME_WEIGHT"] * income_band_idx
+            + APPROVAL_MODEL["TENURE_WEIGHT"] * np.log1p(tenure_years))
+
+def calibrate_intercept(logits, target_rate, iterations=60):
+    """Bisection for the intercept that makes the mean approval probability equal target_rate."""
+    if len(logits) == 0:
+        return 0.0
+    low, high = -20.0 - logits.max(), 20.0 - logits.min()
+    for _ in range(iterations):
+        mid = (low + high) / 2
+        if (1 / (1 + np.exp(-(logits + mid)))).mean() < target_rate:
+            low = mid
+        else:
+            high = mid
+    return (low + high) / 2
 
 # --- Data Generation ---
 
 print("Generating Cardholders...")
+report_progress("Generating cardholders")
 cardholder_ids = generate_ids("CUST", NUM_CARDHOLDERS)
-print(f"Generated {len(cardholder_ids)} cardholders.")
+income_band_names = np.array(list(INCOME_BANDS.keys()))
+income_band_weights = np.array(list(INCOME_BANDS.values()), dtype=float)
+cardholder_income_idx = np.random.choice(len(income_band_names), NUM_CARDHOLDERS, p=income_band_weights / income_band_weights.sum())
+cardholder_scores = np.clip(
+    np.random.normal(CREDIT_SCORE_CONFIG["MEAN"], CREDIT_SCORE_CONFIG["STD"], NUM_CARDHOLDERS)
+    + CREDIT_SCORE_CONFIG["INCOME_BAND_SHIFT"] * (cardholder_income_idx - (len(income_band_names) - 1) / 2),
+    CREDIT_SCORE_CONFIG["MIN"], CREDIT_SCORE_CONFIG["MAX"]
+).round().astype(np.int16)
+cardholder_states = np.array(STATES)[np.random.randint(0, len(STATES), NUM_CARDHOLDERS)]
+cardholder_tenure = np.minimum(np.floor(np.random.gamma(*TENURE_GAMMA, NUM_CARDHOLDERS)), 40).astype(np.int16)
+
+cardholders_df = pd.DataFrame({
+    'CardholderID': cardholder_ids,
+    'IncomeBand': income_band_names[cardholder_income_idx],
+    'CreditScore': cardholder_scores,
+    'State': cardholder_states,
+    'TenureYears': cardholder_tenure,
+})
+print(f"Generated {len(cardholders_df)} cardholders.")
 
 print("Generating Applications...")
-applications_data = []
+report_progress("Generating applications", rows=len(cardholders_df))
 total_days = (END_DATE - START_DATE).days
 num_applications = total_days * AVG_APPS_PER_DAY # This will now be higher
-application_ids = generate_ids("APP", num_applications)
+if NUM_CARDHOLDERS == 0: num_applications = 0 # Should not happen with current NUM_CARDHOLDERS
 
 app_styles = ["Standard Application", "Net Applications", "New Applications", "Activated New Accounts"]
 app_style_weights = [0.45, 0.25, 0.20, 0.10]
 
-for i in range(num_applications):
-    app_id = application_ids[i]
-    if not cardholder_ids: break # Should not happen with current NUM_CARDHOLDERS
-    cardholder_id = random.choice(cardholder_ids)
-    app_date = random_date(START_DATE, END_DATE)
-    state = random.choice(STATES)
-    actual_status = 'Approved' if random.random() < APPROVAL_RATE else 'Rejected'
-    assigned_style = random.choices(app_styles, weights=app_style_weights, k=1)[0]
-
-    applications_data.append({
-        'ApplicationID': app_id,
-        'CardholderID': cardholder_id,
-        'ApplicationDate': app_date,
-        'ApplicantState': state,
-        'ApplicationStatus': actual_status,
-        'ApplicationStyle': assigned_style
-    })
-    if (i + 1) % 10000 == 0: print(f"Generated {i+1}/{num_applications} applications...") # Adjusted print frequency
-
-applications_df = pd.DataFrame(applications_data)
+# Applications reference cardholders by position, so attributes are integer gathers
+app_cardholder_idx = np.random.randint(0, max(NUM_CARDHOLDERS, 1), num_applications)
+app_window_seconds = int((END_DATE - START_DATE).total_seconds())
+app_dates = (np.datetime64(START_DATE, 's')
+             + np.random.randint(0, app_window_seconds + 1, num_applications).astype('timedelta64[s]'))
+
+# Approval depends on the applicant's score, income and tenure
+app_logits = approval_logits(cardholder_scores[app_cardholder_idx].astype(float),
+                             cardholder_income_idx[app_cardholder_idx],
+                             cardholder_tenure[app_cardholder_idx].astype(float))
+app_logits += calibrate_intercept(app_logits, APPROVAL_RATE)
+approval_prob = 1 / (1 + np.exp(-app_logits))
+app_status = np.where(np.random.random(num_applications) < approval_prob, 'Approved', 'Rejected')
+
+applications_df = pd.DataFrame({
+    'ApplicationID': generate_ids("APP", num_applications),
+    'CardholderID': cardholder_ids[app_cardholder_idx],
+    'ApplicationDate': app_dates.astype('datetime64[ns]'),
+    'ApplicantState': cardholder_states[app_cardholder_idx],
+    'ApplicationStatus': app_status,
+    'ApplicationStyle': np.array(app_styles)[np.random.choice(len(app_styles), num_applications, p=app_style_weights)]
+})
 print(f"Generated {len(applications_df)} total applications with ApplicationStyle.")
 
 print("Generating Accounts...")
+report_progress("Generating accounts", rows=len(cardholders_df) + len(applications_df))
 accounts_data = []
 approved_apps = applications_df[applications_df['ApplicationStatus'] == 'Approved'].copy()
 print(f"Processing {len(approved_apps)} approved applications for account creation...")
@@ -142,67 +292,43 @@ accounts_df = pd.DataFrame(accounts_data)
 print(f"Generated {len(accounts_df)} accounts.")
 
 
-print("Generating Transactions (Simplified)...")
-transactions_data = []
+print("Generating Transactions...")
+report_progress("Generating transactions", rows=len(cardholders_df) + len(applications_df) + len(accounts_df))
+transactions_writer = PartitionedCsvWriter(
+    TRANSACTIONS_OUTPUT_DIR, 'TransactionDate', freq=TRANSACTION_PARTITION_FREQ,
+    date_format='%Y-%m-%d %H:%M:%S'
+)
 if not accounts_df.empty:
     active_accounts_for_trans = accounts_df[
         (accounts_df['ActivationStatus'] == 'Activated') &
         (accounts_df['ActivationDate'].notna())
-    ].copy()
+    ]
     print(f"Generating transactions for {len(active_accounts_for_trans)} activated accounts...")
 
-    estimated_transactions = len(active_accounts_for_trans) * TRANSACTIONS_PER_ACTIVATED_ACCOUNT
-    transaction_ids = generate_ids("TRX", estimated_transactions)
-    transaction_id_counter = 0
-
-    for index, acc_row in active_accounts_for_trans.iterrows():
-        account_id = acc_row['AccountID']
-        cardholder_id = acc_row['CardholderID']
-        try:
-            transaction_start_dt = pd.to_datetime(acc_row['ActivationDate'])
-        except ValueError:
-            print(f"Warning: Could not parse ActivationDate for AccountID {account_id}. Skipping transactions.")
-            continue
+    trans_account_ids = active_accounts_for_trans['AccountID'].to_numpy()
+    trans_cardholder_ids = active_accounts_for_trans['CardholderID'].to_numpy()
+    trans_activation_seconds = pd.to_datetime(active_accounts_for_trans['ActivationDate']).to_numpy().astype('datetime64[s]').astype(np.int64)
+    trans_end_seconds = np.datetime64(END_DATE, 's').astype(np.int64)
 
-        transaction_end_dt = pd.to_datetime(END_DATE)
-        
-        if transaction_start_dt > transaction_end_dt:
-            continue
+    for chunk_start in range(0, len(trans_account_ids), TRANSACTION_ACCOUNT_CHUNK_SIZE):
+        chunk = slice(chunk_start, chunk_start + TRANSACTION_ACCOUNT_CHUNK_SIZE)
+        transactions_writer.write(generate_transaction_chunk(
+            trans_account_ids[chunk], trans_cardholder_ids[chunk], trans_activation_seconds[chunk], trans_end_seconds
+        ))
+        accounts_processed = min(chunk_start + TRANSACTION_ACCOUNT_CHUNK_SIZE, len(trans_account_ids))
+        print(f"Processed transactions for {accounts_processed}/{len(trans_account_ids)} accounts...")
+        # Total transactions are extrapolated from the accounts processed so far
+        report_progress("Generating transactions", rows=transactions_writer.rows_written,
+                        total_rows=transactions_writer.rows_written * len(trans_account_ids) // accounts_processed)
 
-        for _ in range(TRANSACTIONS_PER_ACTIVATED_ACCOUNT):
-            if transaction_id_counter >= len(transaction_ids):
-                print("Warning: Ran out of pre-generated transaction IDs.")
-                break
-            
-            trans_date = random_date(transaction_start_dt, transaction_end_dt)
-            # MODIFIED: Increased transaction amounts
-            # Lognormal distribution: exp(mu + sigma^2/2) is the mean.
-            # For mean around 1000-1200: mu=6.8, sigma=0.8 => exp(6.8 + 0.8^2/2) = exp(7.12) approx 1236
-            trans_amount = round(np.random.lognormal(mean=6.8, sigma=0.8), 2) 
-            trans_amount = min(trans_amount, 7500) # Increased cap for transaction amount
-            trans_type = random.choices(['Purchase', 'Payment', 'Fee', 'Return'], weights=[0.75, 0.15, 0.05, 0.05], k=1)[0]
-
-            transactions_data.append({
-                'TransactionID': transaction_ids[transaction_id_counter],
-                'AccountID': account_id,
-                'CardholderID': cardholder_id,
-                'TransactionDate': trans_date,
-                'TransactionAmount': trans_amount if trans_type != 'Payment' else -trans_amount,
-                'TransactionType': trans_type
-            })
-            transaction_id_counter += 1
-        if transaction_id_counter >= len(transaction_ids): break
-        if (index + 1) % 1000 == 0: print(f"Processed transactions for {index + 1}/{len(active_accounts_for_trans)} accounts...") # Adjusted print frequency
-
-transactions_df = pd.DataFrame(transactions_data)
-if not transactions_df.empty:
-    transactions_df['TransactionAmount'] = pd.to_numeric(transactions_df['TransactionAmount'])
-    transactions_df['TransactionDate'] = pd.to_datetime(transactions_df['TransactionDate'])
-print(f"Generated {len(transactions_df)} transactions.")
+    if SORT_TRANSACTION_PARTITIONS:
+        transactions_writer.sort_partitions()
+print(f"Generated {transactions_writer.rows_written} transactions in {len(transactions_writer.partition_rows)} partitions.")
 
 
 # --- Add Delinquency Snapshot to Accounts DataFrame ---
 print("Adding delinquency snapshot to accounts...")
+report_progress("Adding delinquency snapshot", rows=transactions_writer.rows_written)
 if not accounts_df.empty:
     accounts_df['SnapshotDate'] = pd.NaT
     accounts_df['OutstandingBalanceAtSnapshot'] = 0.0
@@ -311,13 +437,14 @@ if not accounts_df.empty:
         accounts_df['PaymentDueDateAtSnapshot'] = pd.to_datetime(accounts_df['PaymentDueDateAtSnapshot'], errors='coerce').dt.date
     accounts_df = accounts_df.sort_values(by='AccountOpenDate', na_position='last').reset_index(drop=True)
 
-if not transactions_df.empty:
-    transactions_df['TransactionDate'] = pd.to_datetime(transactions_df['TransactionDate'])
-    transactions_df = transactions_df.sort_values(by='TransactionDate').reset_index(drop=True)
-
 # --- Save to CSV ---
 print("Saving data to CSV files...")
+report_progress("Saving files")
 try:
+    if not cardholders_df.empty:
+        cardholders_df.to_csv('cardholders.csv', index=False)
+    else: print("Cardholders DataFrame is empty. Skipping save.")
+
     if not applications_df.empty:
         applications_df.to_csv('applications.csv', index=False, date_format='%Y-%m-%d %H:%M:%S')
     else: print("Applications DataFrame is empty. Skipping save.")
@@ -326,9 +453,8 @@ try:
         accounts_df.to_csv('accounts.csv', index=False, date_format='%Y-%m-%d') 
     else: print("Accounts DataFrame is empty. Skipping save.")
 
-    if not transactions_df.empty:
-        transactions_df.to_csv('transactions.csv', index=False, date_format='%Y-%m-%d %H:%M:%S')
-    else: print("Transactions DataFrame is empty. Skipping save.")
+    # Transactions were already streamed to date partitions during generation
+    if transactions_writer.rows_written == 0: print("No transactions generated. Skipping save.")
 
     print("Finished saving available data.")
 except Exception as e:
@@ -1,11 +1,13 @@
-import random
+import json
 import pandas as pd
 import numpy as np
-from datetime import datetime, timedelta
-import uuid
+from datetime import datetime
+from id_service import format_ids
+from progress import report_progress
+from financial_statements import StatementEngine
+from rollups import RollupAccumulator
 
 # Set random seed for reproducibility
-random.seed(42)
 np.random.seed(42)
 
 # Define parameters
@@ -14,6 +16,35 @@ end_date = datetime(2025, 12, 31)
 num_transactions = 20000  # Total number of transactions
 num_products = 150
 num_customers = 500
+TRANSACTION_CHUNK_SIZE = 1000000  # Transactions generated and written per chunk; bounds memory use
+
+# Financial statements: monthly income statement, balance sheet and cash flow per STATEMENT_LEVEL
+# ("Department", or "Division" to consolidate departments), accumulated while transactions are generated
+GENERATE_STATEMENTS = True
+STATEMENT_LEVEL = "Department"
+
+# Verification report: summary statistics accumulated from the generated chunks and written to
+# VERIFICATION_REPORT_FILE as JSON. Off by default so production runs skip the extra work
+VERIFICATION_REPORT = False
+VERIFICATION_REPORT_FILE = "verification_report.json"
+
+# Seasonality: transaction dates follow a triangular trend over the date range (peaking at
+# DATE_TREND_MODE of the way through; None for a flat trend), weighted by month of year
+DATE_TREND_MODE = 0.6
+MONTH_WEIGHTS = [0.3, 0.3, 0.3, 0.5, 0.5, 0.5, 0.5, 0.5, 0.5, 0.7, 0.7, 0.7]  # Jan-Dec: Q4 heavy, Q1 light
+
+# Share of products in each category (Supplies, Furniture, Technology, Services, Equipment)
+CATEGORY_WEIGHTS = [0.2, 0.2, 0.2, 0.2, 0.2]
+
+# Product pricing tiers (Tech, Furniture, Consumables, Standard): base cost range and markup range.
+# Technology software/hardware, furniture and consumable supplies have their own tiers; everything else is Standard
+COST_RANGES = [(200, 1500), (100, 800), (10, 100), (50, 300)]
+MARKUP_RANGES = [(1.3, 2.0), (1.2, 1.6), (1.5, 2.2), (1.2, 1.8)]  # Higher margin for tech, medium for furniture, high for consumables
+
+# Division weights (North, South, East, West, Corporate) by product category
+TECHNOLOGY_DIVISION_WEIGHTS = [0.15, 0.15, 0.15, 0.25, 0.3]  # Technology more common in Corporate and West
+SUPPLIES_DIVISION_WEIGHTS = [0.2, 0.2, 0.2, 0.2, 0.2]  # Supplies more evenly distributed
+OTHER_DIVISION_WEIGHTS = [0.25, 0.25, 0.2, 0.2, 0.1]  # Other categories have different distribution
 
 # Define categories and dimensions
 corporate_marketing_categories = ["Supplies", "Furniture", "Technology", "Services", "Equipment"]
@@ -28,211 +59,248 @@ departments = {
 product_classes = ["Consumables", "Capital Goods", "Accessories", "Software", "Hardware", "Services"]
 strategy_categories = ["Core Business", "Growth Area", "Strategic Initiative", "Legacy", "Innovation"]
 
-# Create mapping dictionaries for more realistic data generation
-product_to_category = {}
-product_to_class = {}
-product_to_cost_base = {}  # Base cost for each product
-product_to_price_base = {}  # Base price for each product
-
-# Generate products with consistent attributes
-for i in range(1, num_products + 1):
-    product_id = f"PROD-{i:05d}"
-    category = random.choice(corporate_marketing_categories)
-    product_class = random.choice(product_classes)
-    
-    # Assign logical base cost and price based on category and class
-    if category == "Technology" and product_class in ["Software", "Hardware"]:
-        base_cost = random.uniform(200, 1500)
-        markup = random.uniform(1.3, 2.0)  # Higher margin for tech
-    elif category == "Furniture":
-        base_cost = random.uniform(100, 800)
-        markup = random.uniform(1.2, 1.6)  # Medium margin
-    elif category == "Supplies" and product_class == "Consumables":
-        base_cost = random.uniform(10, 100)
-        markup = random.uniform(1.5, 2.2)  # High margin for consumables
-    else:
-        base_cost = random.uniform(50, 300)
-        markup = random.uniform(1.2, 1.8)
-    
-    base_price = base_cost * markup
-    
-    product_to_category[product_id] = category
-    product_to_class[product_id] = product_class
-    product_to_cost_base[product_id] = base_cost
-    product_to_price_base[product_id] = base_price
+# Lookup tables over category / product class codes (positions in the lists above)
+category_division_weights = np.array([
+    TECHNOLOGY_DIVISION_WEIGHTS if category == "Technology"
+    else SUPPLIES_DIVISION_WEIGHTS if category == "Supplies"
+    else OTHER_DIVISION_WEIGHTS
+    for category in corporate_marketing_categories])
+category_division_cdf = np.cumsum(category_division_weights / category_division_weights.sum(axis=1, keepdims=True), axis=1)
+
+# Time-based trends over the whole date range, by category:
+# - Technology costs decrease over time and competition makes prices fall faster (up to 15% / 20%)
+# - Supplies costs increase due to inflation, prices slightly more due to markup (up to 10% / 12%)
+# - Other categories have mild cost increases that prices follow (up to 8% / 9%)
+category_cost_trends = np.array([{"Technology": -0.15, "Supplies": 0.1}.get(category, 0.08) for category in corporate_marketing_categories])
+category_price_trends = np.array([{"Technology": -0.2, "Supplies": 0.12}.get(category, 0.09) for category in corporate_marketing_categories])
+
+# Strategy rules by product class: with probability rule_prob the strategy is first_strategy (with
+# probability first_prob) or second_strategy; otherwise it is any strategy category at random
+strategy_rules = {
+    "Software": (0.7, "Growth Area", 0.6, "Strategic Initiative"),
+    "Services": (0.7, "Growth Area", 0.6, "Strategic Initiative"),
+    "Consumables": (1.0, "Core Business", 0.8, "Legacy"),
+    "Hardware": (0.6, "Innovation", 0.4, "Strategic Initiative"),
+}
+class_rules = [strategy_rules.get(product_class, (0.0, strategy_categories[0], 1.0, strategy_categories[0]))
+               for product_class in product_classes]
+class_rule_prob = np.array([rule[0] for rule in class_rules])
+class_first_strategy = np.array([strategy_categories.index(rule[1]) for rule in class_rules])
+class_first_prob = np.array([rule[2] for rule in class_rules])
+class_second_strategy = np.array([strategy_categories.index(rule[3]) for rule in class_rules])
+
+# Columnar product table: category and class codes, base cost and base price per product
+product_ids = format_ids("PROD-", np.arange(1, num_products + 1), 5)
+product_category_codes = np.random.choice(len(corporate_marketing_categories), num_products, p=CATEGORY_WEIGHTS).astype(np.int8)
+product_class_codes = np.random.randint(0, len(product_classes), num_products).astype(np.int8)
+
+# Assign logical base cost and price based on category and class
+product_category_names = np.array(corporate_marketing_categories)[product_category_codes]
+product_class_names = np.array(product_classes)[product_class_codes]
+product_pricing_tiers = np.select(
+    [(product_category_names == "Technology") & np.isin(product_class_names, ["Software", "Hardware"]),
+     product_category_names == "Furniture",
+     (product_category_names == "Supplies") & (product_class_names == "Consumables")],
+    [0, 1, 2], 3)
+cost_ranges = np.array(COST_RANGES, dtype=float)[product_pricing_tiers]
+markup_ranges = np.array(MARKUP_RANGES, dtype=float)[product_pricing_tiers]
+product_base_costs = np.random.uniform(cost_ranges[:, 0], cost_ranges[:, 1])
+product_base_prices = product_base_costs * np.random.uniform(markup_ranges[:, 0], markup_ranges[:, 1])
 
 # Generate customer IDs
-customers = [f"CUST-{i:05d}" for i in range(1, num_customers + 1)]
+customer_ids = format_ids("CUST-", np.arange(1, num_customers + 1), 5)
+
+# Departments flattened so a (division, position) pair maps to one array index
+department_values = np.array([dept for division in divisions for dept in departments[division]])
+department_counts = np.array([len(departments[division]) for division in divisions])
+department_offsets = np.cumsum(department_counts) - department_counts
 
-# Function to generate a single transaction
-def generate_transaction(transaction_id):
-    # Generate transaction date with more transactions in certain periods
+def daily_date_distribution(start_date, end_date):
+    """Probability of a transaction landing on each day: the triangular trend times the month weight."""
     days_range = (end_date - start_date).days
-    
-    # Create seasonal patterns with more sales in Q4 and fewer in Q1
-    while True:
-        random_days = int(np.random.triangular(0, days_range*0.6, days_range))
-        date = start_date + timedelta(days=random_days)
-        month = date.month
-        
-        # Higher probability of transactions in Q4 (Oct-Dec), lower in Q1 (Jan-Mar)
-        if month in [10, 11, 12]:  # Q4
-            if random.random() < 0.7:  # 70% chance to accept this date
-                break
-        elif month in [1, 2, 3]:  # Q1
-            if random.random() < 0.3:  # 30% chance to accept this date
-                break
-        else:  # Q2 and Q3
-            if random.random() < 0.5:  # 50% chance to accept this date
-                break
-    
-    # Select a product
-    product_id = random.choice(list(product_to_category.keys()))
-    
-    # Get product attributes
-    category = product_to_category[product_id]
-    product_class = product_to_class[product_id]
-    
-    # Determine division with some categories more common in certain divisions
-    if category == "Technology":
-        # Technology more common in Corporate and West
-        division_weights = [0.15, 0.15, 0.15, 0.25, 0.3]  # North, South, East, West, Corporate
-    elif category == "Supplies":
-        # Supplies more evenly distributed
-        division_weights = [0.2, 0.2, 0.2, 0.2, 0.2]
+    days = np.arange(days_range + 1)
+    if DATE_TREND_MODE is None or days_range == 0:
+        trend = np.ones(len(days))
     else:
-        # Other categories have different distribution
-        division_weights = [0.25, 0.25, 0.2, 0.2, 0.1]
-    
-    division = random.choices(divisions, weights=division_weights, k=1)[0]
-    
+        # Mass of int(triangular(0, mode, days_range)) on each day, from the triangular CDF
+        mode = days_range * DATE_TREND_MODE
+        edges = np.minimum(np.arange(days_range + 2), days_range).astype(float)
+        cdf = np.where(edges <= mode, edges ** 2 / (days_range * max(mode, 1e-9)),
+                       1 - (days_range - edges) ** 2 / (days_range * max(days_range - mode, 1e-9)))
+        trend = np.diff(cdf)
+        trend[-1] = max(trend[-1], 1e-12)  # Keep the end date reachable as with the original draws
+    dates = np.datetime64(start_date.date()) + days
+    months = dates.astype('datetime64[M]').astype(int) % 12
+    weights = trend * np.array(MONTH_WEIGHTS)[months]
+    return dates, np.cumsum(weights / weights.sum())
+
+def generate_transactions(first_number, n):
+    """Generates n transactions numbered from first_number, all columns at once; returns the DataFrame and dimension codes."""
+    # Transaction dates: inverse-CDF draws from the precomputed daily distribution
+    day_idx = np.minimum(np.searchsorted(date_cdf, np.random.random(n), side='right'), len(transaction_dates) - 1)
+    dates = transaction_dates[day_idx]
+
+    # Select products; product attributes are integer gathers from the product table
+    prod_idx = np.random.randint(0, num_products, n)
+    category_code = product_category_codes[prod_idx]
+    class_code = product_class_codes[prod_idx]
+
+    # Determine division with some categories more common in certain divisions
+    division_idx = np.minimum((np.random.random(n)[:, None] > category_division_cdf[category_code]).sum(axis=1),
+                              len(divisions) - 1)
+
     # Select department based on division
-    department = random.choice(departments[division])
-    
-    # Select strategy category with some logic
-    if product_class in ["Software", "Services"] and random.random() < 0.7:
-        strategy = "Growth Area" if random.random() < 0.6 else "Strategic Initiative"
-    elif product_class == "Consumables":
-        strategy = "Core Business" if random.random() < 0.8 else "Legacy"
-    elif product_class == "Hardware" and random.random() < 0.6:
-        strategy = "Innovation" if random.random() < 0.4 else "Strategic Initiative"
-    else:
-        strategy = random.choice(strategy_categories)
-    
-    # Get base cost and price for the product
-    base_cost = product_to_cost_base[product_id]
-    base_price = product_to_price_base[product_id]
-    
+    department_idx = department_offsets[division_idx] + (np.random.random(n) * department_counts[division_idx]).astype(int)
+
+    # Select strategy category from the product class rules
+    strategy_idx = np.where(
+        np.random.random(n) < class_rule_prob[class_code],
+        np.where(np.random.random(n) < class_first_prob[class_code], class_first_strategy[class_code], class_second_strategy[class_code]),
+        np.random.randint(0, len(strategy_categories), n))
+
     # Add some variability to cost and price
-    cost_variability = random.uniform(0.95, 1.05)  # ±5% variability
-    price_variability = random.uniform(0.97, 1.08)  # Slightly higher price variability
-    
-    # Introduce time-based trends:
-    # - Costs generally increase over time (inflation)
-    # - Prices may increase or decrease based on competition and market
-    days_factor = random_days / days_range
-    
-    if category == "Technology":
-        # Technology costs decrease over time (newer tech gets cheaper)
-        cost_trend = 1 - (days_factor * 0.15)  # Up to 15% decrease over the period
-        # But competition causes prices to decrease faster
-        price_trend = 1 - (days_factor * 0.2)  # Up to 20% decrease over the period
-    elif category == "Supplies":
-        # Supplies costs increase due to inflation
-        cost_trend = 1 + (days_factor * 0.1)  # Up to 10% increase
-        # Prices increase slightly more due to markup
-        price_trend = 1 + (days_factor * 0.12)  # Up to 12% increase
-    else:
-        # Other categories have mild cost increases
-        cost_trend = 1 + (days_factor * 0.08)  # Up to 8% increase
-        # Prices rise with costs
-        price_trend = 1 + (days_factor * 0.09)  # Up to 9% increase
-    
+    cost_variability = np.random.uniform(0.95, 1.05, n)  # ±5% variability
+    price_variability = np.random.uniform(0.97, 1.08, n)  # Slightly higher price variability
+
+    # Time-based trends scale with how far through the date range the transaction falls
+    days_factor = day_idx / max(len(transaction_dates) - 1, 1)
+    cost_trend = 1 + days_factor * category_cost_trends[category_code]
+    price_trend = 1 + days_factor * category_price_trends[category_code]
+
     # Apply all factors
-    final_cost = base_cost * cost_variability * cost_trend
-    final_price = base_price * price_variability * price_trend
-    
+    final_cost = product_base_costs[prod_idx] * cost_variability * cost_trend
+    final_price = product_base_prices[prod_idx] * price_variability * price_trend
+
     # Add some randomness to sales amounts (e.g., discounts, bulk purchases)
-    quantity = np.random.choice([1, 1, 1, 2, 2, 3, 4, 5], p=[0.5, 0.2, 0.1, 0.1, 0.05, 0.03, 0.01, 0.01])
-    
-    # Adjust pricing for bulk purchases
-    if quantity > 1:
-        bulk_discount = 1 - (quantity * 0.02)  # 2% discount per quantity
-        final_price = final_price * max(bulk_discount, 0.85)  # max 15% discount
-    
-    sales_amount = round(final_price * quantity, 2)
-    cost_of_goods_sold = round(final_cost * quantity, 2)
-    
+    quantity = np.random.choice([1, 1, 1, 2, 2, 3, 4, 5], n, p=[0.5, 0.2, 0.1, 0.1, 0.05, 0.03, 0.01, 0.01])
+
+    # Adjust pricing for bulk purchases: 2% discount per quantity, max 15% discount
+    final_price = final_price * np.where(quantity > 1, np.maximum(1 - quantity * 0.02, 0.85), 1)
+
+    sales_amount = np.round(final_price * quantity, 2)
+    cost_of_goods_sold = np.round(final_cost * quantity, 2)
+
     # Ensure profits are generally positive but allow some negative margins
-    if cost_of_goods_sold > sales_amount and random.random() > 0.05:  # Only allow 5% of transactions to have negative margins
-        # Adjust sales amount to create a small positive margin
-        sales_amount = round(cost_of_goods_sold * random.uniform(1.01, 1.1), 2)
-    
-    # Select a customer
-    customer_id = random.choice(customers)
-    
-    return {
-        "TransactionID": f"ORD-{transaction_id:06d}",
-        "TransactionDate": date.strftime("%Y-%m-%d"),
-        "ProductID": product_id,
-        "CustomerID": customer_id,
+    # Only allow 5% of transactions to have negative margins; the rest get a small positive margin
+    fix_margin = (cost_of_goods_sold > sales_amount) & (np.random.random(n) > 0.05)
+    sales_amount = np.where(fix_margin, np.round(cost_of_goods_sold * np.random.uniform(1.01, 1.1, n), 2), sales_amount)
+
+    chunk_df = pd.DataFrame({
+        "TransactionID": format_ids("ORD-", np.arange(first_number, first_number + n), transaction_id_width),
+        "TransactionDate": dates,
+        "ProductID": product_ids[prod_idx],
+        "CustomerID": customer_ids[np.random.randint(0, num_customers, n)],
         "SalesAmount": sales_amount,
         "CostOfGoodsSold": cost_of_goods_sold,
-        "CorporateMarketingCategory": category,
-        "Division": division,
-        "Department": department,
-        "ProductClass": product_class,
-        "StrategyCategory": strategy
-    }
+        "CorporateMarketingCategory": np.array(corporate_marketing_categories)[category_code],
+        "Division": np.array(divisions)[division_idx],
+        "Department": department_values[department_idx],
+        "ProductClass": np.array(product_classes)[class_code],
+        "StrategyCategory": np.array(strategy_categories)[strategy_idx]
+    })
 
-# Generate all transactions
-transactions = [generate_transaction(i) for i in range(1, num_transactions + 1)]
+    # Add calculated fields for reference (these would typically be created in Tableau)
+    chunk_df["Profit"] = chunk_df["SalesAmount"] - chunk_df["CostOfGoodsSold"]
+    chunk_df["MarginRate"] = chunk_df["Profit"] / chunk_df["SalesAmount"]
+    chunk_df["Year"] = dates.astype('datetime64[Y]').astype(int) + 1970
+    codes = {"day": day_idx, "category": category_code, "division": division_idx, "department": department_idx}
+    return chunk_df, codes
 
-# Convert to DataFrame
-df = pd.DataFrame(transactions)
+class VerificationReport:
+    """Verification statistics accumulated from each chunk's codes and measures, without re-reading the table."""
 
-# Add calculated fields for reference (these would typically be created in Tableau)
-df["Profit"] = df["SalesAmount"] - df["CostOfGoodsSold"]
-df["MarginRate"] = df["Profit"] / df["SalesAmount"]
-df["Year"] = pd.to_datetime(df["TransactionDate"]).dt.year
+    def __init__(self):
+        self.first_year = start_date.year
+        self.day_year_codes = transaction_dates.astype('datetime64[Y]').astype(int) + 1970 - self.first_year
+        self.category_totals = RollupAccumulator(
+            "category_summary", [("CorporateMarketingCategory", np.array(corporate_marketing_categories))],
+            ["SalesAmount", "Profit"])
+        self.year_division_totals = RollupAccumulator(
+            "year_division_summary",
+            [("Year", np.arange(self.first_year, end_date.year + 1)), ("Division", np.array(divisions))],
+            ["SalesAmount", "Profit"])
+        self.first_day, self.last_day = None, None
+        self.margin_rate_sum = 0.0
+
+    def add(self, chunk_df, codes):
+        """Adds one generated chunk."""
+        values = {"SalesAmount": chunk_df["SalesAmount"].to_numpy(), "Profit": chunk_df["Profit"].to_numpy()}
+        self.category_totals.add({"CorporateMarketingCategory": codes["category"]}, values)
+        self.year_division_totals.add({"Year": self.day_year_codes[codes["day"]], "Division": codes["division"]}, values)
+        first_day, last_day = codes["day"].min(), codes["day"].max()
+        self.first_day = first_day if self.first_day is None else min(self.first_day, first_day)
+        self.last_day = last_day if self.last_day is None else max(self.last_day, last_day)
+        self.margin_rate_sum += chunk_df["MarginRate"].sum()
+
+    def to_dict(self):
+        """The report as a JSON-serialisable dict."""
+        category_summary = self.category_totals.to_frame().rename(columns={"Rows": "Count"})
+        category_summary["MarginRate"] = category_summary["Profit"] / category_summary["SalesAmount"]
+        year_division_summary = self.year_division_totals.to_frame().rename(columns={"Rows": "Count"})
+        year_counts = year_division_summary.groupby("Year")["Count"].sum()
+        total = int(self.category_totals.row_counts.sum())
+        return {
+            "transactions": total,
+            "first_date": str(transaction_dates[self.first_day]),
+            "last_date": str(transaction_dates[self.last_day]),
+            "average_sales_amount": float(self.category_totals.sums["SalesAmount"].sum() / total),
+            "average_margin_rate": float(self.margin_rate_sum / total),
+            "year_distribution": {str(year): int(count) for year, count in year_counts.items()},
+            "category_summary": category_summary.to_dict(orient="records"),
+            "year_division_summary": year_division_summary.to_dict(orient="records"),
+        }
+
+transaction_dates, date_cdf = daily_date_distribution(start_date, end_date)
+# Order IDs share one width across chunks
+transaction_id_width = max(6, len(str(num_transactions)))
+
+# Statements accumulate monthly totals per department as chunks are generated
+statement_engine = None
+if GENERATE_STATEMENTS:
+    statement_engine = StatementEngine(start_date, end_date, department_values, np.repeat(divisions, department_counts))
+
+verification_report = VerificationReport() if VERIFICATION_REPORT else None
+
+# Generate transactions chunk by chunk, appending each chunk to the CSV
+for chunk_start in range(0, num_transactions, TRANSACTION_CHUNK_SIZE):
+    chunk_df, chunk_codes = generate_transactions(chunk_start + 1, min(TRANSACTION_CHUNK_SIZE, num_transactions - chunk_start))
+    chunk_df.to_csv("sales_transactions.csv", mode='w' if chunk_start == 0 else 'a', header=chunk_start == 0, index=False)
+    if statement_engine is not None:
+        statement_engine.add(chunk_df["TransactionDate"].to_numpy(), chunk_codes["department"],
+                             chunk_df["SalesAmount"].to_numpy(), chunk_df["CostOfGoodsSold"].to_numpy())
+    if verification_report is not None:
+        verification_report.add(chunk_df, chunk_codes)
+    report_progress("Generating transactions", rows=min(chunk_start + TRANSACTION_CHUNK_SIZE, num_transactions),
+                    total_rows=num_transactions)
+    if num_transactions > TRANSACTION_CHUNK_SIZE:
+        print(f"Generated {min(chunk_start + TRANSACTION_CHUNK_SIZE, num_transactions)}/{num_transactions} transactions...")
+print(f"{num_transactions} transactions saved to sales_transactions.csv")
 
 # Verify data
-print(f"Data ranges from {df['TransactionDate'].min()} to {df['TransactionDate'].max()}")
-print(f"Total number of transactions: {len(df)}")
-print(f"Average Sales Amount: ${df['SalesAmount'].mean():.2f}")
-print(f"Average Margin Rate: {df['MarginRate'].mean():.2%}")
-print(f"Year distribution: {df['Year'].value_counts().to_dict()}")
-
-# Save the data
-df.to_csv("sales_transactions.csv", index=False)
-print("Data saved to sales_transactions.csv")
-
-# Generate some summary statistics for verification
-print("\nSummary by Corporate Marketing Category:")
-category_summary = df.groupby("CorporateMarketingCategory").agg({
-    "SalesAmount": "sum",
-    "Profit": "sum",
-    "TransactionID": "count"
-}).rename(columns={"TransactionID": "Count"})
-category_summary["MarginRate"] = category_summary["Profit"] / category_summary["SalesAmount"]
-print(category_summary)
-
-print("\nSummary by Year and Division:")
-year_division_summary = df.groupby(["Year", "Division"]).agg({
-    "SalesAmount": "sum",
-    "Profit": "sum"
-})
-print(year_division_summary)
+if verification_report is not None:
+    report = verification_report.to_dict()
+    with open(VERIFICATION_REPORT_FILE, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Data ranges from {report['first_date']} to {report['last_date']}")
+    print(f"Average Sales Amount: ${report['average_sales_amount']:.2f}")
+    print(f"Average Margin Rate: {report['average_margin_rate']:.2%}")
+    print(f"Year distribution: {report['year_distribution']}")
+    print(f"Verification report saved to {VERIFICATION_REPORT_FILE}")
 
 # Optional: Create a product master table
-product_df = pd.DataFrame([
-    {
-        "ProductID": prod_id,
-        "CorporateMarketingCategory": product_to_category[prod_id],
-        "ProductClass": product_to_class[prod_id],
-        "BaseCost": product_to_cost_base[prod_id],
-        "BasePrice": product_to_price_base[prod_id]
-    } for prod_id in product_to_category.keys()
-])
+product_df = pd.DataFrame({
+    "ProductID": product_ids,
+    "CorporateMarketingCategory": product_category_names,
+    "ProductClass": product_class_names,
+    "BaseCost": product_base_costs,
+    "BasePrice": product_base_prices
+})
 product_df.to_csv("product_master.csv", index=False)
-print("Product master data saved to product_master.csv")
\ No newline at end of file
+print("Product master data saved to product_master.csv")
+
+# Financial statements derived from the accumulated monthly totals
+if statement_engine is not None:
+    report_progress("Building financial statements", rows=num_transactions)
+    for statement_name, statement_df in statement_engine.statements(level=STATEMENT_LEVEL).items():
+        statement_df.to_csv(f"{statement_name}.csv", index=False)
+        print(f"{statement_name.replace('_', ' ').capitalize()} saved to {statement_name}.csv")
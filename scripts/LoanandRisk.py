@@ -2,6 +2,7 @@ import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
 import random
+from progress import report_progress
 
 # Set random seed for reproducibility
 np.random.seed(42)
@@ -100,12 +101,15 @@ def generate_network_connections(companies_df):
 
 def main():
     # Generate company profiles
+    report_progress("Generating company profiles")
     companies_df = generate_company_profiles()
     
     # Generate historical data
+    report_progress("Generating historical risk data", rows=len(companies_df))
     historical_df = generate_historical_data(companies_df)
     
     # Generate network connections
+    report_progress("Generating network connections", rows=len(companies_df) + len(historical_df))
     connections_df = generate_network_connections(companies_df)
     
     # Save to CSV files
@@ -1,7 +1,14 @@
 import pandas as pd
 import numpy as np
+import argparse
 import datetime
-import random # For probabilistic choices
+import json
+import zlib
+
+from id_service import IdMinter, format_ids
+from partitioned_writer import PartitionedCsvWriter
+from rollups import RollupCube
+from progress import report_progress
 
 # --- Configuration ---
 # Set the reference date for generation (Today)
@@ -11,6 +18,43 @@ END_DATE = TODAY + datetime.timedelta(days=1*365) # Data generation stops *befor
 
 OUTPUT_FILENAME = "marketing_funnel_data_v3.csv" # Updated filename
 
+# --- Rollup Settings ---
+# Rollups are accumulated block by block while rows are generated; EMIT_ROLLUPS writes them to ROLLUP_OUTPUT_DIR
+EMIT_ROLLUPS = False
+ROLLUP_OUTPUT_DIR = "rollups"
+ROLLUPS = {
+    "monthly_channel_region_content": ["Month", "Channel", "Region", "ContentType"],
+    "monthly_channel_product": ["Month", "Channel", "ProductFocus"],
+    "yearly_channel_region": ["Year", "Channel", "Region"],
+    "yearly_totals": ["Year"],
+    "content_type": ["ContentType"],
+    "intent_stage": ["IntentStage"],
+    "time_of_day": ["TimeOfDayBucket"],
+}
+ROLLUP_MEASURES = ["Impressions", "Clicks", "Spend", "Leads", "MQLs", "SQLs", "Opportunities", "Wins"]
+
+# --- Event Expansion Settings ---
+# EMIT_EVENTS expands the daily counts into one record per funnel event, streamed to EVENTS_OUTPUT_DIR by month
+EMIT_EVENTS = False
+EVENTS_OUTPUT_DIR = "events"
+EVENT_PARTITION_FREQ = 'M' # 'D', 'M' or 'Y'
+INCLUDE_IMPRESSION_EVENTS = False # Impressions outnumber clicks ~25x, so they are off by default
+EVENT_CHUNK_SIZE = 1000000 # Max funnel entries (base-stage events) expanded per write; bounds memory
+EVENT_ID_WIDTH = 12
+VISITOR_ID_KEY = "marketing-visitors"
+TIME_OF_DAY_HOURS = {"Morning (6-12)": (6, 12), "Afternoon (12-18)": (12, 18), "Evening (18-24)": (18, 24), "Late Night (0-6)": (0, 6)}
+# Funnel stages in order: (event type, count column, event ID prefix, mean hours after the previous stage)
+EVENT_STAGES = [
+    ("Impression", "Impressions", "IMP-", 0),
+    ("Click", "Clicks", "CLK-", 0.01),
+    ("Lead", "Leads", "LED-", 0.25),
+    ("MQL", "MQLs", "MQL-", 48),
+    ("SQL", "SQLs", "SQL-", 120),
+    ("Opportunity", "Opportunities", "OPP-", 168),
+    ("Win", "Wins", "WIN-", 504),
+]
+EVENT_DIMENSIONS = ["Channel", "Region", "ProductFocus", "DeviceType", "AudienceSegment", "TimeOfDayBucket", "CampaignNames"]
+
 # Dimensions
 CHANNELS = ["Organic Search", "Paid Search", "Paid Social - ConnectSphere", "Paid Social - PixelVerse", "Email Marketing", "Referral", "Direct", "AI ContentSynergy"]
 REGIONS = ["North America", "Europe", "APAC", "LATAM"]
@@ -142,265 +186,440 @@ DIMENSION_MODIFIERS = {
 }
 
 
+# --- Engine Settings ---
+DAYS_PER_BLOCK = 90 # Days computed per day x channel x region grid block; bounds memory and sets progress granularity
+GROWTH_RATE_PER_DAY = 0.0005
+REGION_FACTORS = {"North America": 1.1, "Europe": 1.0, "APAC": 0.8, "LATAM": 0.6} # Regions not listed use 1.0
+MODIFIER_KEYS = ["imp_mult", "ctr_mult", "conv_mult", "spend_factor_mult"]
+
+# --- Story Point Dates ---
+ALGO_HIT_START = datetime.date(2024, 3, 1); ALGO_HIT_END = datetime.date(2024, 6, 30)
+ALGO_REC_START = datetime.date(2024, 7, 1); ALGO_REC_END = datetime.date(2024, 10, 31)
+CONNECTSPHERE_OFFICIAL_START = datetime.date(2023, 10, 1)
+PIXELVERSE_DECLINE_START = datetime.date(2024, 7, 1)
+AI_SYNERGY_START = datetime.date(2025, 8, 1)
+
+
+# --- Scenario Config ---
+# Module constants a JSON scenario file (--config) may override; keys are the lower-case names, dates are ISO strings
+CONFIG_KEYS = ["TODAY", "START_DATE", "END_DATE", "OUTPUT_FILENAME", "EMIT_ROLLUPS", "EMIT_EVENTS", "INCLUDE_IMPRESSION_EVENTS",
+               "CHANNELS", "REGIONS", "PRODUCTS", "CAMPAIGNS", "BASE_METRICS", "CONVERSION_RATES", "DIMENSION_PROBS",
+               "DIMENSION_MODIFIERS", "REGION_FACTORS", "GROWTH_RATE_PER_DAY"]
+DATE_CONFIG_KEYS = {"TODAY", "START_DATE", "END_DATE"}
+
+
 # --- Helper Functions ---
-def get_active_campaigns(current_date, channel, product):
-    """Finds campaigns active on a given date for a specific channel/product."""
-    # (Same as v2)
-    active = []
-    for campaign in CAMPAIGNS:
-        is_active_date = campaign["start_date"] <= current_date <= campaign["end_date"]
-        is_target_channel = not campaign["channels"] or channel in campaign["channels"]
-        is_target_product = not campaign["products"] or product in campaign["products"]
-        if is_active_date and is_target_channel and is_target_product:
-            active.append(campaign)
-    return active
-
-def choose_dimension_value(category, channel):
-    """Probabilistically chooses a value for a dimension based on channel or default."""
-    # (Enhanced to handle new categories using defaults)
-    if category == "KeywordTheme":
-        probs = DIMENSION_PROBS[category].get(channel, DIMENSION_PROBS[category]["default"])
-    elif category == "ContentType":
-         probs = DIMENSION_PROBS[category].get(channel, DIMENSION_PROBS[category]["default"])
-    elif category in ["AudienceSegment", "IntentStage", "TimeOfDayBucket"]:
-        probs = DIMENSION_PROBS[category].get("default") # Using default for these
-    else: # DeviceType
-        probs = DIMENSION_PROBS[category].get(channel, list(DIMENSION_PROBS[category].values())[0])
-
-    choices = list(probs.keys())
-    weights = list(probs.values())
-    total_weight = sum(weights)
-    if not np.isclose(total_weight, 1.0):
-        # print(f"Warning: Weights for {category}/{channel} do not sum to 1 ({total_weight}). Normalizing.")
-        if total_weight == 0: # Avoid division by zero if all weights are somehow zero
-             if choices: return random.choice(choices)
-             else: return None # Should not happen with defined defaults
-        weights = [w / total_weight for w in weights]
-
-    weights = [max(0, w) for w in weights] # Ensure non-negative
-    total_weight = sum(weights)
-    if total_weight == 0:
-        if choices: return random.choice(choices)
-        else: return None
-    weights = [w / total_weight for w in weights] # Re-normalize after clamping
-
-    return random.choices(choices, weights=weights, k=1)[0]
+def apply_config_file(path):
+    """
+    Overrides the catalogue and settings constants from a JSON scenario file.
+
+    Besides the CONFIG_KEYS, "include_future_campaigns": false drops campaigns starting after TODAY.
+    """
+    with open(path) as f:
+        config = json.load(f)
+    unknown = set(config) - {key.lower() for key in CONFIG_KEYS} - {"include_future_campaigns"}
+    if unknown:
+        raise ValueError(f"Unknown config keys: {sorted(unknown)}")
+    for key in CONFIG_KEYS:
+        if key.lower() not in config:
+            continue
+        value = config[key.lower()]
+        if key in DATE_CONFIG_KEYS:
+            value = datetime.date.fromisoformat(value)
+        elif key == "CAMPAIGNS":
+            value = [dict(camp, start_date=datetime.date.fromisoformat(camp["start_date"]),
+                          end_date=datetime.date.fromisoformat(camp["end_date"])) for camp in value]
+        globals()[key] = value
+    if not config.get("include_future_campaigns", True):
+        globals()["CAMPAIGNS"] = [camp for camp in CAMPAIGNS if camp["start_date"] <= TODAY]
+
+def resolve_probs(table, channel):
+    """Channel-specific probabilities, falling back to 'default' (or the first entry if there is none)."""
+    return table.get(channel, table.get("default", next(iter(table.values()))))
+
+def build_cdf(probs, value_names):
+    """Clamps negative weights, normalises, and falls back to uniform over the listed choices if all are zero."""
+    weights = np.array([max(0.0, probs.get(v, 0.0)) for v in value_names], dtype=float)
+    if weights.sum() == 0:
+        weights = np.array([1.0 if v in probs else 0.0 for v in value_names])
+    cdf = np.cumsum(weights / weights.sum())
+    cdf[-1] = 1.0
+    return cdf
+
+
+class MarketingCatalogue:
+    """
+    Channel, dimension and campaign catalogues compiled once into dense lookup arrays.
+
+    Dimension probabilities become (channel, value) CDF matrices, modifiers become (value, MODIFIER_KEYS)
+    matrices, and campaigns become (day, channel, product) effect tensors over the whole date range, so
+    the grid engine only gathers from arrays.
+    """
+
+    def __init__(self, start_date, total_days):
+        self.channels = list(CHANNELS)
+        self.regions = list(REGIONS)
+        self.products = list(PRODUCTS)
+        self.conversion_rates = dict(CONVERSION_RATES)
+
+        # --- Per-channel and per-region base values ---
+        self.base_impressions = np.array([BASE_METRICS[ch]["impressions"] for ch in self.channels], dtype=float)
+        self.base_ctr = np.array([BASE_METRICS[ch]["ctr"] for ch in self.channels], dtype=float)
+        self.base_spend_factor = np.array([BASE_METRICS[ch]["spend_factor"] for ch in self.channels], dtype=float)
+        self.region_factors = np.array([REGION_FACTORS.get(r, 1.0) for r in self.regions], dtype=float)
+        # Stable product rotation offset per (channel, region): crc32 is not salted per process like hash()
+        self.product_offsets = np.array([[zlib.crc32(f"{ch}|{r}".encode()) % len(self.products) for r in self.regions]
+                                         for ch in self.channels])
+
+        # --- Dimension tables ---
+        self.dimension_values = {} # category -> value names
+        self.dimension_cdfs = {} # category -> (channel, value) cumulative probabilities
+        self.dimension_modifiers = {} # category -> (value, MODIFIER_KEYS) multipliers
+        for category, table in DIMENSION_PROBS.items():
+            value_names = list(dict.fromkeys(v for probs in table.values() for v in probs))
+            self.dimension_values[category] = np.array(value_names)
+            self.dimension_cdfs[category] = np.array([build_cdf(resolve_probs(table, ch), value_names) for ch in self.channels])
+            mods = DIMENSION_MODIFIERS.get(category, {})
+            self.dimension_modifiers[category] = np.array([[mods.get(v, {}).get(key, 1.0) for key in MODIFIER_KEYS]
+                                                           for v in value_names])
+
+        self.compile_campaigns(start_date, total_days)
+
+    def compile_campaigns(self, start_date, total_days):
+        """Builds (day, channel, product) tensors of campaign effects and active-campaign combination codes."""
+        dates = np.datetime64(start_date) + np.arange(total_days)
+        shape = (total_days, len(self.channels), len(self.products))
+        active = np.zeros((len(CAMPAIGNS),) + shape, dtype=bool)
+        for k, camp in enumerate(CAMPAIGNS):
+            channel_mask = np.array([not camp["channels"] or ch in camp["channels"] for ch in self.channels])
+            product_mask = np.array([not camp["products"] or p in camp["products"] for p in self.products])
+            date_mask = (dates >= np.datetime64(camp["start_date"])) & (dates <= np.datetime64(camp["end_date"]))
+            active[k] = date_mask[:, None, None] & channel_mask[None, :, None] & product_mask[None, None, :]
+
+        def effect(key, combine, identity):
+            values = np.array([camp[key] for camp in CAMPAIGNS], dtype=float).reshape((-1, 1, 1, 1))
+            return combine(np.where(active, values, identity), axis=0) if len(CAMPAIGNS) else np.full(shape, identity)
+        self.campaign_imp_mult = effect("imp_mult", np.prod, 1.0)
+        self.campaign_ctr_abs = effect("ctr_abs", np.sum, 0.0)
+        self.campaign_spend_abs = effect("spend_abs", np.sum, 0.0)
+        self.campaign_lead_mult = effect("lead_mult", np.prod, 1.0)
+
+        # Name each distinct combination of active campaigns once instead of joining strings per row
+        self.campaign_combo = np.zeros(shape, dtype=np.intp)
+        self.campaign_combo_names = np.array(["Organic/Baseline"], dtype=object)
+        if len(CAMPAIGNS):
+            packed = np.packbits(active.reshape(len(CAMPAIGNS), -1), axis=0).T
+            combos, inverse = np.unique(packed, axis=0, return_inverse=True)
+            self.campaign_combo = inverse.reshape(shape)
+            self.campaign_combo_names = np.array([
+                "; ".join(c["name"] for c, on in zip(CAMPAIGNS, combo) if on) or "Organic/Baseline"
+                for combo in np.unpackbits(combos, axis=1, count=len(CAMPAIGNS)).astype(bool)
+            ], dtype=object)
+
+    def channel_column(self, channel):
+        """Index of a channel in the catalogue, or None if it is not being generated."""
+        return self.channels.index(channel) if channel in self.channels else None
+
+    def sample_dimension(self, category, shape):
+        """Draws value indices for a (day, channel, region) grid from each channel's CDF row."""
+        cdfs = self.dimension_cdfs[category][None, :, None, :]
+        return (cdfs <= np.random.random(shape)[..., None]).sum(axis=-1)
+
+    def product_focus_indices(self, dates):
+        """ProductFocus index for every (day, channel, region) cell; rotates daily by absolute date."""
+        day_numbers = dates.astype('datetime64[D]').astype(np.int64)
+        return (day_numbers[:, None, None] + self.product_offsets[None, :, :]) % len(self.products)
+
+
+def date_between(dates, start, end):
+    """Boolean mask of dates (datetime64[D]) within [start, end]."""
+    return (dates >= np.datetime64(start)) & (dates <= np.datetime64(end))
+
+def days_since(dates, start):
+    """Whole days from start to each date (negative before start)."""
+    return (dates - np.datetime64(start)).astype(np.int64)
+
+def apply_story_points(catalogue, dates, global_factor, impressions, ctr):
+    """Applies the channel story lines (algo hit, channel launches and decline) to (day, channel) grids in place."""
+    col = catalogue.channel_column("Organic Search")
+    if col is not None:
+        imp_mult = np.ones(len(dates)); ctr_mult = np.ones(len(dates))
+        hit = date_between(dates, ALGO_HIT_START, ALGO_HIT_END)
+        imp_mult[hit] = 0.65; ctr_mult[hit] = 0.85
+        recovery = date_between(dates, ALGO_REC_START, ALGO_REC_END)
+        recovery_progress = days_since(dates[recovery], ALGO_REC_START) / (ALGO_REC_END - ALGO_REC_START).days
+        imp_mult[recovery] = 0.65 + 0.30 * recovery_progress; ctr_mult[recovery] = 0.85 + 0.13 * recovery_progress
+        impressions[:, col] *= imp_mult; ctr[:, col] *= ctr_mult
+
+    # Logistic adoption ramps for newly launched channels: (channel, launch date, ramp speed, midpoint days, CTR uplift)
+    for channel, launch, speed, midpoint, ctr_uplift in [
+        ("Paid Social - ConnectSphere", CONNECTSPHERE_OFFICIAL_START, 0.01, 180, 0.1),
+        ("AI ContentSynergy", AI_SYNERGY_START, 0.015, 120, 0.05),
+    ]:
+        col = catalogue.channel_column(channel)
+        if col is None:
+            continue
+        days_since_launch = days_since(dates, launch)
+        launched = days_since_launch >= 0
+        growth_factor = 1 / (1 + np.exp(-speed * (days_since_launch - midpoint)))
+        impressions[:, col] = np.where(launched, catalogue.base_impressions[col] * growth_factor * global_factor, 0)
+        ctr[:, col] *= np.where(launched, 1 + ctr_uplift * growth_factor, 1.0)
+
+    col = catalogue.channel_column("Paid Social - PixelVerse")
+    if col is not None:
+        days_since_decline = np.maximum(days_since(dates, PIXELVERSE_DECLINE_START), 0)
+        impressions[:, col] *= np.maximum(0.5, 1 - 0.0005 * days_since_decline)
+        ctr[:, col] *= np.maximum(0.7, 1 - 0.0003 * days_since_decline)
+
+def generate_block(catalogue, dates, day_offsets):
+    """Computes all (day, channel, region) rows for a block of dates; returns the DataFrame and rollup codes."""
+    n_days, n_channels, n_regions = len(dates), len(catalogue.channels), len(catalogue.regions)
+    shape = (n_days, n_channels, n_regions)
+    day_index = pd.DatetimeIndex(dates)
+
+    # --- Global Factors (per day) ---
+    base_trend_factor = (1 + GROWTH_RATE_PER_DAY) ** day_offsets
+    seasonal_factor = 1 + 0.15 * np.sin(2 * np.pi * (day_index.dayofyear.to_numpy() + 75) / 365.25)
+    weekly_factor = np.select([day_index.dayofweek == 5, day_index.dayofweek == 6], [0.85, 0.80], 1.0)
+    global_factor = base_trend_factor * seasonal_factor * weekly_factor
+
+    # --- Base Metrics (per day x channel) ---
+    impressions = global_factor[:, None] * catalogue.base_impressions[None, :]
+    ctr = np.broadcast_to(catalogue.base_ctr, (n_days, n_channels)).copy()
+    apply_story_points(catalogue, dates, global_factor, impressions, ctr)
+
+    # --- Regional Variations (per day x channel x region) ---
+    impressions = impressions[:, :, None] * catalogue.region_factors[None, None, :]
+    ctr = np.broadcast_to(ctr[:, :, None], shape).copy()
+    spend_factor = np.broadcast_to(catalogue.base_spend_factor[None, :, None], shape).copy()
+    product_idx = catalogue.product_focus_indices(dates)
+
+    # --- Dimension Values & Modifiers ---
+    dim_idx = {}
+    conv_modifier = np.ones(shape)
+    for category in catalogue.dimension_values:
+        dim_idx[category] = catalogue.sample_dimension(category, shape)
+        mods = catalogue.dimension_modifiers[category][dim_idx[category]]
+        impressions *= mods[..., 0]; ctr *= mods[..., 1]; conv_modifier *= mods[..., 2]
+        if category == "KeywordTheme": # Only keyword theme affects spend factor
+            spend_factor *= mods[..., 3]
+
+    # --- Campaign Effects (gathered from the compiled day x channel x product tensors) ---
+    campaign_cell = (day_offsets[:, None, None], np.arange(n_channels)[None, :, None], product_idx)
+    impressions *= catalogue.campaign_imp_mult[campaign_cell]
+    ctr += catalogue.campaign_ctr_abs[campaign_cell]
+    camp_spend_boost = catalogue.campaign_spend_abs[campaign_cell]
+    camp_lead_mult = catalogue.campaign_lead_mult[campaign_cell]
+
+    # --- Spend ---
+    spend = impressions * spend_factor + camp_spend_boost
+    spend[(catalogue.base_spend_factor[None, :, None] == 0) & (camp_spend_boost == 0)] = 0
+
+    # --- Noise & Final Calculations ---
+    final_impressions = np.maximum(0, np.trunc(impressions * (1 + np.random.normal(0, 0.08, shape)))).astype(np.int64)
+    final_ctr = np.maximum(0.0001, ctr * (1 + np.random.normal(0, 0.05, shape)))
+    final_spend = np.maximum(0, np.round(spend * (1 + np.random.normal(0, 0.10, shape)), 2))
+
+    # --- Funnel Calculations ---
+    rates = catalogue.conversion_rates
+    def funnel_stage(previous, rate, noise_sd):
+        return np.maximum(0, np.trunc(previous * rate * (1 + np.random.normal(0, noise_sd, shape)))).astype(np.int64)
+    clicks = np.minimum(final_impressions, np.maximum(0, np.trunc(final_impressions * final_ctr)).astype(np.int64))
+    # Each stage follows the previous stage's unclamped count; the caps are applied afterwards
+    leads = funnel_stage(clicks, rates["lead_from_click"] * conv_modifier * camp_lead_mult, 0.06)
+    mqls = funnel_stage(leads, rates["mql_from_lead"] * conv_modifier, 0.07)
+    sqls = funnel_stage(mqls, rates["sql_from_mql"] * conv_modifier, 0.08)
+    opportunities = funnel_stage(sqls, rates["opp_from_sql"] * conv_modifier, 0.09)
+    wins = funnel_stage(opportunities, rates["win_from_opp"] * conv_modifier, 0.10)
+    leads = np.minimum(clicks, leads); mqls = np.minimum(leads, mqls); sqls = np.minimum(mqls, sqls)
+    opportunities = np.minimum(sqls, opportunities); wins = np.minimum(opportunities, wins)
+
+    # Only keep rows with some activity
+    keep = ((final_impressions > 0) | (final_spend > 0)).ravel()
+    grid_day, grid_channel, grid_region = (axis.ravel()[keep] for axis in np.indices(shape))
+    row_products = product_idx.ravel()[keep]
+    block_df = pd.DataFrame({
+        "Date": dates[grid_day],
+        "Channel": np.array(catalogue.channels)[grid_channel],
+        "Region": np.array(catalogue.regions)[grid_region],
+        "ProductFocus": np.array(catalogue.products)[row_products],
+    })
+    for category, values in catalogue.dimension_values.items():
+        block_df[category] = values[dim_idx[category].ravel()[keep]]
+    block_df["CampaignNames"] = catalogue.campaign_combo_names[
+        catalogue.campaign_combo[day_offsets[grid_day], grid_channel, row_products]]
+    for column, values in [("Impressions", final_impressions), ("Clicks", clicks), ("Spend", final_spend),
+                           ("Leads", leads), ("MQLs", mqls), ("SQLs", sqls), ("Opportunities", opportunities),
+                           ("Wins", wins), ("CTR", np.round(final_ctr, 5))]:
+        block_df[column] = values.ravel()[keep]
+
+    row_months = dates[grid_day].astype('datetime64[M]')
+    codes = {
+        "Year": row_months.astype('datetime64[Y]').astype(np.int64) + 1970 - START_DATE.year,
+        "Month": (row_months - np.datetime64(START_DATE, 'M')).astype(np.int64),
+        "Channel": grid_channel, "Region": grid_region, "ProductFocus": row_products,
+    }
+    for category in catalogue.dimension_values:
+        codes[category] = dim_idx[category].ravel()[keep]
+    return block_df, codes
+
+def rollup_dimension_labels(catalogue, total_days):
+    """Label arrays for every dimension a rollup can group by, aligned with the codes from generate_block."""
+    last_date = np.datetime64(START_DATE) + max(total_days - 1, 0)
+    months = np.arange(np.datetime64(START_DATE, 'M'), last_date.astype('datetime64[M]') + 1)
+    labels = {
+        "Year": np.arange(START_DATE.year, int(str(last_date)[:4]) + 1),
+        "Month": months.astype(str),
+        "Channel": np.array(catalogue.channels), "Region": np.array(catalogue.regions),
+        "ProductFocus": np.array(catalogue.products),
+    }
+    labels.update(catalogue.dimension_values)
+    return labels
+
+
+class EventExpander:
+    """
+    Expands daily funnel counts into individual events and streams them to date partitions.
+
+    Each row's base-stage count (clicks, or impressions if enabled) becomes that many funnel entries.
+    An entry reaches a later stage if its rank within the row is below that stage's count, so every
+    lead has a click, every MQL has a lead, and so on; all stages of an entry share its number, which
+    gives the lineage (ParentEventID) and the visitor without any per-event Python work.
+    """
+
+    def __init__(self, catalogue, output_dir, include_impressions=False):
+        self.stages = EVENT_STAGES if include_impressions else EVENT_STAGES[1:]
+        self.writer = PartitionedCsvWriter(output_dir, "EventTimestamp", freq=EVENT_PARTITION_FREQ)
+        self.visitors = IdMinter("VIS_", width=10, key=VISITOR_ID_KEY, lowercase=True)
+        self.entries_expanded = 0
+        buckets = catalogue.dimension_values["TimeOfDayBucket"]
+        self.bucket_hours = np.array([TIME_OF_DAY_HOURS.get(b, (0, 24)) for b in buckets], dtype=float)
+        self.bucket_codes = {b: i for i, b in enumerate(buckets)}
+
+    def expand(self, block_df):
+        """Expands a block of daily rows, writing at most EVENT_CHUNK_SIZE funnel entries at a time."""
+        base_counts = block_df[self.stages[0][1]].to_numpy()
+        cumulative = np.cumsum(base_counts)
+        if len(cumulative) == 0 or cumulative[-1] == 0:
+            return
+        # Row boundaries so each chunk covers about EVENT_CHUNK_SIZE entries (a single larger row is its own chunk)
+        bounds = np.unique(np.concatenate((
+            [0], np.searchsorted(cumulative, np.arange(EVENT_CHUNK_SIZE, cumulative[-1], EVENT_CHUNK_SIZE), side='right'),
+            [len(block_df)])))
+        for start, end in zip(bounds[:-1], bounds[1:]):
+            self.writer.write(self.expand_rows(block_df.iloc[start:end]))
+
+    def expand_rows(self, rows):
+        """Event records for a set of daily rows, all stages together."""
+        stage_counts = [rows[column].to_numpy() for _, column, _, _ in self.stages]
+        base_counts = stage_counts[0]
+        total = int(base_counts.sum())
+        row_of_entry = np.repeat(np.arange(len(rows)), base_counts)
+        rank = np.arange(total) - np.repeat(np.cumsum(base_counts) - base_counts, base_counts)
+        entry_numbers = self.entries_expanded + np.arange(total, dtype=np.uint64)
+        self.entries_expanded += total
+
+        # Visitors: new visitors get fresh IDs, returning visitors reuse a previously minted one
+        returning = (rows["AudienceSegment"].to_numpy() == "Returning Visitor")[row_of_entry]
+        visitor_ids = np.empty(total, dtype=object)
+        visitor_ids[~returning] = self.visitors.mint(int((~returning).sum()))
+        visitor_ids[returning] = self.visitors.ids_for(np.random.randint(0, max(self.visitors.counter, 1), int(returning.sum())))
+
+        # Base-stage timestamps fall inside the row's TimeOfDayBucket hours
+        hours = self.bucket_hours[rows["TimeOfDayBucket"].map(self.bucket_codes).to_numpy()[row_of_entry]]
+        offset_seconds = (hours[:, 0] + np.random.random(total) * (hours[:, 1] - hours[:, 0])) * 3600
+        timestamps = pd.to_datetime(rows["Date"]).to_numpy().astype('datetime64[s]')[row_of_entry] + offset_seconds.astype('timedelta64[s]')
+
+        dimension_values = {column: rows[column].to_numpy() for column in EVENT_DIMENSIONS}
+        frames = []
+        current = np.arange(total)
+        for k, (event_type, _, prefix, mean_hours) in enumerate(self.stages):
+            if k > 0:
+                reached = rank[current] < stage_counts[k][row_of_entry[current]]
+                current = current[reached]
+                delay_seconds = np.random.exponential(mean_hours * 3600, len(current)).astype('timedelta64[s]')
+                timestamps = timestamps[reached] + delay_seconds
+            frame = pd.DataFrame({
+                "EventID": format_ids(prefix, entry_numbers[current], EVENT_ID_WIDTH),
+                "EventType": event_type,
+                "EventTimestamp": timestamps,
+                "VisitorID": visitor_ids[current],
+                "ParentEventID": format_ids(self.stages[k - 1][2], entry_numbers[current], EVENT_ID_WIDTH) if k > 0 else "",
+            })
+            for column, values in dimension_values.items():
+                frame[column] = values[row_of_entry[current]]
+            frames.append(frame)
+        return pd.concat(frames, ignore_index=True)
 
 
 def generate_data():
-    """Generates the marketing funnel dataset with enhanced dimensions."""
-    data = []
-    current_date = START_DATE
-    total_days = (END_DATE - START_DATE).days
-    days_generated = 0
-
+    """Generates the marketing funnel dataset with enhanced dimensions; returns (DataFrame, RollupCube)."""
+    total_days = max((END_DATE - START_DATE).days, 0)
     print(f"Generating data from {START_DATE} to {END_DATE - datetime.timedelta(days=1)}...")
 
-    while current_date < END_DATE:
-        day_of_year = current_date.timetuple().tm_yday
-        day_of_week = current_date.weekday()
-        year = current_date.year
-
-        # --- Global Factors ---
-        growth_rate_per_day = 0.0005
-        base_trend_factor = (1 + growth_rate_per_day) ** days_generated
-        seasonal_factor = 1 + 0.15 * np.sin(2 * np.pi * (day_of_year + 75) / 365.25)
-        weekly_factor = 1.0
-        if day_of_week == 5: weekly_factor = 0.85
-        elif day_of_week == 6: weekly_factor = 0.80
-
-        for channel in CHANNELS:
-            for region in REGIONS:
-                product_focus_idx = (days_generated + hash(channel) + hash(region)) % len(PRODUCTS)
-                product_focus = PRODUCTS[product_focus_idx]
-
-                # --- Base Metrics ---
-                base_imp = BASE_METRICS[channel]["impressions"]
-                base_ctr = BASE_METRICS[channel]["ctr"]
-                base_spend_factor = BASE_METRICS[channel]["spend_factor"]
-
-                # Apply global factors
-                current_impressions = base_imp * base_trend_factor * seasonal_factor * weekly_factor
-                current_ctr = base_ctr
-                current_spend_factor = base_spend_factor
-
-                # --- Story Point / Channel Logic (Applied before dimension modifiers) ---
-                # (Same logic as v2 for algorithm hit, ConnectSphere growth, PixelVerse decline, AI Synergy launch)
-                algo_hit_start = datetime.date(2024, 3, 1); algo_hit_end = datetime.date(2024, 6, 30)
-                algo_rec_start = datetime.date(2024, 7, 1); algo_rec_end = datetime.date(2024, 10, 31)
-                organic_algo_imp_mult = 1.0; organic_algo_ctr_mult = 1.0
-                if channel == "Organic Search":
-                    if algo_hit_start <= current_date <= algo_hit_end:
-                        organic_algo_imp_mult = 0.65; organic_algo_ctr_mult = 0.85
-                    elif algo_rec_start <= current_date <= algo_rec_end:
-                        recovery_progress = (current_date - algo_rec_start).days / (algo_rec_end - algo_rec_start).days
-                        organic_algo_imp_mult = (0.65 + 0.30 * recovery_progress); organic_algo_ctr_mult = (0.85 + 0.13 * recovery_progress)
-                    current_impressions *= organic_algo_imp_mult; current_ctr *= organic_algo_ctr_mult
-                connectsphere_official_start = datetime.date(2023, 10, 1)
-                if channel == "Paid Social - ConnectSphere":
-                    if current_date < connectsphere_official_start: current_impressions = 0
-                    else:
-                        days_since_launch = (current_date - connectsphere_official_start).days
-                        growth_factor = 1 / (1 + np.exp(-0.01 * (days_since_launch - 180)))
-                        current_impressions = BASE_METRICS[channel]["impressions"] * growth_factor * base_trend_factor * seasonal_factor * weekly_factor
-                        current_ctr *= (1 + 0.1 * growth_factor)
-                pixelverse_decline_start = datetime.date(2024, 7, 1)
-                if channel == "Paid Social - PixelVerse" and current_date >= pixelverse_decline_start:
-                     days_since_decline = (current_date - pixelverse_decline_start).days
-                     decline_factor = max(0.5, 1 - 0.0005 * days_since_decline)
-                     current_impressions *= decline_factor; current_ctr *= max(0.7, 1 - 0.0003 * days_since_decline)
-                ai_synergy_start = datetime.date(2025, 8, 1)
-                if channel == "AI ContentSynergy":
-                    if current_date < ai_synergy_start: current_impressions = 0
-                    else:
-                        days_since_launch = (current_date - ai_synergy_start).days
-                        growth_factor = 1 / (1 + np.exp(-0.015 * (days_since_launch - 120)))
-                        current_impressions = BASE_METRICS[channel]["impressions"] * growth_factor * base_trend_factor * seasonal_factor * weekly_factor
-                        current_ctr *= (1 + 0.05 * growth_factor)
-
-                # --- Regional Variations ---
-                region_factors = {"North America": 1.1, "Europe": 1.0, "APAC": 0.8, "LATAM": 0.6}
-                current_impressions *= region_factors.get(region, 1.0)
-
-                # --- Assign Dimension Values for this Row ---
-                assigned_device = choose_dimension_value("DeviceType", channel)
-                assigned_audience = choose_dimension_value("AudienceSegment", channel)
-                assigned_keyword_theme = choose_dimension_value("KeywordTheme", channel)
-                # --- NEW v3 Assignments ---
-                assigned_content_type = choose_dimension_value("ContentType", channel)
-                assigned_intent_stage = choose_dimension_value("IntentStage", channel)
-                assigned_time_bucket = choose_dimension_value("TimeOfDayBucket", channel)
-
-
-                # --- Apply Dimension Modifiers ---
-                device_mods = DIMENSION_MODIFIERS["DeviceType"][assigned_device]
-                audience_mods = DIMENSION_MODIFIERS["AudienceSegment"][assigned_audience]
-                keyword_mods = DIMENSION_MODIFIERS["KeywordTheme"][assigned_keyword_theme]
-                # --- NEW v3 Modifiers ---
-                content_mods = DIMENSION_MODIFIERS["ContentType"][assigned_content_type]
-                intent_mods = DIMENSION_MODIFIERS["IntentStage"][assigned_intent_stage]
-                time_mods = DIMENSION_MODIFIERS["TimeOfDayBucket"][assigned_time_bucket]
-
-                # Apply modifiers multiplicatively
-                current_impressions *= (device_mods["imp_mult"] * audience_mods["imp_mult"] * keyword_mods["imp_mult"] *
-                                        content_mods["imp_mult"] * intent_mods["imp_mult"] * time_mods["imp_mult"])
-                current_ctr *= (device_mods["ctr_mult"] * audience_mods["ctr_mult"] * keyword_mods["ctr_mult"] *
-                                content_mods["ctr_mult"] * intent_mods["ctr_mult"] * time_mods["ctr_mult"])
-                current_spend_factor *= keyword_mods["spend_factor_mult"] # Only keyword theme affects spend factor
-
-                # Combine conversion multipliers from all dimensions
-                base_conv_modifier = (device_mods["conv_mult"] * audience_mods["conv_mult"] * keyword_mods["conv_mult"] *
-                                      content_mods["conv_mult"] * intent_mods["conv_mult"] * time_mods["conv_mult"])
-
-                # --- Apply Campaign Effects ---
-                active_campaigns = get_active_campaigns(current_date, channel, product_focus)
-                campaign_names = "Organic/Baseline"
-                campaign_spend_boost = 0
-                campaign_lead_mult = 1.0
-
-                if active_campaigns:
-                    campaign_names_list = []
-                    imp_multiplier_agg = 1.0; ctr_boost_agg = 0.0; lead_multiplier_agg = 1.0
-                    for camp in active_campaigns:
-                        campaign_names_list.append(camp["name"])
-                        imp_multiplier_agg *= camp["imp_mult"]
-                        ctr_boost_agg += camp["ctr_abs"]
-                        campaign_spend_boost += camp["spend_abs"]
-                        lead_multiplier_agg *= camp["lead_mult"]
-                    current_impressions *= imp_multiplier_agg
-                    current_ctr += ctr_boost_agg
-                    campaign_lead_mult = lead_multiplier_agg
-                    campaign_names = "; ".join(campaign_names_list)
-
-                # --- Calculate Spend ---
-                current_spend = (current_impressions * current_spend_factor) + campaign_spend_boost
-                if base_spend_factor == 0 and campaign_spend_boost == 0: current_spend = 0
-
-                # --- Add Noise & Final Calculations ---
-                imp_noise = 1 + np.random.normal(0, 0.08); ctr_noise = 1 + np.random.normal(0, 0.05); spend_noise = 1 + np.random.normal(0, 0.10)
-                final_impressions = max(0, int(current_impressions * imp_noise))
-                final_ctr = max(0.0001, current_ctr * ctr_noise)
-                final_spend = max(0, round(current_spend * spend_noise, 2))
-
-                # --- Funnel Calculations ---
-                clicks = min(final_impressions, max(0, int(final_impressions * final_ctr)))
-                effective_lead_conv = CONVERSION_RATES["lead_from_click"] * base_conv_modifier * campaign_lead_mult
-                effective_mql_conv = CONVERSION_RATES["mql_from_lead"] * base_conv_modifier
-                effective_sql_conv = CONVERSION_RATES["sql_from_mql"] * base_conv_modifier
-                effective_opp_conv = CONVERSION_RATES["opp_from_sql"] * base_conv_modifier
-                effective_win_conv = CONVERSION_RATES["win_from_opp"] * base_conv_modifier
-                leads = max(0, int(clicks * effective_lead_conv * (1 + np.random.normal(0, 0.06))))
-                mqls = max(0, int(leads * effective_mql_conv * (1 + np.random.normal(0, 0.07))))
-                sqls = max(0, int(mqls * effective_sql_conv * (1 + np.random.normal(0, 0.08))))
-                opportunities = max(0, int(sqls * effective_opp_conv * (1 + np.random.normal(0, 0.09))))
-                wins = max(0, int(opportunities * effective_win_conv * (1 + np.random.normal(0, 0.10))))
-                leads = min(clicks, leads); mqls = min(leads, mqls); sqls = min(mqls, sqls)
-                opportunities = min(sqls, opportunities); wins = min(opportunities, wins)
-
-                # Only add row if there's some activity
-                if final_impressions > 0 or final_spend > 0:
-                    data.append({
-                        "Date": current_date,
-                        "Channel": channel,
-                        "Region": region,
-                        "ProductFocus": product_focus,
-                        "DeviceType": assigned_device,
-                        "AudienceSegment": assigned_audience,
-                        "KeywordTheme": assigned_keyword_theme,
-                        # --- NEW v3 COLUMNS ---
-                        "ContentType": assigned_content_type,
-                        "IntentStage": assigned_intent_stage,
-                        "TimeOfDayBucket": assigned_time_bucket,
-                        # --- END NEW ---
-                        "CampaignNames": campaign_names,
-                        "Impressions": final_impressions,
-                        "Clicks": clicks,
-                        "Spend": final_spend,
-                        "Leads": leads,
-                        "MQLs": mqls,
-                        "SQLs": sqls,
-                        "Opportunities": opportunities,
-                        "Wins": wins,
-                        "CTR": round(final_ctr, 5)
-                    })
-
-        # Increment day
-        current_date += datetime.timedelta(days=1)
-        days_generated += 1
-        if days_generated % 90 == 0:
-            progress = (days_generated / total_days) * 100
-            print(f"Progress: {progress:.1f}% - Generated up to {current_date - datetime.timedelta(days=1)}")
+    catalogue = MarketingCatalogue(START_DATE, total_days)
+    all_dates = np.arange(np.datetime64(START_DATE), np.datetime64(START_DATE) + total_days, dtype='datetime64[D]')
+    rollups = RollupCube(ROLLUPS, rollup_dimension_labels(catalogue, total_days), ROLLUP_MEASURES)
+    events = EventExpander(catalogue, EVENTS_OUTPUT_DIR, INCLUDE_IMPRESSION_EVENTS) if EMIT_EVENTS else None
+    blocks = []
+    for block_start in range(0, total_days, DAYS_PER_BLOCK):
+        block_days = slice(block_start, block_start + DAYS_PER_BLOCK)
+        block_df, codes = generate_block(catalogue, all_dates[block_days], np.arange(total_days)[block_days])
+        rollups.add(codes, {measure: block_df[measure].to_numpy() for measure in ROLLUP_MEASURES})
+        if events is not None:
+            events.expand(block_df)
+        blocks.append(block_df)
+        days_generated = min(block_start + DAYS_PER_BLOCK, total_days)
+        progress = (days_generated / total_days) * 100
+        print(f"Progress: {progress:.1f}% - Generated up to {all_dates[days_generated - 1]}")
+        # Cells with no impressions and no spend are dropped, so the total is an estimate from the average rows per day so far
+        rows_generated = sum(len(block) for block in blocks)
+        report_progress("Generating funnel data", rows=rows_generated, total_rows=rows_generated * total_days // days_generated)
 
     print("Data generation complete.")
-    return pd.DataFrame(data)
+    if events is not None:
+        print(f"Wrote {events.writer.rows_written} events to {len(events.writer.partition_rows)} partitions in {EVENTS_OUTPUT_DIR}/")
+    if not blocks:
+        return pd.DataFrame(), rollups
+    return pd.concat(blocks, ignore_index=True), rollups
 
 # --- Main Execution ---
 if __name__ == "__main__":
-    df_marketing = generate_data()
+    parser = argparse.ArgumentParser(description="Generate marketing funnel data.")
+    parser.add_argument("--config", help="JSON scenario file overriding the catalogue and settings constants")
+    args = parser.parse_args()
+    if args.config:
+        apply_config_file(args.config)
+
+    df_marketing, marketing_rollups = generate_data()
 
     if not df_marketing.empty:
         print(f"\nGenerated {len(df_marketing)} rows of data.")
         df_marketing.to_csv(OUTPUT_FILENAME, index=False)
         print(f"Data saved to {OUTPUT_FILENAME}")
 
+        if EMIT_ROLLUPS:
+            marketing_rollups.write_csv(ROLLUP_OUTPUT_DIR)
+            print(f"Rollups saved to {ROLLUP_OUTPUT_DIR}/: {', '.join(ROLLUPS)}")
+
         print("\n--- Data Summary ---")
         print(df_marketing.head())
         print(f"\nDate range: {df_marketing['Date'].min()} to {df_marketing['Date'].max()}")
         print("\nColumns:", df_marketing.columns.tolist()) # Show new columns
 
-        # Example aggregations
-        df_marketing['Year'] = pd.to_datetime(df_marketing['Date']).dt.year
+        # Example aggregations, read from the rollups accumulated during generation
+        rollup_frames = marketing_rollups.frames()
         print("\n--- Total Wins per Year ---")
-        print(df_marketing.groupby('Year')['Wins'].sum())
+        print(rollup_frames["yearly_totals"].set_index('Year')['Wins'])
 
         print("\n--- Wins by Content Type (Overall) ---") # Check new dimension
-        print(df_marketing.groupby('ContentType')['Wins'].sum().sort_values(ascending=False))
+        print(rollup_frames["content_type"].set_index('ContentType')['Wins'].sort_values(ascending=False))
 
         print("\n--- Leads by Intent Stage (Overall) ---") # Check new dimension
-        print(df_marketing.groupby('IntentStage')['Leads'].sum().sort_values(ascending=False))
+        print(rollup_frames["intent_stage"].set_index('IntentStage')['Leads'].sort_values(ascending=False))
 
         print("\n--- Impressions by Time of Day (Overall) ---") # Check new dimension
-        print(df_marketing.groupby('TimeOfDayBucket')['Impressions'].sum().sort_values(ascending=False))
+        print(rollup_frames["time_of_day"].set_index('TimeOfDayBucket')['Impressions'].sort_values(ascending=False))
 
     else:
         print("No data was generated. Check configuration and date ranges.")
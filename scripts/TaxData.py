@@ -1,13 +1,44 @@
+import sys
 import pandas as pd
 import numpy as np
-import random
-from datetime import datetime, timedelta
+from datetime import datetime
+from id_service import format_ids
+from progress import report_progress
 
 # --- Configuration ---
 NUM_LOCATIONS = 150
 NUM_FILINGS = 50000 # Number of tax filings to generate
 CURRENT_DATE = datetime(2025, 4, 1) # Set the current date for filtering filing dates
 TAX_YEARS = [2022, 2023, 2024] # Tax years to include data for
+REGION_FOCUS = None # e.g. 'West' to only generate locations and customers in one region
+
+# --- Distribution Settings ---
+AGI_LOGNORMAL_MEAN = 10.5 # AGI ~ lognormal(mean, sigma); mean around $36k
+AGI_LOGNORMAL_SIGMA = 0.6 # Adjust sigma for spread
+SCHEDULE_C_BASE_PROB = 0.1 # Base chance of Schedule C
+SCHEDULE_C_MID_AGI_BONUS = 0.2 # Added chance when 20k < AGI < 100k
+
+# --- Taxpayer Settings ---
+TAXPAYER_RETENTION_RATE = 0.5 # Chance a taxpayer files with us again the next year; also the steady-state returning share
+AGI_GROWTH_MEAN = 0.03 # Mean year-over-year change in log AGI
+AGI_GROWTH_SIGMA = 0.12 # Spread of year-over-year log AGI changes
+HOME_LOCATION_PROB = 0.9 # Chance a taxpayer files at their usual location
+FILING_STATUS_CHANGE_PROB = 0.05 # Chance a returning taxpayer's filing status changes from last year
+
+# --- Filing Season Curve ---
+# Relative daily filing volume between Jan 1 and Apr 15: a flat baseline plus an early-season bump,
+# a mid-February peak and an April 15 spike, scaled by day-of-week effects
+SEASON_BASELINE_VOLUME = 1.0 # Background volume every day of the season
+EARLY_BUMP_DATE = (1, 27) # (month, day) centre of the early filers' bump
+EARLY_BUMP_WIDTH_DAYS = 5
+EARLY_BUMP_HEIGHT = 1.0
+MID_FEB_PEAK_DATE = (2, 15) # (month, day) centre of the main peak, once W-2s and refund credits arrive
+MID_FEB_PEAK_WIDTH_DAYS = 9
+MID_FEB_PEAK_HEIGHT = 2.5
+DEADLINE_SPIKE_HEIGHT = 4.0 # Extra volume on April 15 itself
+DEADLINE_SPIKE_DECAY_DAYS = 3 # The spike falls off by a factor of e every this many days before the deadline
+WEEKDAY_VOLUME = [1.1, 1.05, 1.0, 1.0, 1.05, 0.75, 0.35] # Monday ... Sunday
+DAILY_VOLUMES_ONLY = False # Only write per-day filing counts (for capacity tests) without generating the filings
 
 # --- Data Definitions ---
 
@@ -63,6 +94,14 @@ states_cities = {
     'WI': ['Milwaukee', 'Madison', 'Green Bay'],
     'WY': ['Cheyenne', 'Casper']
 }
+REGION_STATES = {
+    'Northeast': ['CT', 'ME', 'MA', 'NH', 'NJ', 'NY', 'PA', 'RI', 'VT'],
+    'South': ['DE', 'FL', 'GA', 'MD', 'NC', 'SC', 'VA', 'WV', 'AL', 'KY', 'MS', 'TN', 'AR', 'LA', 'OK', 'TX'],
+    'Midwest': ['IL', 'IN', 'IA', 'KS', 'MI', 'MN', 'MO', 'NE', 'ND', 'OH', 'SD', 'WI'],
+    'West': ['ID', 'MT', 'WY', 'CO', 'NM', 'AZ', 'UT', 'NV', 'CA', 'OR', 'WA'],
+}
+if REGION_FOCUS is not None:
+    states_cities = {state: cities for state, cities in states_cities.items() if state in REGION_STATES[REGION_FOCUS]}
 states = list(states_cities.keys())
 
 regions = ['Northeast', 'South', 'Midwest', 'West']
@@ -74,217 +113,264 @@ lead_sources = ['Walk-In', 'Website', 'Referral', 'Mailer', 'Social_Media_Ad', '
 filing_methods = ['In-Person', 'Drop-Off', 'Online Assist'] # Added from previous thought
 
 # --- Helper Functions ---
-def generate_zip_code(state):
-    # Basic placeholder: Generate a random 5-digit zip.
-    # A real implementation might use state-specific ranges.
-    return str(random.randint(10000, 99999)).zfill(5)
-
-def generate_filing_date(tax_year, current_date):
-    """Generates a plausible filing date between Jan 1 and Apr 15 of the following year."""
-    filing_start_year = tax_year + 1
-    start_date = datetime(filing_start_year, 1, 1)
-    # Filing deadline is typically April 15th
-    default_end_date = datetime(filing_start_year, 4, 15)
-
+def filing_volume_curve(tax_year, current_date):
+    """Days of the filing season for a tax year and the probability of a filing landing on each day."""
+    season_year = tax_year + 1
+    deadline = np.datetime64(f"{season_year}-04-15")
     # For the most recent tax year, don't generate dates beyond the current date
-    if filing_start_year == current_date.year:
-        end_date = min(default_end_date, current_date)
-    else:
-        end_date = default_end_date
-
-    # Ensure start_date is not after end_date (can happen if current_date is before Jan 1)
-    if start_date > end_date:
-         # Handle edge case if script run early in the year before filings start
-         # Or if tax_year is too far in future (shouldn't happen with TAX_YEARS list)
-         return end_date # Or handle error appropriately
-
-    # Generate random date within the range
-    random_days = random.randint(0, (end_date - start_date).days)
-    filing_date = start_date + timedelta(days=random_days)
-
-    # Simulate peak filing times (more filings Feb-Apr)
-    # Simple approach: higher chance of later dates
-    if random.random() < 0.7: # 70% chance to be after Feb 1st
-       min_peak_date = datetime(filing_start_year, 2, 1)
-       if min_peak_date > start_date and min_peak_date < end_date:
-           peak_days = (end_date - min_peak_date).days
-           if peak_days > 0:
-               random_peak_days = random.randint(0, peak_days)
-               filing_date = min_peak_date + timedelta(days=random_peak_days)
-
-    return filing_date.date()
-
+    days = np.arange(np.datetime64(f"{season_year}-01-01"), min(deadline, np.datetime64(current_date.date())) + 1)
+    if len(days) == 0:
+        raise ValueError(f"The filing season for tax year {tax_year} has not started by {current_date.date()}")
+
+    def bump(month_day, width_days, height):
+        offsets = (days - np.datetime64(f"{season_year}-{month_day[0]:02d}-{month_day[1]:02d}")).astype(int)
+        return height * np.exp(-0.5 * (offsets / width_days) ** 2)
+
+    volume = (SEASON_BASELINE_VOLUME
+              + bump(EARLY_BUMP_DATE, EARLY_BUMP_WIDTH_DAYS, EARLY_BUMP_HEIGHT)
+              + bump(MID_FEB_PEAK_DATE, MID_FEB_PEAK_WIDTH_DAYS, MID_FEB_PEAK_HEIGHT)
+              + DEADLINE_SPIKE_HEIGHT * np.exp(-(deadline - days).astype(int) / DEADLINE_SPIKE_DECAY_DAYS))
+    # 1970-01-01 was a Thursday, so (days since epoch + 3) % 7 gives Monday = 0
+    volume = volume * np.array(WEEKDAY_VOLUME)[(days.astype(np.int64) + 3) % 7]
+    return days, volume / volume.sum()
+
+def sample_filing_dates(tax_years, current_date):
+    """Filing dates for a whole batch, drawn per tax year from the discretised daily volume curve."""
+    filing_dates = np.empty(len(tax_years), dtype='datetime64[D]')
+    for year in np.unique(tax_years):
+        year_mask = tax_years == year
+        days, probs = filing_volume_curve(int(year), current_date)
+        # Inverse-CDF sampling: uniform draws located in the cumulative curve
+        day_idx = np.searchsorted(np.cumsum(probs), np.random.random(year_mask.sum()), side='right')
+        filing_dates[year_mask] = days[np.minimum(day_idx, len(days) - 1)]
+    return filing_dates
+
+def daily_filing_volumes(tax_years, filings_per_year, current_date):
+    """Per-day filing counts for each tax year drawn from the volume curve, without generating the filings."""
+    volumes = []
+    for year, year_filings in zip(tax_years, filings_per_year):
+        days, probs = filing_volume_curve(year, current_date)
+        volumes.append(pd.DataFrame({'Filing_Date': days, 'Tax_Year': year,
+                                     'Filings': np.random.multinomial(int(year_filings), probs)}))
+    return pd.concat(volumes, ignore_index=True)
+
+
+# Tax years whose filing season has not started by CURRENT_DATE have no filings yet, so they are left out
+tax_years_sorted = [year for year in sorted(TAX_YEARS) if datetime(year + 1, 1, 1) <= CURRENT_DATE]
+skipped_tax_years = sorted(set(TAX_YEARS) - set(tax_years_sorted))
+if not tax_years_sorted:
+    sys.exit(f"No filing season for tax years {sorted(TAX_YEARS)} has started by {CURRENT_DATE.date()}")
+if skipped_tax_years:
+    print(f"Skipping tax years {skipped_tax_years}: their filing season starts after {CURRENT_DATE.date()}")
+filings_per_year = NUM_FILINGS // len(tax_years_sorted) + (np.arange(len(tax_years_sorted)) < NUM_FILINGS % len(tax_years_sorted))
+daily_volumes_filename = 'daily_filing_volumes.csv'
+
+# --- Daily Filing Volumes Only ---
+# Capacity tests only need per-day volumes, so skip generating locations, taxpayers and filings
+if DAILY_VOLUMES_ONLY:
+    print("Generating Daily Filing Volumes...")
+    report_progress("Generating daily filing volumes")
+    daily_volumes_df = daily_filing_volumes(tax_years_sorted, filings_per_year, CURRENT_DATE)
+    daily_volumes_df.to_csv(daily_volumes_filename, index=False)
+    print("\nMock data saved to:")
+    print(f"- {daily_volumes_filename}")
+    sys.exit()
 
 # --- Generate Location_Info Table ---
+# Location counts are allocated to cities in one multinomial draw (a uniform state, then a uniform city
+# within it), and IDs are numbered within each state/city abbreviation, so they are unique by construction
 print("Generating Locations...")
-locations_data = []
-location_ids = set() # Ensure uniqueness
+report_progress("Generating locations")
 
 # Assign states to regions (approximate)
-state_to_region = {}
-# Simplified mapping (adjust as needed for accuracy)
-for state in states:
-    if state in ['CT', 'ME', 'MA', 'NH', 'NJ', 'NY', 'PA', 'RI', 'VT']:
-        state_to_region[state] = 'Northeast'
-    elif state in ['DE', 'FL', 'GA', 'MD', 'NC', 'SC', 'VA', 'WV', 'AL', 'KY', 'MS', 'TN', 'AR', 'LA', 'OK', 'TX']:
-        state_to_region[state] = 'South'
-    elif state in ['IL', 'IN', 'IA', 'KS', 'MI', 'MN', 'MO', 'NE', 'ND', 'OH', 'SD', 'WI']:
-        state_to_region[state] = 'Midwest'
-    else: # ID, MT, WY, CO, NM, AZ, UT, NV, CA, OR, WA
-        state_to_region[state] = 'West'
-
-
-location_counter = {} # To number locations within a city (e.g., Chicago-1, Chicago-2)
-
-while len(locations_data) < NUM_LOCATIONS:
-    state = random.choice(states)
-    city = random.choice(states_cities[state])
-    city_abbr = city.replace(" ", "")[:5].upper() # Abbreviation for ID
-
-    # Increment counter for this city
-    city_key = f"{state}-{city_abbr}"
-    location_counter[city_key] = location_counter.get(city_key, 0) + 1
-    loc_num = location_counter[city_key]
-
-    location_id = f"LOC-{state}-{city_abbr}-{str(loc_num).zfill(2)}"
-
-    if location_id not in location_ids:
-        location_ids.add(location_id)
-        locations_data.append({
-            'Location_ID': location_id,
-            'Location_Name': f"{city} #{loc_num}",
-            'City': city,
-            'State': state,
-            'Zip_Code': generate_zip_code(state),
-            'Region': state_to_region[state],
-            'Location_Type': random.choices(location_types, weights=[0.6, 0.3, 0.1], k=1)[0], # Franchise more common
-            'Target_Returns_Season': random.randint(500, 5000) # Example target range
-        })
-
-locations_df = pd.DataFrame(locations_data)
+state_to_region = {state: region for region, region_states in REGION_STATES.items() for state in region_states}
+
+city_states = np.array([state for state in states for _ in states_cities[state]])
+city_names = np.array([city for state in states for city in states_cities[state]])
+city_keys = np.array([f"{state}-{city.replace(' ', '')[:5].upper()}" for state, city in zip(city_states, city_names)]) # Abbreviation for ID
+city_probs = np.array([1 / (len(states) * len(states_cities[state])) for state in city_states])
+city_counts = np.random.multinomial(NUM_LOCATIONS, city_probs)
+
+# Number locations within a city key (e.g., Chicago #1, Chicago #2); cities sharing a key continue its numbering
+key_offsets = (pd.Series(city_counts).groupby(city_keys).cumsum() - city_counts).to_numpy()
+location_city_idx = np.repeat(np.arange(len(city_names)), city_counts)
+block_starts = np.cumsum(city_counts) - city_counts
+location_numbers = key_offsets[location_city_idx] + np.arange(NUM_LOCATIONS) - block_starts[location_city_idx] + 1
+location_states = city_states[location_city_idx]
+
+locations_df = pd.DataFrame({
+    'Location_ID': np.char.add(np.char.add('LOC-', city_keys[location_city_idx]), format_ids('-', location_numbers, 2)),
+    'Location_Name': np.char.add(np.char.add(city_names[location_city_idx], ' #'), location_numbers.astype(str)),
+    'City': city_names[location_city_idx],
+    'State': location_states,
+    # Basic placeholder: a random 5-digit zip. A real implementation might use state-specific ranges.
+    'Zip_Code': np.random.randint(10000, 100000, NUM_LOCATIONS).astype(str),
+    'Region': pd.Series(location_states).map(state_to_region).to_numpy(),
+    'Location_Type': np.array(location_types)[np.random.choice(len(location_types), NUM_LOCATIONS, p=[0.6, 0.3, 0.1])], # Franchise more common
+    'Target_Returns_Season': np.random.randint(500, 5001, NUM_LOCATIONS), # Example target range
+})
 print(f"Generated {len(locations_df)} unique locations.")
 
+# --- Generate Taxpayer Dimension ---
+# Taxpayers are generated up front and file once per active year. Each year keeps each active
+# taxpayer with TAXPAYER_RETENTION_RATE and tops the book back up with new taxpayers, so every
+# tax year has about NUM_FILINGS / len(TAX_YEARS) filings and realistic retention cohorts.
+print("Generating Taxpayers...")
+report_progress("Generating taxpayers", rows=len(locations_df))
+
+# Integer-indexed location dimension: filings reference locations by position,
+# and location attributes are gathered from arrays instead of filtering locations_df per filing
+location_id_values = locations_df['Location_ID'].to_numpy()
+location_state_values = locations_df['State'].to_numpy()
+
+# Taxpayers already with us before the first tax year make up the returning share of that year
+num_prior_taxpayers = int(round(filings_per_year[0] * TAXPAYER_RETENTION_RATE))
+taxpayer_count = num_prior_taxpayers
+active_taxpayers = np.arange(num_prior_taxpayers)
+first_tax_year = [tax_years_sorted[0] - np.random.geometric(max(1 - TAXPAYER_RETENTION_RATE, 1e-6), num_prior_taxpayers)]
+filing_taxpayer_idx, filing_tax_year = [], []
+for year, year_filings in zip(tax_years_sorted, filings_per_year):
+    if year != tax_years_sorted[0]:
+        active_taxpayers = active_taxpayers[np.random.random(len(active_taxpayers)) < TAXPAYER_RETENTION_RATE]
+    num_new = max(0, int(year_filings) - len(active_taxpayers))
+    new_taxpayers = np.arange(taxpayer_count, taxpayer_count + num_new)
+    taxpayer_count += num_new
+    first_tax_year.append(np.full(num_new, year))
+    active_taxpayers = np.concatenate((active_taxpayers, new_taxpayers))
+    filing_taxpayer_idx.append(active_taxpayers)
+    filing_tax_year.append(np.full(len(active_taxpayers), year))
+
+first_tax_year = np.concatenate(first_tax_year)
+filing_taxpayer_idx = np.concatenate(filing_taxpayer_idx)
+tax_year = np.concatenate(filing_tax_year)
+n = len(filing_taxpayer_idx)
+
+# Taxpayer attributes: home location, home state (biased towards the home location's state), zip and birth year
+taxpayer_home_location = np.random.randint(0, len(locations_df), taxpayer_count)
+taxpayer_state = np.where(np.random.random(taxpayer_count) < 0.8, location_state_values[taxpayer_home_location],
+                          np.array(states)[np.random.randint(0, len(states), taxpayer_count)])
+taxpayer_zip = np.random.randint(10000, 100000, taxpayer_count)
+taxpayer_birth_year = np.random.randint(1940, 2006, taxpayer_count)
+taxpayer_ids = format_ids("TP-", np.arange(1, taxpayer_count + 1), 8)
+
 # --- Generate Filing_Data Table ---
+# All filing attributes are drawn as column operations over the whole batch of taxpayer-years
 print("Generating Filings...")
-filings_data = []
-customer_first_year = {} # Track first time a customer (proxy) is seen
-
-# Get list of valid Location IDs
-valid_location_ids = locations_df['Location_ID'].tolist()
-
-for i in range(NUM_FILINGS):
-    if (i + 1) % 5000 == 0:
-        print(f"  Generating filing {i+1}/{NUM_FILINGS}...")
-
-    tax_year = random.choice(TAX_YEARS)
-    filing_date = generate_filing_date(tax_year, CURRENT_DATE)
-
-    # Assign location and get location details
-    location_id = random.choice(valid_location_ids)
-    location_info = locations_df[locations_df['Location_ID'] == location_id].iloc[0]
-
-    # Generate customer details
-    # Bias customer state towards location state, but allow others
-    customer_state = random.choices([location_info['State'], random.choice(states)], weights=[0.8, 0.2], k=1)[0]
-    customer_zip = generate_zip_code(customer_state)
-    customer_birth_year = random.randint(1940, 2005)
-
-    # Customer Type Logic
-    customer_proxy_key = f"{customer_zip}-{customer_birth_year}" # Simple proxy for unique customer
-    first_seen_year = customer_first_year.get(customer_proxy_key)
-    if first_seen_year is None:
-        customer_type = 'New'
-        customer_first_year[customer_proxy_key] = tax_year
-    elif tax_year == first_seen_year:
-        customer_type = 'New'
-    else:
-        customer_type = 'Returning'
-
-    # Simulate AGI (log-normal distribution often used for income)
-    # Adjust parameters for desired income range/skewness
-    agi = max(1000, round(np.random.lognormal(mean=10.5, sigma=0.6), -2)) # Mean around $36k, adjust sigma for spread
-
-    # Filing status (slightly weighted)
-    filing_status = random.choices(filing_statuses, weights=[0.35, 0.35, 0.25, 0.05], k=1)[0]
-
-    # Schedule C usage (more likely for certain AGIs, but random chance)
-    schedule_c_prob = 0.1 + (0.2 if 20000 < agi < 100000 else 0) # Base 10% + 20% if mid-range AGI
-    schedule_c_used = 'Yes' if random.random() < schedule_c_prob else 'No'
-
-    # Determine Complexity
-    if schedule_c_used == 'Yes' or agi > 150000:
-        complexity = 'Complex'
-    elif agi < 40000 and schedule_c_used == 'No':
-        complexity = 'Simple'
-    else:
-        complexity = 'Moderate'
-
-    # Generate Service Fee based on Complexity
-    if complexity == 'Simple':
-        base_fee = random.uniform(50, 150)
-    elif complexity == 'Moderate':
-        base_fee = random.uniform(150, 350)
-    else: # Complex
-        base_fee = random.uniform(350, 700)
-    # Add slight AGI influence and noise
-    service_fee = round(base_fee + (agi * 0.001) + random.uniform(-20, 20), 2)
-    service_fee = max(40.00, service_fee) # Minimum fee
-
-    # Generate Refund/Owed Amount (Simplified Logic)
-    # More likely refund for HoH, lower AGI. More likely owed for higher AGI.
-    refund_chance = 0.6 # Base chance of refund
-    if filing_status == 'Head of Household': refund_chance += 0.15
-    if agi < 30000: refund_chance += 0.1
-    if agi > 100000: refund_chance -= 0.2
-    if schedule_c_used == 'Yes': refund_chance -= 0.1 # Self-employed often owe
-
-    if random.random() < refund_chance:
-        # Generate Refund Amount
-        # Larger refunds possible for lower AGI / HoH
-        max_refund = 1000 + (50000 / max(10000, agi)) * 2000
-        if filing_status == 'Head of Household': max_refund *= 1.5
-        refund_owed = round(random.uniform(100, max(500, max_refund)), 2)
-    else:
-        # Generate Owed Amount
-        max_owed = 500 + (agi / 150000) * 5000
-        refund_owed = round(random.uniform(-max(200, max_owed), -50), 2) # Negative value
-
-    # Lead Source (adjust weights if needed)
-    # If returning, more likely 'Prior_Customer'
-    if customer_type == 'Returning' and random.random() < 0.8:
-         lead_source = 'Prior_Customer'
-    else:
-         lead_source = random.choices(lead_sources[:-1], weights=[0.3, 0.3, 0.15, 0.15, 0.1], k=1)[0] # Exclude Prior_Customer initially
-
-
-    filings_data.append({
-        'Filing_ID': f"F{str(tax_year+1)[-2:]}-{str(i+1).zfill(6)}", # e.g., F25-000001
-        'Location_ID': location_id,
-        'Filing_Date': filing_date,
-        'Tax_Year': tax_year,
-        'Service_Fee_USD': service_fee,
-        'Filing_Status': filing_status,
-        'Adjusted_Gross_Income': agi,
-        'Refund_Owed_Amount_USD': refund_owed,
-        'Schedule_C_Used': schedule_c_used,
-        'Return_Complexity': complexity,
-        'Customer_Zip_Code': customer_zip,
-        'Customer_State': customer_state,
-        'Customer_Type': customer_type,
-        'Lead_Source': lead_source
-        # Removed other schedule flags, birth year, filing method etc. based on final 2-table design
-    })
-
-filings_df = pd.DataFrame(filings_data)
+report_progress("Generating filings", rows=len(locations_df), total_rows=len(locations_df) + n)
+filing_date = sample_filing_dates(tax_year, CURRENT_DATE)
+filing_location_idx = np.where(np.random.random(n) < HOME_LOCATION_PROB, taxpayer_home_location[filing_taxpayer_idx],
+                               np.random.randint(0, len(locations_df), n))
+customer_state = taxpayer_state[filing_taxpayer_idx]
+customer_zip = taxpayer_zip[filing_taxpayer_idx]
+is_returning = tax_year != first_tax_year[filing_taxpayer_idx]
+
+# Simulate AGI (log-normal distribution often used for income), evolving from year to year per taxpayer:
+# log AGI starts at a lognormal draw and takes a normal growth step for each year after the first tax year
+year_step = tax_year - tax_years_sorted[0]
+log_agi_start = np.random.normal(AGI_LOGNORMAL_MEAN, AGI_LOGNORMAL_SIGMA, taxpayer_count)
+growth_steps = np.random.normal(AGI_GROWTH_MEAN, AGI_GROWTH_SIGMA, (len(tax_years_sorted), taxpayer_count))
+growth_steps[0] = 0
+log_agi = log_agi_start[filing_taxpayer_idx] + np.cumsum(growth_steps, axis=0)[year_step, filing_taxpayer_idx]
+agi = np.maximum(1000, np.round(np.exp(log_agi), -2))
+
+# Filing status (slightly weighted); taxpayers mostly keep theirs from year to year
+status_weights = [0.35, 0.35, 0.25, 0.05]
+status_draws = np.random.choice(len(filing_statuses), (len(tax_years_sorted), taxpayer_count), p=status_weights)
+status_changes = np.random.random((len(tax_years_sorted), taxpayer_count)) < FILING_STATUS_CHANGE_PROB
+status_changes[0] = True
+# Each year uses the draw from the most recent year its status changed
+last_change_year = np.maximum.accumulate(np.where(status_changes, np.arange(len(tax_years_sorted))[:, None], 0), axis=0)
+filing_status_idx = status_draws[last_change_year[year_step, filing_taxpayer_idx], filing_taxpayer_idx]
+is_hoh = np.array(filing_statuses)[filing_status_idx] == 'Head of Household'
+
+# Schedule C usage (more likely for certain AGIs, but random chance)
+schedule_c_prob = SCHEDULE_C_BASE_PROB + np.where((agi > 20000) & (agi < 100000), SCHEDULE_C_MID_AGI_BONUS, 0)
+schedule_c_used = np.random.random(n) < schedule_c_prob
+
+# Determine Complexity: 0 = Simple, 1 = Moderate, 2 = Complex
+complexity_idx = np.where(schedule_c_used | (agi > 150000), 2, np.where(agi < 40000, 0, 1))
+
+# Generate Service Fee based on Complexity
+fee_low = np.array([50, 150, 350])[complexity_idx]
+fee_high = np.array([150, 350, 700])[complexity_idx]
+base_fee = np.random.uniform(fee_low, fee_high)
+# Add slight AGI influence and noise
+service_fee = np.maximum(40.00, np.round(base_fee + (agi * 0.001) + np.random.uniform(-20, 20, n), 2)) # Minimum fee
+
+# Generate Refund/Owed Amount (Simplified Logic)
+# More likely refund for HoH, lower AGI. More likely owed for higher AGI.
+refund_chance = (0.6 + 0.15 * is_hoh + 0.1 * (agi < 30000) - 0.2 * (agi > 100000)
+                 - 0.1 * schedule_c_used) # Self-employed often owe
+# Larger refunds possible for lower AGI / HoH
+max_refund = (1000 + (50000 / np.maximum(10000, agi)) * 2000) * np.where(is_hoh, 1.5, 1.0)
+refund_amount = np.random.uniform(100, np.maximum(500, max_refund))
+max_owed = 500 + (agi / 150000) * 5000
+owed_amount = np.random.uniform(-np.maximum(200, max_owed), -50) # Negative value
+refund_owed = np.round(np.where(np.random.random(n) < refund_chance, refund_amount, owed_amount), 2)
+
+# Lead Source (adjust weights if needed)
+# If returning, more likely 'Prior_Customer'; otherwise exclude Prior_Customer
+lead_source = np.array(lead_sources[:-1])[np.random.choice(len(lead_sources) - 1, n, p=[0.3, 0.3, 0.15, 0.15, 0.1])]
+lead_source = np.where(is_returning & (np.random.random(n) < 0.8), 'Prior_Customer', lead_source)
+
+filings_df = pd.DataFrame({
+    'Location_ID': location_id_values[filing_location_idx],
+    'Taxpayer_ID': taxpayer_ids[filing_taxpayer_idx],
+    'Filing_Date': filing_date,
+    'Tax_Year': tax_year,
+    'Service_Fee_USD': service_fee,
+    'Filing_Status': np.array(filing_statuses)[filing_status_idx],
+    'Adjusted_Gross_Income': agi,
+    'Refund_Owed_Amount_USD': refund_owed,
+    'Schedule_C_Used': np.where(schedule_c_used, 'Yes', 'No'),
+    'Return_Complexity': np.array(complexity_levels)[complexity_idx],
+    'Customer_Zip_Code': customer_zip.astype(str),
+    'Customer_State': customer_state,
+    'Customer_Type': np.where(is_returning, 'Returning', 'New'),
+    'Lead_Source': lead_source,
+})
+
+# Filings are listed in filing-date order; Filing IDs are formatted in bulk per filing season, e.g., F25-000001
+filings_df = filings_df.sort_values('Filing_Date', kind='stable', ignore_index=True)
+filing_numbers = np.arange(1, len(filings_df) + 1)
+filing_ids = np.empty(len(filings_df), dtype=object)
+for year in tax_years_sorted:
+    year_mask = (filings_df['Tax_Year'] == year).to_numpy()
+    filing_ids[year_mask] = format_ids(f"F{str(year+1)[-2:]}-", filing_numbers[year_mask], 6)
+filings_df.insert(0, 'Filing_ID', filing_ids)
 print(f"Generated {len(filings_df)} filings.")
 
+# Taxpayer dimension with their filing history summary
+last_tax_year = first_tax_year.copy()
+np.maximum.at(last_tax_year, filing_taxpayer_idx, tax_year)
+taxpayers_df = pd.DataFrame({
+    'Taxpayer_ID': taxpayer_ids,
+    'Birth_Year': taxpayer_birth_year,
+    'Home_State': taxpayer_state,
+    'Zip_Code': taxpayer_zip.astype(str),
+    'Home_Location_ID': location_id_values[taxpayer_home_location],
+    'First_Tax_Year': first_tax_year,
+    'Last_Tax_Year': last_tax_year,
+    'Years_Filed': np.bincount(filing_taxpayer_idx, minlength=taxpayer_count),
+})
+print(f"Generated {len(taxpayers_df)} taxpayers.")
+
+# Per-day filing counts of the generated filings, in the same layout as the volumes-only export
+daily_volumes_df = filings_df.groupby(['Filing_Date', 'Tax_Year']).size().reset_index(name='Filings')
+
 # --- Save to CSV ---
+report_progress("Saving files", rows=len(locations_df) + len(filings_df), total_rows=len(locations_df) + len(filings_df))
 locations_filename = 'locations.csv'
+taxpayers_filename = 'taxpayers.csv'
 filings_filename = 'filings.csv'
 
 locations_df.to_csv(locations_filename, index=False)
+taxpayers_df.to_csv(taxpayers_filename, index=False)
 filings_df.to_csv(filings_filename, index=False)
+daily_volumes_df.to_csv(daily_volumes_filename, index=False)
 
 print(f"\nMock data saved to:")
 print(f"- {locations_filename}")
+print(f"- {taxpayers_filename}")
 print(f"- {filings_filename}")
+print(f"- {daily_volumes_filename}")
@@ -0,0 +1,173 @@
+# scripts/cost_model.py
+"""
+Predicts the size and runtime of a generator run from its parameters, before it starts.
+
+Each wrapper's estimate_rows() gives the expected row count per output table from
+its parameters (days x applications per day, approval and activation rates, date
+range x channels x regions, ...). The cost model turns those into memory and time:
+
+- bytes per row, per table, measured from recorded runs (SEED_COSTS until a table
+  has been seen), give the in-memory size of each table;
+- runtime is fitted per generator as fixed seconds + seconds per million rows by
+  least squares over recorded runs (SEED_COSTS until MIN_CALIBRATION_RUNS runs of
+  different sizes exist).
+
+Runs are recorded to BENCHMARKS_FILE, one JSON line each. The job manager records
+every finished run; `python -m scripts.cost_model` benchmarks each generator at a
+few sizes to calibrate a fresh install.
+"""
+
+import json
+import os
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+from .table_stats import table_stats
+
+BENCHMARKS_FILE = os.environ.get(
+    'DATAGEN_BENCHMARKS_FILE', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'benchmarks.jsonl'))
+MIN_CALIBRATION_RUNS = 3 # Recorded runs (of at least two sizes) needed before the runtime fit replaces the seed
+PEAK_MEMORY_FACTOR = 2.5 # Peak memory / output bytes: CSV parsing and the script's working set on top of the result
+BASE_MEMORY_BYTES = 128 * 1024**2 # Interpreter, script and library overhead of a run
+
+# Conservative starting coefficients per generator, replaced by measurements as runs are recorded
+SEED_COSTS = {
+    'TechMetricsGenerator': {'fixed_seconds': 5.0, 'seconds_per_million_rows': 120.0, 'bytes_per_row': 450},
+    'MarketingDataGenerator': {'fixed_seconds': 3.0, 'seconds_per_million_rows': 15.0, 'bytes_per_row': 900},
+    'LoanRiskGenerator': {'fixed_seconds': 2.0, 'seconds_per_million_rows': 400.0, 'bytes_per_row': 350},
+    'CreditCardGenerator': {'fixed_seconds': 4.0, 'seconds_per_million_rows': 25.0, 'bytes_per_row': 400},
+    'TaxDataGenerator': {'fixed_seconds': 3.0, 'seconds_per_million_rows': 10.0, 'bytes_per_row': 500},
+    'FinancialDataGenerator': {'fixed_seconds': 3.0, 'seconds_per_million_rows': 8.0, 'bytes_per_row': 550},
+}
+DEFAULT_SEED_COST = {'fixed_seconds': 5.0, 'seconds_per_million_rows': 50.0, 'bytes_per_row': 500}
+
+
+def fit_runtime(total_rows, seconds):
+    """Least-squares (fixed_seconds, seconds_per_million_rows) for runtime = fixed + rate * rows, both non-negative."""
+    millions = np.asarray(total_rows, dtype=float) / 1e6
+    design = np.column_stack([np.ones_like(millions), millions])
+    (fixed, rate), *_ = np.linalg.lstsq(design, np.asarray(seconds, dtype=float), rcond=None)
+    if rate < 0: # Noise on near-equal sizes; fall back to a pure per-run cost
+        return float(np.mean(seconds)), 0.0
+    if fixed < 0:
+        return 0.0, float(np.sum(np.asarray(seconds) * millions) / np.sum(millions ** 2))
+    return float(fixed), float(rate)
+
+
+class CostModel:
+    """Per-generator calibration from recorded runs, and estimates for new runs."""
+
+    def __init__(self, benchmarks_file=BENCHMARKS_FILE):
+        self.benchmarks_file = benchmarks_file
+        self.runs = {} # Generator class name -> list of recorded runs
+        self._lock = threading.Lock()
+        if benchmarks_file and os.path.exists(benchmarks_file):
+            with open(benchmarks_file) as f:
+                for line in f:
+                    if line.strip():
+                        run = json.loads(line)
+                        self.runs.setdefault(run['generator'], []).append(run)
+
+    def record(self, generator, frames, seconds, stats=None):
+        """
+        Records a finished run's table sizes and runtime, and appends it to the benchmarks file.
+
+        stats are the tables' precomputed table_stats(), if already known.
+        """
+        stats = stats or table_stats(frames)
+        run = {
+            'generator': type(generator).__name__,
+            'output_profile': getattr(generator, 'params', {}).get('output_profile', 'Compact'),
+            'rows': {name: table['rows'] for name, table in stats.items()},
+            'bytes': {name: table['memory_bytes'] for name, table in stats.items()},
+            'seconds': round(seconds, 3),
+        }
+        with self._lock:
+            self.runs.setdefault(run['generator'], []).append(run)
+            if self.benchmarks_file:
+                try:
+                    with open(self.benchmarks_file, 'a') as f:
+                        f.write(json.dumps(run) + '\n')
+                except OSError as e:
+                    print(f"Warning: could not record run in {self.benchmarks_file}: {e}")
+
+    def calibration(self, generator_name, output_profile='Compact'):
+        """
+        (fixed_seconds, seconds_per_million_rows, {table: bytes_per_row}, number of runs used) for a generator.
+
+        Bytes per row only come from runs with the same output profile, since dtypes change table sizes.
+        """
+        seed = SEED_COSTS.get(generator_name, DEFAULT_SEED_COST)
+        with self._lock:
+            runs = list(self.runs.get(generator_name, []))
+        fixed, rate = seed['fixed_seconds'], seed['seconds_per_million_rows']
+        total_rows = [sum(run['rows'].values()) for run in runs]
+        if len(runs) >= MIN_CALIBRATION_RUNS and len(set(total_rows)) >= 2:
+            fixed, rate = fit_runtime(total_rows, [run['seconds'] for run in runs])
+        table_rows, table_bytes = {}, {}
+        for run in runs:
+            if run.get('output_profile', 'Compact') != output_profile:
+                continue
+            for name, rows in run['rows'].items():
+                table_rows[name] = table_rows.get(name, 0) + rows
+                table_bytes[name] = table_bytes.get(name, 0) + run['bytes'].get(name, 0)
+        bytes_per_row = {name: table_bytes[name] / rows for name, rows in table_rows.items() if rows}
+        return fixed, rate, bytes_per_row, len(runs)
+
+    def estimate(self, generator):
+        """
+        Estimated cost of running a generator with its current parameters:
+        {'tables': DataFrame(Table, EstimatedRows, EstimatedBytes), 'rows', 'bytes', 'peak_memory_bytes',
+        'runtime_seconds', 'calibration_runs'}.
+        """
+        generator_name = type(generator).__name__
+        output_profile = getattr(generator, 'params', {}).get('output_profile', 'Compact')
+        fixed, rate, bytes_per_row, num_runs = self.calibration(generator_name, output_profile)
+        default_bytes_per_row = SEED_COSTS.get(generator_name, DEFAULT_SEED_COST)['bytes_per_row']
+        table_rows = generator.estimate_rows()
+        tables = pd.DataFrame({
+            'Table': list(table_rows),
+            'EstimatedRows': [int(rows) for rows in table_rows.values()],
+            'EstimatedBytes': [int(rows * bytes_per_row.get(name, default_bytes_per_row)) for name, rows in table_rows.items()],
+        })
+        total_rows = int(tables['EstimatedRows'].sum())
+        total_bytes = int(tables['EstimatedBytes'].sum())
+        return {
+            'tables': tables,
+            'rows': total_rows,
+            'bytes': total_bytes,
+            'peak_memory_bytes': int(BASE_MEMORY_BYTES + PEAK_MEMORY_FACTOR * total_bytes),
+            'runtime_seconds': fixed + rate * total_rows / 1e6,
+            'calibration_runs': num_runs,
+        }
+
+
+def benchmark(generator_class, param_sets, cost_model=None):
+    """Runs a generator once per parameter set and records each run in the cost model."""
+    cost_model = cost_model or CostModel()
+    for params in param_sets:
+        generator = generator_class(**params)
+        started = time.time()
+        frames = generator.generate()
+        seconds = time.time() - started
+        cost_model.record(generator, frames, seconds)
+        print(f"{generator_class.__name__} {params}: {sum(len(df) for df in frames.values()):,} rows in {seconds:.1f} s")
+    return cost_model
+
+
+if __name__ == '__main__':
+    # Calibrate every generator at a small, default and larger size
+    from . import (TechMetricsGenerator, MarketingDataGenerator, LoanRiskGenerator, CreditCardGenerator,
+                   TaxDataGenerator, FinancialDataGenerator)
+    from datetime import datetime
+    cost_model = CostModel()
+    benchmark(TechMetricsGenerator, [{'num_products': 3}, {'num_products': 15}, {'num_products': 40}], cost_model)
+    benchmark(MarketingDataGenerator, [{'start_date': datetime(2023, 1, 1), 'end_date': end}
+                                       for end in (datetime(2023, 3, 1), datetime(2024, 1, 1), datetime(2026, 1, 1))], cost_model)
+    benchmark(LoanRiskGenerator, [{'num_companies': n} for n in (10, 50, 200)], cost_model)
+    benchmark(CreditCardGenerator, [{'avg_apps_per_day': n} for n in (5, 30, 100)], cost_model)
+    benchmark(TaxDataGenerator, [{'num_filings': n} for n in (5000, 50000, 500000)], cost_model)
+    benchmark(FinancialDataGenerator, [{'num_transactions': n} for n in (10000, 200000, 2000000)], cost_model)
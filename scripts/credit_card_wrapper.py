@@ -2,13 +2,17 @@ import subprocess
 import tempfile
 import os
 import pandas as pd
-import sys
 from datetime import datetime
+from .partitioned_writer import read_partitioned_csv
+from .script_runner import run_script
+from .output_profile import OUTPUT_PROFILE_PARAMETER, apply_output_profile
+from .preview import PREVIEW_MAX_ENTITIES, capped, date_window, run_preview
 
 class CreditCardGenerator:
     def __init__(self, **params):
         """Initialize the Credit Card Application Data Generator with parameters."""
         self.params = params
+        self.full_run_estimate = None  # Estimated full-run size per table, set by a preview run
     
     @staticmethod
     def get_config():
@@ -21,9 +25,9 @@ class CreditCardGenerator:
                     'type': 'number',
                     'label': 'Number of Cardholders',
                     'min': 100,
-                    'max': 5000,
+                    'max': 10000000,
                     'default': 750,
-                    'help': 'Number of unique cardholders to generate'
+                    'help': 'Number of unique cardholders in the cardholder dimension'
                 },
                 'avg_apps_per_day': {
                     'type': 'number',
@@ -74,12 +78,44 @@ class CreditCardGenerator:
                     'options': ['All States', 'West Coast', 'East Coast', 'Midwest', 'South'],
                     'default_index': 0,
                     'help': 'Focus applications on specific regions'
-                }
-            }
+                },
+                'output_profile': OUTPUT_PROFILE_PARAMETER
+            },
+            'preview': 'First 30 days of applications, accounts and transactions for up to 1,000 cardholders'
+        }
+    
+    def preview_params(self):
+        """Preview: the first PREVIEW_DAYS days of applications, for at most PREVIEW_MAX_ENTITIES cardholders."""
+        params = dict(self.params)
+        start_date = params.setdefault('start_date', datetime(2023, 5, 1))
+        params['end_date'], day_scale = date_window(start_date, params.get('end_date', datetime(2026, 5, 1)))
+        params['num_cardholders'], cardholder_scale = capped(params.get('num_cardholders', 750), PREVIEW_MAX_ENTITIES)
+        # Accounts and transactions follow applications, which scale with the number of days
+        scale = {'cardholders': cardholder_scale, 'applications': day_scale, 'accounts': day_scale,
+                 'transactions': day_scale}
+        return params, scale
+    
+    # Mean transactions per activated account, as TRANSACTIONS_PER_ACTIVATED_ACCOUNT in the script
+    TRANSACTIONS_PER_ACTIVATED_ACCOUNT = 5
+    
+    def estimate_rows(self):
+        """Expected rows per table: applications per day over the date range, then approval and activation."""
+        days = (self.params.get('end_date', datetime(2026, 5, 1)) - self.params.get('start_date', datetime(2023, 5, 1))).days
+        applications = max(days, 0) * self.params.get('avg_apps_per_day', 30)
+        accounts = applications * self.params.get('approval_rate', 55) / 100.0
+        activated = accounts * self.params.get('activation_rate', 85) / 100.0
+        return {
+            'cardholders': self.params.get('num_cardholders', 750),
+            'applications': applications,
+            'accounts': accounts,
+            'transactions': activated * self.TRANSACTIONS_PER_ACTIVATED_ACCOUNT,
         }
     
-    def generate(self):
+    def generate(self, progress=None, cancel_event=None, preview=False):
         """Execute the original script and return generated DataFrames."""
+        if preview:
+            return run_preview(self, progress, cancel_event)
+        
         with tempfile.TemporaryDirectory() as temp_dir:
             # Copy the original script to temp directory
             script_path = os.path.join(os.path.dirname(__file__), 'CreditCardApplicationData.py')
@@ -214,17 +250,14 @@ class CreditCardGenerator:
             with open(temp_script_path, 'w') as f:
                 f.write(script_content)
             
-            # Change to temp directory and execute script
-            original_dir = os.getcwd()
             try:
-                os.chdir(temp_dir)
-                
-                # Execute the script
-                result = subprocess.run(
-                    [sys.executable, 'CreditCardApplicationData.py'],
-                    capture_output=True,
-                    text=True,
-                    timeout=300  # Add timeout to prevent hanging
+                # Execute the script in the temp directory
+                result = run_script(
+                    ['CreditCardApplicationData.py'],
+                    cwd=temp_dir,
+                    timeout=300,
+                    progress=progress,
+                    cancel_event=cancel_event
                 )
                 
                 if result.returncode != 0:
@@ -233,16 +266,20 @@ class CreditCardGenerator:
                 # Read the generated CSV files
                 dataframes = {}
                 
+                # Read cardholders
+                if os.path.exists(os.path.join(temp_dir, 'cardholders.csv')):
+                    dataframes['cardholders'] = pd.read_csv(os.path.join(temp_dir, 'cardholders.csv'))
+                
                 # Read applications
-                if os.path.exists('applications.csv'):
-                    df = pd.read_csv('applications.csv')
+                if os.path.exists(os.path.join(temp_dir, 'applications.csv')):
+                    df = pd.read_csv(os.path.join(temp_dir, 'applications.csv'))
                     if 'ApplicationDate' in df.columns:
                         df['ApplicationDate'] = pd.to_datetime(df['ApplicationDate'])
                     dataframes['applications'] = df
                 
                 # Read accounts
-                if os.path.exists('accounts.csv'):
-                    df = pd.read_csv('accounts.csv')
+                if os.path.exists(os.path.join(temp_dir, 'accounts.csv')):
+                    df = pd.read_csv(os.path.join(temp_dir, 'accounts.csv'))
                     # Convert date columns
                     date_columns = ['AccountOpenDate', 'ActivationDate', 'SnapshotDate', 'PaymentDueDateAtSnapshot']
                     for col in date_columns:
@@ -250,19 +287,16 @@ class CreditCardGenerator:
                             df[col] = pd.to_datetime(df[col], errors='coerce')
                     dataframes['accounts'] = df
                 
-                # Read transactions
-                if os.path.exists('transactions.csv'):
-                    df = pd.read_csv('transactions.csv')
-                    if 'TransactionDate' in df.columns:
-                        df['TransactionDate'] = pd.to_datetime(df['TransactionDate'])
+                # Read transactions (written as date partitions)
+                df = read_partitioned_csv(os.path.join(temp_dir, 'transactions'))
+                if not df.empty:
+                    df['TransactionDate'] = pd.to_datetime(df['TransactionDate'])
                     dataframes['transactions'] = df
                 
                 if not dataframes:
                     raise Exception("No data files were generated")
                 
-                return dataframes
+                return apply_output_profile(dataframes, self.params.get('output_profile', 'Compact'))
                 
             except subprocess.TimeoutExpired:
                 raise Exception("Script execution timed out. Try reducing the number of cardholders or date range.")
-            finally:
-                os.chdir(original_dir)
\ No newline at end of file
@@ -0,0 +1,84 @@
+# scripts/exporters.py
+"""
+Export formats for generated tables.
+
+Each table is serialised once per format and the bytes are reused for its
+individual download and for the all-tables bundle. Besides plain CSV:
+
+- CSV (gzip / zstd) is compressed while it is written, in row chunks;
+- Parquet keeps the output profile's dtypes, dictionary-encodes repeated values
+  (categoricals) and splits tables into row groups;
+- Arrow IPC writes the tables as Arrow record batches, ready for zero-copy reads.
+
+Parquet and Arrow IPC need pyarrow, and zstd needs zstandard; formats whose
+library is missing are left out of available_formats().
+"""
+
+import importlib.util
+import io
+import zipfile
+
+CSV_CHUNK_ROWS = 500000 # Rows formatted per write when streaming CSV output
+PARQUET_ROW_GROUP_SIZE = 1000000 # Rows per Parquet row group
+ARROW_BATCH_ROWS = 1000000 # Rows per Arrow IPC record batch
+
+# Format -> (file extension, MIME type, required module or None, already compressed)
+EXPORT_FORMATS = {
+    'CSV': ('.csv', 'text/csv', None, False),
+    'CSV (gzip)': ('.csv.gz', 'application/gzip', None, True),
+    'CSV (zstd)': ('.csv.zst', 'application/zstd', 'zstandard', True),
+    'Parquet': ('.parquet', 'application/vnd.apache.parquet', 'pyarrow', True),
+    'Arrow IPC': ('.arrow', 'application/vnd.apache.arrow.file', 'pyarrow', False),
+}
+
+
+def available_formats():
+    """Export formats whose libraries are installed, in EXPORT_FORMATS order."""
+    return [name for name, (_, _, module, _) in EXPORT_FORMATS.items()
+            if module is None or importlib.util.find_spec(module) is not None]
+
+
+def file_name(table_name, export_format):
+    """File name of a table exported in a format, e.g. applications.csv.gz."""
+    return table_name + EXPORT_FORMATS[export_format][0]
+
+
+def mime_type(export_format):
+    return EXPORT_FORMATS[export_format][1]
+
+
+def export_table(df, export_format):
+    """A table serialised in an export format, as bytes."""
+    if export_format not in EXPORT_FORMATS:
+        raise ValueError(f"Unknown export format '{export_format}'. Use one of {list(EXPORT_FORMATS)}")
+    buffer = io.BytesIO()
+    if export_format == 'CSV':
+        df.to_csv(buffer, index=False, chunksize=CSV_CHUNK_ROWS)
+    elif export_format == 'CSV (gzip)':
+        df.to_csv(buffer, index=False, chunksize=CSV_CHUNK_ROWS, compression={'method': 'gzip', 'mtime': 0})
+    elif export_format == 'CSV (zstd)':
+        df.to_csv(buffer, index=False, chunksize=CSV_CHUNK_ROWS, compression={'method': 'zstd'})
+    elif export_format == 'Parquet':
+        df.to_parquet(buffer, engine='pyarrow', index=False, compression='zstd', use_dictionary=True,
+                      row_group_size=PARQUET_ROW_GROUP_SIZE)
+    else:
+        import pyarrow as pa
+        table = pa.Table.from_pandas(df, preserve_index=False)
+        with pa.ipc.new_file(buffer, table.schema) as writer:
+            for batch in table.to_batches(max_chunksize=ARROW_BATCH_ROWS):
+                writer.write_batch(batch)
+    return buffer.getvalue()
+
+
+def export_bundle(exported, export_format):
+    """
+    ZIP of already exported tables ({table name: bytes}).
+
+    Files that are already compressed are stored as they are rather than deflated again.
+    """
+    compression = zipfile.ZIP_STORED if EXPORT_FORMATS[export_format][3] else zipfile.ZIP_DEFLATED
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, 'w', compression) as zip_file:
+        for table_name, data in exported.items():
+            zip_file.writestr(file_name(table_name, export_format), data)
+    return buffer.getvalue()
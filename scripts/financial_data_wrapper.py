@@ -1,14 +1,19 @@
+import json
 import subprocess
 import tempfile
 import os
 import pandas as pd
-import sys
 from datetime import datetime
+from .script_runner import run_script
+from .output_profile import OUTPUT_PROFILE_PARAMETER, apply_output_profile
+from .preview import PREVIEW_MAX_ROWS, capped, run_preview
 
 class FinancialDataGenerator:
     def __init__(self, **params):
         """Initialize the Financial Data Generator with parameters."""
         self.params = params
+        self.full_run_estimate = None  # Estimated full-run size per table, set by a preview run
+        self.verification_report = None  # Structured summary statistics from the last run, if requested
     
     @staticmethod
     def get_config():
@@ -21,9 +26,10 @@ class FinancialDataGenerator:
                     'type': 'number',
                     'label': 'Number of Transactions',
                     'min': 1000,
-                    'max': 100000,
+                    'max': 50000000,
                     'default': 20000,
-                    'help': 'Total number of sales transactions to generate'
+                    'help': 'Total number of sales transactions to generate. The whole table is loaded into memory; '
+                            'check the estimate next to Generate before very large runs'
                 },
                 'num_products': {
                     'type': 'number',
@@ -80,12 +86,74 @@ class FinancialDataGenerator:
                     'options': ['Standard (Q4 Heavy)', 'Even Distribution', 'Summer Peak', 'Winter Peak'],
                     'default_index': 0,
                     'help': 'Control seasonal patterns in transactions'
-                }
-            }
+                },
+                'include_statements': {
+                    'type': 'boolean',
+                    'label': 'Include Financial Statements',
+                    'default': True,
+                    'help': 'Build monthly income statements, balance sheets and cash flow statements from the transactions'
+                },
+                'statement_level': {
+                    'type': 'select',
+                    'label': 'Statement Level',
+                    'options': ['Department', 'Division'],
+                    'default_index': 0,
+                    'help': 'Produce statements per department or consolidated per division'
+                },
+                'include_verification': {
+                    'type': 'boolean',
+                    'label': 'Include Verification Summary',
+                    'default': False,
+                    'help': 'Compute summary statistics by category and by year and division while generating'
+                },
+                'output_profile': OUTPUT_PROFILE_PARAMETER
+            },
+            'preview': 'Up to 5,000 transactions drawn across the full date range; statements cover every period'
         }
     
-    def generate(self):
+    def preview_params(self):
+        """Preview: at most PREVIEW_MAX_ROWS transactions, sampled from the full run's date and product mix."""
+        params = dict(self.params)
+        params['num_transactions'], transaction_scale = capped(params.get('num_transactions', 20000), PREVIEW_MAX_ROWS)
+        # Statements and summaries have one row per period/group however many transactions there are
+        return params, {'sales_transactions': transaction_scale}
+    
+    # Script timeout: a fixed allowance plus time per million transactions (about 10 s measured; doubled for margin)
+    TIMEOUT_BASE_SECONDS = 300
+    TIMEOUT_SECONDS_PER_MILLION = 20
+    
+    # Low-cardinality transaction columns read straight into categoricals with the Compact profile, so the
+    # parser never holds them as a full column of Python strings
+    CATEGORY_COLUMNS = ['ProductID', 'CustomerID', 'CorporateMarketingCategory', 'Division', 'Department',
+                        'ProductClass', 'StrategyCategory']
+    
+    def script_timeout(self):
+        """Seconds the script may run, scaled with the number of transactions requested."""
+        return self.TIMEOUT_BASE_SECONDS + self.TIMEOUT_SECONDS_PER_MILLION * self.params.get('num_transactions', 20000) / 1e6
+    
+    # Statement rows per month at each level: one per department (21) or division (5)
+    STATEMENT_ENTITIES = {'Department': 21, 'Division': 5}
+    
+    def estimate_rows(self):
+        """Expected rows per table: transactions and products as requested, statements per month and entity."""
+        start_date = self.params.get('start_date', datetime(2023, 1, 1))
+        end_date = self.params.get('end_date', datetime(2025, 12, 31))
+        rows = {
+            'sales_transactions': self.params.get('num_transactions', 20000),
+            'product_master': self.params.get('num_products', 150),
+        }
+        if self.params.get('include_statements', True):
+            months = (end_date.year - start_date.year) * 12 + end_date.month - start_date.month + 1
+            entities = self.STATEMENT_ENTITIES.get(self.params.get('statement_level', 'Department'), 21)
+            for statement_name in ['income_statement', 'balance_sheet', 'cash_flow_statement']:
+                rows[statement_name] = months * entities
+        return rows
+    
+    def generate(self, progress=None, cancel_event=None, preview=False):
         """Execute the original script and return generated DataFrames."""
+        if preview:
+            return run_preview(self, progress, cancel_event)
+        
         with tempfile.TemporaryDirectory() as temp_dir:
             # Copy the original script to temp directory
             script_path = os.path.join(os.path.dirname(__file__), 'GenericFinancialData.py')
@@ -140,26 +208,17 @@ class FinancialDataGenerator:
             # Modify category focus
             if self.params.get('category_focus') and self.params['category_focus'] != 'All Categories':
                 category_focus = self.params['category_focus']
-                if category_focus == 'Technology Heavy':
-                    # Weight technology products more heavily
-                    modifications.append(
-                        ('category = random.choice(corporate_marketing_categories)',
-                         'category = random.choices(corporate_marketing_categories, weights=[0.1, 0.1, 0.6, 0.1, 0.1], k=1)[0]')
-                    )
-                elif category_focus == 'Supplies Heavy':
-                    modifications.append(
-                        ('category = random.choice(corporate_marketing_categories)',
-                         'category = random.choices(corporate_marketing_categories, weights=[0.6, 0.1, 0.1, 0.1, 0.1], k=1)[0]')
-                    )
-                elif category_focus == 'Furniture Heavy':
-                    modifications.append(
-                        ('category = random.choice(corporate_marketing_categories)',
-                         'category = random.choices(corporate_marketing_categories, weights=[0.1, 0.6, 0.1, 0.1, 0.1], k=1)[0]')
-                    )
-                elif category_focus == 'Services Heavy':
+                # Share of products per category: Supplies, Furniture, Technology, Services, Equipment
+                category_weights_map = {
+                    'Technology Heavy': '[0.1, 0.1, 0.6, 0.1, 0.1]',
+                    'Supplies Heavy': '[0.6, 0.1, 0.1, 0.1, 0.1]',
+                    'Furniture Heavy': '[0.1, 0.6, 0.1, 0.1, 0.1]',
+                    'Services Heavy': '[0.1, 0.1, 0.1, 0.6, 0.1]'
+                }
+                if category_focus in category_weights_map:
                     modifications.append(
-                        ('category = random.choice(corporate_marketing_categories)',
-                         'category = random.choices(corporate_marketing_categories, weights=[0.1, 0.1, 0.1, 0.6, 0.1], k=1)[0]')
+                        ('CATEGORY_WEIGHTS = [0.2, 0.2, 0.2, 0.2, 0.2]',
+                         f'CATEGORY_WEIGHTS = {category_weights_map[category_focus]}')
                     )
             
             # Modify division focus
@@ -175,124 +234,78 @@ class FinancialDataGenerator:
                 if division_focus in weights_map:
                     # Replace all division weight definitions
                     modifications.append(
-                        ('division_weights = [0.15, 0.15, 0.15, 0.25, 0.3]',
-                         f'division_weights = {weights_map[division_focus]}')
+                        ('TECHNOLOGY_DIVISION_WEIGHTS = [0.15, 0.15, 0.15, 0.25, 0.3]',
+                         f'TECHNOLOGY_DIVISION_WEIGHTS = {weights_map[division_focus]}')
                     )
                     modifications.append(
-                        ('division_weights = [0.2, 0.2, 0.2, 0.2, 0.2]',
-                         f'division_weights = {weights_map[division_focus]}')
+                        ('SUPPLIES_DIVISION_WEIGHTS = [0.2, 0.2, 0.2, 0.2, 0.2]',
+                         f'SUPPLIES_DIVISION_WEIGHTS = {weights_map[division_focus]}')
                     )
                     modifications.append(
-                        ('division_weights = [0.25, 0.25, 0.2, 0.2, 0.1]',
-                         f'division_weights = {weights_map[division_focus]}')
+                        ('OTHER_DIVISION_WEIGHTS = [0.25, 0.25, 0.2, 0.2, 0.1]',
+                         f'OTHER_DIVISION_WEIGHTS = {weights_map[division_focus]}')
                     )
             
             # Modify margin profile
             if self.params.get('margin_profile'):
                 margin_profile = self.params['margin_profile']
-                if margin_profile == 'High Margin':
+                # Markup ranges per pricing tier: Tech, Furniture, Consumables, Standard
+                markup_ranges_map = {
                     # Increase all markup values
-                    modifications.append(
-                        ('markup = random.uniform(1.3, 2.0)',
-                         'markup = random.uniform(1.5, 2.3)')
-                    )
-                    modifications.append(
-                        ('markup = random.uniform(1.2, 1.6)',
-                         'markup = random.uniform(1.4, 1.9)')
-                    )
-                    modifications.append(
-                        ('markup = random.uniform(1.5, 2.2)',
-                         'markup = random.uniform(1.7, 2.5)')
-                    )
-                    modifications.append(
-                        ('markup = random.uniform(1.2, 1.8)',
-                         'markup = random.uniform(1.4, 2.1)')
-                    )
-                elif margin_profile == 'Low Margin':
+                    'High Margin': '[(1.5, 2.3), (1.4, 1.9), (1.7, 2.5), (1.4, 2.1)]',
                     # Decrease all markup values
-                    modifications.append(
-                        ('markup = random.uniform(1.3, 2.0)',
-                         'markup = random.uniform(1.1, 1.5)')
-                    )
-                    modifications.append(
-                        ('markup = random.uniform(1.2, 1.6)',
-                         'markup = random.uniform(1.05, 1.3)')
-                    )
-                    modifications.append(
-                        ('markup = random.uniform(1.5, 2.2)',
-                         'markup = random.uniform(1.2, 1.7)')
-                    )
-                    modifications.append(
-                        ('markup = random.uniform(1.2, 1.8)',
-                         'markup = random.uniform(1.05, 1.4)')
-                    )
-                elif margin_profile == 'Variable':
+                    'Low Margin': '[(1.1, 1.5), (1.05, 1.3), (1.2, 1.7), (1.05, 1.4)]',
                     # Increase variability
+                    'Variable': '[(1.0, 2.5), (1.0, 2.0), (1.1, 2.8), (1.0, 2.3)]'
+                }
+                if margin_profile in markup_ranges_map:
                     modifications.append(
-                        ('markup = random.uniform(1.3, 2.0)',
-                         'markup = random.uniform(1.0, 2.5)')
-                    )
-                    modifications.append(
-                        ('markup = random.uniform(1.2, 1.6)',
-                         'markup = random.uniform(1.0, 2.0)')
-                    )
-                    modifications.append(
-                        ('markup = random.uniform(1.5, 2.2)',
-                         'markup = random.uniform(1.1, 2.8)')
-                    )
-                    modifications.append(
-                        ('markup = random.uniform(1.2, 1.8)',
-                         'markup = random.uniform(1.0, 2.3)')
+                        ('MARKUP_RANGES = [(1.3, 2.0), (1.2, 1.6), (1.5, 2.2), (1.2, 1.8)]',
+                         f'MARKUP_RANGES = {markup_ranges_map[margin_profile]}')
                     )
             
             # Modify seasonality pattern
             if self.params.get('seasonality'):
                 seasonality = self.params['seasonality']
-                if seasonality == 'Even Distribution':
-                    # Replace seasonality logic with even distribution
-                    new_logic = """        # Even distribution across all months
-        random_days = random.randint(0, days_range)
-        date = start_date + timedelta(days=random_days)"""
-                    
-                    old_logic = """        # Create seasonal patterns with more sales in Q4 and fewer in Q1
-        while True:
-            random_days = int(np.random.triangular(0, days_range*0.6, days_range))
-            date = start_date + timedelta(days=random_days)
-            month = date.month
-            
-            # Higher probability of transactions in Q4 (Oct-Dec), lower in Q1 (Jan-Mar)
-            if month in [10, 11, 12]:  # Q4
-                if random.random() < 0.7:  # 70% chance to accept this date
-                    break
-            elif month in [1, 2, 3]:  # Q1
-                if random.random() < 0.3:  # 30% chance to accept this date
-                    break
-            else:  # Q2 and Q3
-                if random.random() < 0.5:  # 50% chance to accept this date
-                    break"""
-                    
-                    modifications.append((old_logic, new_logic))
-                
-                elif seasonality == 'Summer Peak':
-                    modifications.append(
-                        ('if month in [10, 11, 12]:  # Q4',
-                         'if month in [6, 7, 8]:  # Summer')
-                    )
-                    modifications.append(
-                        ('elif month in [1, 2, 3]:  # Q1',
-                         'elif month in [11, 12, 1, 2]:  # Winter')
-                    )
-                
-                elif seasonality == 'Winter Peak':
+                month_weights = {
+                    # Flat trend and equal weight for every month
+                    'Even Distribution': '[0.5, 0.5, 0.5, 0.5, 0.5, 0.5, 0.5, 0.5, 0.5, 0.5, 0.5, 0.5]',
+                    # Summer (Jun-Aug) heavy, winter (Nov-Feb) light
+                    'Summer Peak': '[0.3, 0.3, 0.5, 0.5, 0.5, 0.7, 0.7, 0.7, 0.5, 0.5, 0.3, 0.3]',
+                    # Winter (Nov-Feb) heavy, summer (Jun-Aug) light
+                    'Winter Peak': '[0.7, 0.7, 0.5, 0.5, 0.5, 0.3, 0.3, 0.3, 0.5, 0.5, 0.7, 0.7]',
+                }
+                if seasonality in month_weights:
                     modifications.append(
-                        ('if month in [10, 11, 12]:  # Q4',
-                         'if month in [11, 12, 1, 2]:  # Winter')
+                        ('MONTH_WEIGHTS = [0.3, 0.3, 0.3, 0.5, 0.5, 0.5, 0.5, 0.5, 0.5, 0.7, 0.7, 0.7]',
+                         f'MONTH_WEIGHTS = {month_weights[seasonality]}')
                     )
+                if seasonality == 'Even Distribution':
                     modifications.append(
-                        ('elif month in [1, 2, 3]:  # Q1',
-                         'elif month in [6, 7, 8]:  # Summer')
+                        ('DATE_TREND_MODE = 0.6',
+                         'DATE_TREND_MODE = None')
                     )
             
+            # Financial statements
+            if not self.params.get('include_statements', True):
+                modifications.append(
+                    ('GENERATE_STATEMENTS = True',
+                     'GENERATE_STATEMENTS = False')
+                )
+            
+            if self.params.get('statement_level') and self.params['statement_level'] != 'Department':
+                modifications.append(
+                    ('STATEMENT_LEVEL = "Department"',
+                     f'STATEMENT_LEVEL = {self.params["statement_level"]!r}')
+                )
+            
+            # Verification report
+            if self.params.get('include_verification'):
+                modifications.append(
+                    ('VERIFICATION_REPORT = False',
+                     'VERIFICATION_REPORT = True')
+                )
+            
             # Apply modifications
             for old_text, new_text in modifications:
                 script_content = script_content.replace(old_text, new_text)
@@ -301,17 +314,14 @@ class FinancialDataGenerator:
             with open(temp_script_path, 'w') as f:
                 f.write(script_content)
             
-            # Change to temp directory and execute script
-            original_dir = os.getcwd()
             try:
-                os.chdir(temp_dir)
-                
-                # Execute the script
-                result = subprocess.run(
-                    [sys.executable, 'GenericFinancialData.py'],
-                    capture_output=True,
-                    text=True,
-                    timeout=300  # Add timeout
+                # Execute the script in the temp directory
+                result = run_script(
+                    ['GenericFinancialData.py'],
+                    cwd=temp_dir,
+                    timeout=self.script_timeout(),
+                    progress=progress,
+                    cancel_event=cancel_event
                 )
                 
                 if result.returncode != 0:
@@ -321,23 +331,34 @@ class FinancialDataGenerator:
                 dataframes = {}
                 
                 # Read sales transactions
-                if os.path.exists('sales_transactions.csv'):
-                    df = pd.read_csv('sales_transactions.csv')
-                    # Convert date column
-                    if 'TransactionDate' in df.columns:
-                        df['TransactionDate'] = pd.to_datetime(df['TransactionDate'])
+                if os.path.exists(os.path.join(temp_dir, 'sales_transactions.csv')):
+                    dtype = None
+                    if self.params.get('output_profile', 'Compact') == 'Compact':
+                        dtype = {column: 'category' for column in self.CATEGORY_COLUMNS}
+                    df = pd.read_csv(os.path.join(temp_dir, 'sales_transactions.csv'), dtype=dtype,
+                                     parse_dates=['TransactionDate'])
                     dataframes['sales_transactions'] = df
                 
                 # Read product master
-                if os.path.exists('product_master.csv'):
-                    dataframes['product_master'] = pd.read_csv('product_master.csv')
+                if os.path.exists(os.path.join(temp_dir, 'product_master.csv')):
+                    dataframes['product_master'] = pd.read_csv(os.path.join(temp_dir, 'product_master.csv'))
+                
+                # Read financial statements
+                for statement_name in ['income_statement', 'balance_sheet', 'cash_flow_statement']:
+                    if os.path.exists(os.path.join(temp_dir, f'{statement_name}.csv')):
+                        dataframes[statement_name] = pd.read_csv(os.path.join(temp_dir, f'{statement_name}.csv'))
+                
+                # Read verification report
+                if os.path.exists(os.path.join(temp_dir, 'verification_report.json')):
+                    with open(os.path.join(temp_dir, 'verification_report.json')) as f:
+                        self.verification_report = json.load(f)
+                    dataframes['verification_category_summary'] = pd.DataFrame(self.verification_report['category_summary'])
+                    dataframes['verification_year_division_summary'] = pd.DataFrame(self.verification_report['year_division_summary'])
                 
                 if not dataframes:
                     raise Exception("No data files were generated")
                 
-                return dataframes
+                return apply_output_profile(dataframes, self.params.get('output_profile', 'Compact'))
                 
             except subprocess.TimeoutExpired:
                 raise Exception("Script execution timed out. Try reducing the number of transactions.")
-            finally:
-                os.chdir(original_dir)
\ No newline at end of file
@@ -0,0 +1,195 @@
+# scripts/financial_statements.py
+"""
+Period-level financial statements built from sales transactions in one streaming pass.
+
+Transactions are added chunk by chunk as (month, entity) codes with sales and
+cost arrays. A RollupAccumulator keeps the running monthly totals per entity, so
+the detailed table is never held in memory. The totals then drive an income
+statement, plus a balance sheet and cash flow statement rolled forward month by
+month. Every balance sheet balances, and each closing balance is the next month's
+opening balance.
+"""
+
+import numpy as np
+import pandas as pd
+
+from rollups import RollupAccumulator
+
+# Operating and balance sheet assumptions applied to every entity
+DEFAULT_ASSUMPTIONS = {
+    'fixed_opex_to_revenue': 0.08,  # Fixed monthly operating expenses as a share of average monthly revenue
+    'variable_opex_rate': 0.12,  # Share of revenue spent on operating expenses
+    'receivable_days': 45,  # Days of revenue held as accounts receivable
+    'inventory_days': 60,  # Days of COGS held as inventory
+    'payable_days': 30,  # Days of COGS owed to suppliers
+    'capex_rate': 0.03,  # Share of revenue reinvested in property, plant and equipment
+    'depreciation_rate': 0.10,  # Annual depreciation rate on PP&E
+    'interest_rate': 0.06,  # Annual interest rate on debt
+    'tax_rate': 0.25,  # Income tax rate on positive pretax income
+    'dividend_payout': 0.3,  # Share of positive net income paid out as dividends
+    'opening_ppe_to_revenue': 0.5,  # Opening PP&E as a share of annual revenue
+    'opening_debt_to_assets': 0.3,  # Opening debt as a share of opening total assets
+    'opening_cash_months': 2,  # Opening cash as months of operating expenses
+}
+
+INCOME_STATEMENT_ITEMS = ['Revenue', 'CostOfGoodsSold', 'GrossProfit', 'OperatingExpenses', 'Depreciation',
+                          'OperatingIncome', 'InterestExpense', 'PretaxIncome', 'IncomeTax', 'NetIncome']
+BALANCE_SHEET_ITEMS = ['Cash', 'AccountsReceivable', 'Inventory', 'PropertyPlantEquipment', 'TotalAssets',
+                       'AccountsPayable', 'Debt', 'TotalLiabilities', 'Equity', 'TotalLiabilitiesAndEquity']
+CASH_FLOW_ITEMS = ['NetIncome', 'Depreciation', 'ChangeInReceivables', 'ChangeInInventory', 'ChangeInPayables',
+                   'OperatingCashFlow', 'CapitalExpenditure', 'InvestingCashFlow', 'Dividends', 'FinancingCashFlow',
+                   'NetChangeInCash', 'OpeningCash', 'ClosingCash']
+
+
+class StatementEngine:
+    """Accumulates monthly revenue and COGS per entity and derives the three financial statements."""
+
+    def __init__(self, start_date, end_date, entities, entity_groups, entity_column='Department',
+                 group_column='Division', assumptions=None):
+        self.periods = np.arange(np.datetime64(start_date, 'M'), np.datetime64(end_date, 'M') + 1)
+        self.entities = np.asarray(entities)
+        self.entity_groups = np.asarray(entity_groups)
+        self.entity_column = entity_column
+        self.group_column = group_column
+        self.assumptions = {**DEFAULT_ASSUMPTIONS, **(assumptions or {})}
+        unknown = set(self.assumptions) - set(DEFAULT_ASSUMPTIONS)
+        if unknown:
+            raise ValueError(f"Unknown statement assumptions: {sorted(unknown)}")
+        self.totals = RollupAccumulator(
+            'statements', [('Period', self.periods), (entity_column, self.entities)], ['Revenue', 'CostOfGoodsSold'])
+
+    def add(self, dates, entity_codes, sales, cogs):
+        """Adds a chunk of transactions: dates, integer entity codes, sales amounts and COGS."""
+        period_codes = (np.asarray(dates).astype('datetime64[M]') - self.periods[0]).astype(np.intp)
+        if len(period_codes) and (period_codes.min() < 0 or period_codes.max() >= len(self.periods)):
+            raise ValueError("Transaction dates fall outside the statement periods")
+        self.totals.add({'Period': period_codes, self.entity_column: entity_codes},
+                        {'Revenue': sales, 'CostOfGoodsSold': cogs})
+
+    def add_csv(self, path, date_column='TransactionDate', chunksize=1000000):
+        """Streams a transactions CSV into the engine without loading it all at once."""
+        columns = [date_column, self.entity_column, 'SalesAmount', 'CostOfGoodsSold']
+        for chunk in pd.read_csv(path, usecols=columns, parse_dates=[date_column], chunksize=chunksize):
+            entity_codes = pd.Categorical(chunk[self.entity_column], categories=self.entities).codes
+            if (entity_codes < 0).any():
+                raise ValueError(f"Unknown {self.entity_column} values in {path}")
+            self.add(chunk[date_column].to_numpy(), entity_codes,
+                     chunk['SalesAmount'].to_numpy(), chunk['CostOfGoodsSold'].to_numpy())
+
+    def _line_items(self):
+        """All statement line items as (period, entity) arrays, rolling balances forward month by month."""
+        a = self.assumptions
+        shape = (len(self.periods), len(self.entities))
+        revenue = self.totals.sums['Revenue'].reshape(shape)
+        cogs = self.totals.sums['CostOfGoodsSold'].reshape(shape)
+        days_in_month = ((self.periods + 1).astype('datetime64[D]') - self.periods.astype('datetime64[D]')).astype(float)[:, None]
+
+        # Period-end working capital balances follow the month's activity
+        receivables = revenue / days_in_month * a['receivable_days']
+        inventory = cogs / days_in_month * a['inventory_days']
+        payables = cogs / days_in_month * a['payable_days']
+
+        # Opening balances from average activity over the whole range, so the first month is not a jump from zero
+        total_days = days_in_month.sum()
+        daily_revenue = revenue.sum(axis=0) / total_days
+        daily_cogs = cogs.sum(axis=0) / total_days
+        opening_receivables = daily_revenue * a['receivable_days']
+        opening_inventory = daily_cogs * a['inventory_days']
+        opening_payables = daily_cogs * a['payable_days']
+        ppe = daily_revenue * 365 * a['opening_ppe_to_revenue']
+        # Fixed costs are sized to each entity's scale, so small and large entities both run at a plausible margin
+        fixed_opex = daily_revenue * 365 / 12 * a['fixed_opex_to_revenue']
+        cash = a['opening_cash_months'] * (fixed_opex + a['variable_opex_rate'] * daily_revenue * 365 / 12)
+        opening_assets = cash + opening_receivables + opening_inventory + ppe
+        debt = opening_assets * a['opening_debt_to_assets']
+        equity = opening_assets - opening_payables - debt
+
+        items = {name: np.zeros(shape) for name in set(INCOME_STATEMENT_ITEMS + BALANCE_SHEET_ITEMS + CASH_FLOW_ITEMS)}
+        items.update(Revenue=revenue, CostOfGoodsSold=cogs, AccountsReceivable=receivables, Inventory=inventory,
+                     AccountsPayable=payables)
+        previous_receivables, previous_inventory, previous_payables = opening_receivables, opening_inventory, opening_payables
+        for t in range(len(self.periods)):
+            # Income statement
+            depreciation = ppe * a['depreciation_rate'] / 12
+            operating_expenses = fixed_opex + a['variable_opex_rate'] * revenue[t]
+            operating_income = revenue[t] - cogs[t] - operating_expenses - depreciation
+            interest = debt * a['interest_rate'] / 12
+            pretax_income = operating_income - interest
+            income_tax = np.maximum(pretax_income, 0) * a['tax_rate']
+            net_income = pretax_income - income_tax
+
+            # Cash flow statement (indirect method)
+            change_receivables = receivables[t] - previous_receivables
+            change_inventory = inventory[t] - previous_inventory
+            change_payables = payables[t] - previous_payables
+            operating_cash_flow = net_income + depreciation - change_receivables - change_inventory + change_payables
+            capex = revenue[t] * a['capex_rate']
+            dividends = np.maximum(net_income, 0) * a['dividend_payout']
+            net_change_in_cash = operating_cash_flow - capex - dividends
+
+            items['GrossProfit'][t] = revenue[t] - cogs[t]
+            items['OperatingExpenses'][t] = operating_expenses
+            items['Depreciation'][t] = depreciation
+            items['OperatingIncome'][t] = operating_income
+            items['InterestExpense'][t] = interest
+            items['PretaxIncome'][t] = pretax_income
+            items['IncomeTax'][t] = income_tax
+            items['NetIncome'][t] = net_income
+            items['ChangeInReceivables'][t] = change_receivables
+            items['ChangeInInventory'][t] = change_inventory
+            items['ChangeInPayables'][t] = change_payables
+            items['OperatingCashFlow'][t] = operating_cash_flow
+            items['CapitalExpenditure'][t] = capex
+            items['InvestingCashFlow'][t] = -capex
+            items['Dividends'][t] = dividends
+            items['FinancingCashFlow'][t] = -dividends
+            items['NetChangeInCash'][t] = net_change_in_cash
+            items['OpeningCash'][t] = cash
+
+            # Balance sheet roll-forward: closing balances become next month's opening balances
+            cash = cash + net_change_in_cash
+            ppe = ppe + capex - depreciation
+            equity = equity + net_income - dividends
+            items['ClosingCash'][t] = cash
+            items['Cash'][t] = cash
+            items['PropertyPlantEquipment'][t] = ppe
+            items['Debt'][t] = debt
+            items['Equity'][t] = equity
+            previous_receivables, previous_inventory, previous_payables = receivables[t], inventory[t], payables[t]
+
+        items['TotalAssets'] = items['Cash'] + receivables + inventory + items['PropertyPlantEquipment']
+        items['TotalLiabilities'] = payables + items['Debt']
+        items['TotalLiabilitiesAndEquity'] = items['TotalLiabilities'] + items['Equity']
+        return items
+
+    def statements(self, level=None):
+        """
+        Income statement, balance sheet and cash flow statement as {name: DataFrame}, one row per period and entity.
+
+        With level=group_column (e.g. 'Division'), entity statements are consolidated by summing them per group.
+        """
+        items = self._line_items()
+        if level in (None, self.entity_column):
+            id_columns = {self.group_column: self.entity_groups, self.entity_column: self.entities}
+        elif level == self.group_column:
+            groups, group_codes = np.unique(self.entity_groups, return_inverse=True)
+            consolidated = {}
+            for name, values in items.items():
+                consolidated[name] = np.zeros((len(self.periods), len(groups)))
+                np.add.at(consolidated[name], (slice(None), group_codes), values)
+            items = consolidated
+            id_columns = {self.group_column: groups}
+        else:
+            raise ValueError(f"Unsupported statement level '{level}'. Use '{self.entity_column}' or '{self.group_column}'")
+
+        num_entities = len(next(iter(id_columns.values())))
+        index = {'Period': np.repeat(np.datetime_as_string(self.periods), num_entities)}
+        index.update({column: np.tile(labels, len(self.periods)) for column, labels in id_columns.items()})
+        frames = {}
+        for name, line_items in [('income_statement', INCOME_STATEMENT_ITEMS), ('balance_sheet', BALANCE_SHEET_ITEMS),
+                                 ('cash_flow_statement', CASH_FLOW_ITEMS)]:
+            frame = pd.DataFrame(index)
+            for item in line_items:
+                frame[item] = np.round(items[item].ravel(), 2)
+            frames[name] = frame
+        return frames
@@ -0,0 +1,122 @@
+# scripts/id_service.py
+"""
+Collision-free ID minting shared by the generator scripts.
+
+IDs come from per-prefix counters, so they are unique by construction. With a
+key, each counter value is passed through a keyed bijective permutation of the
+ID space first, so IDs still look random (e.g. APP_3F9A01C2) without the
+collisions of truncated uuid4 values. Formatting is done in bulk on numpy arrays.
+"""
+
+import hashlib
+
+import numpy as np
+
+_HEX_DIGITS = np.frombuffer(b'0123456789ABCDEF', dtype=np.uint8)
+_PERMUTATION_ROUNDS = 3
+
+
+def _digit_count(value, base):
+    """Number of digits needed to write value in the given base."""
+    digits = 1
+    while value >= base:
+        value //= base
+        digits += 1
+    return digits
+
+
+def format_ids(prefix, values, width, base=10, lowercase=False):
+    """
+    Formats integer values as fixed-width IDs with a common prefix, e.g. F25-000001.
+
+    Decimal IDs widen automatically if a value needs more than `width` digits.
+    """
+    values = np.asarray(values, dtype=np.uint64)
+    if len(values) and base == 10:
+        width = max(width, _digit_count(int(values.max()), 10))
+    prefix_bytes = np.frombuffer(prefix.encode('ascii'), dtype=np.uint8)
+    chars = np.empty((len(values), len(prefix_bytes) + width), dtype=np.uint8)
+    chars[:, :len(prefix_bytes)] = prefix_bytes
+
+    powers = np.uint64(base) ** np.arange(width - 1, -1, -1, dtype=np.uint64)
+    digits = (values[:, None] // powers) % np.uint64(base)
+    alphabet = _HEX_DIGITS if not lowercase else np.frombuffer(b'0123456789abcdef', dtype=np.uint8)
+    chars[:, len(prefix_bytes):] = alphabet[digits.astype(np.intp)]
+    return chars.view(f'S{chars.shape[1]}').ravel().astype(str)
+
+
+class IdMinter:
+    """Mints unique IDs for one prefix from a counter and an optional keyed permutation."""
+
+    def __init__(self, prefix, width=8, base=16, key=None, start=0, lowercase=False):
+        if base not in (10, 16):
+            raise ValueError("IdMinter supports base 10 or base 16 IDs")
+        self.prefix = prefix
+        self.width = width
+        self.base = base
+        self.lowercase = lowercase
+        self.counter = start
+        self.capacity = base ** width
+        self._rounds = self._round_constants(key, prefix) if key is not None else None
+        self._bits = max(1, (self.capacity - 1).bit_length())
+
+    @staticmethod
+    def _round_constants(key, prefix):
+        """Derives an (odd multiplier, addend) pair per round from the key; stable across processes."""
+        seed = hashlib.sha512(f"{key}|{prefix}".encode()).digest()
+        words = [int.from_bytes(seed[i:i + 8], 'little') for i in range(0, 8 * 2 * _PERMUTATION_ROUNDS, 8)]
+        return [(np.uint64(words[2 * r] | 1), np.uint64(words[2 * r + 1])) for r in range(_PERMUTATION_ROUNDS)]
+
+    def _permute_bits(self, x):
+        """Bijective mix of the low `_bits` bits: odd multiply/add then xor-shift, per round."""
+        mask = np.uint64((1 << self._bits) - 1)
+        shift = np.uint64(max(1, self._bits // 2))
+        for multiplier, addend in self._rounds:
+            x = (x * multiplier + addend) & mask
+            x ^= x >> shift
+        return x
+
+    def _permute(self, values):
+        """Keyed permutation of [0, capacity); cycle-walks values that land outside the ID space."""
+        out = self._permute_bits(values)
+        outside = out >= np.uint64(self.capacity)
+        while outside.any():
+            out[outside] = self._permute_bits(out[outside])
+            outside = out >= np.uint64(self.capacity)
+        return out
+
+    def mint(self, n):
+        """Returns the next n IDs as a numpy string array."""
+        n = max(0, int(n))
+        if self.counter + n > self.capacity:
+            raise ValueError(f"ID space for prefix '{self.prefix}' exhausted ({self.capacity} IDs); increase width")
+        values = np.arange(self.counter, self.counter + n, dtype=np.uint64)
+        self.counter += n
+        return self.ids_for(values)
+
+    def ids_for(self, values):
+        """IDs for already-minted counter values (e.g. to refer back to an earlier record) without advancing."""
+        values = np.asarray(values, dtype=np.uint64)
+        if self._rounds is not None:
+            values = self._permute(values)
+        return format_ids(self.prefix, values, self.width, base=self.base, lowercase=self.lowercase)
+
+
+class IdService:
+    """Registry of IdMinters, one per prefix, sharing a permutation key."""
+
+    def __init__(self, key=None):
+        self.key = key
+        self.minters = {}
+
+    def register(self, prefix, **minter_kwargs):
+        """Configures the ID format for a prefix (width, base, lowercase, start)."""
+        minter_kwargs.setdefault('key', self.key)
+        self.minters[prefix] = IdMinter(prefix, **minter_kwargs)
+        return self.minters[prefix]
+
+    def mint(self, prefix, n):
+        """Mints n IDs for a prefix, registering it with default settings on first use."""
+        if prefix not in self.minters:
+            self.register(prefix)
+        return self.minters[prefix].mint(n)
@@ -0,0 +1,262 @@
+# scripts/job_manager.py
+"""
+Background execution of generators for the Streamlit app.
+
+Generators run on a worker pool instead of the Streamlit script thread, so a
+session stays responsive while a multi-minute run is in progress. Each job
+records the progress events its generator streams (stage, rows generated,
+expected rows) and derives an ETA from them; a job can be cancelled while it
+is queued or running.
+
+One JobManager is shared by every session of the app process. It bounds the
+number of concurrent runs and the memory they are expected to need: a job is
+started only when a worker is free and its memory estimate (from the cost
+model) fits in what the running jobs leave of the budget; otherwise it waits in a FIFO queue. Jobs too
+large for the whole budget, or submitted when the queue is full, are rejected.
+Identical requests (same generator and parameters) made while a run is queued
+or in progress join that run and share its result. Previews (a small sample
+plus full-run estimates) are scheduled the same way with a small fixed
+reservation. Every successful run is recorded in the cost model, so its
+estimates keep calibrating against real runs.
+"""
+
+import itertools
+import os
+import threading
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+
+from .cost_model import CostModel
+from .script_runner import ScriptCancelled
+from .table_stats import table_stats
+
+# Job statuses
+QUEUED = 'queued'
+RUNNING = 'running'
+SUCCEEDED = 'succeeded'
+FAILED = 'failed'
+CANCELLED = 'cancelled'
+FINISHED_STATUSES = (SUCCEEDED, FAILED, CANCELLED)
+
+# Admission control
+DEFAULT_JOB_MEMORY_BYTES = 512 * 1024**2 # Assumed peak memory of a job whose generator has no row estimate
+PREVIEW_JOB_MEMORY_BYTES = 64 * 1024**2 # Reserved for a preview run
+MEMORY_BUDGET_FRACTION = 0.6 # Share of physical memory that running jobs may reserve
+FALLBACK_MEMORY_BUDGET_BYTES = 4 * 1024**3 # Budget when physical memory cannot be determined
+MAX_QUEUED_JOBS = 20 # Submissions beyond this many waiting jobs are rejected
+
+
+class AdmissionRejected(Exception):
+    """Raised when a job cannot be admitted: it needs more memory than the budget, or the queue is full."""
+
+
+def default_memory_budget():
+    """MEMORY_BUDGET_FRACTION of the host's physical memory, in bytes."""
+    try:
+        return int(os.sysconf('SC_PHYS_PAGES') * os.sysconf('SC_PAGE_SIZE') * MEMORY_BUDGET_FRACTION)
+    except (AttributeError, ValueError, OSError):
+        return FALLBACK_MEMORY_BUDGET_BYTES
+
+
+def estimate_memory_bytes(generator, cost_model, preview=False):
+    """Peak memory a generator's run is expected to need, from the cost model if the generator estimates its rows."""
+    if preview:
+        return PREVIEW_JOB_MEMORY_BYTES
+    if not hasattr(generator, 'estimate_rows'):
+        return DEFAULT_JOB_MEMORY_BYTES
+    return cost_model.estimate(generator)['peak_memory_bytes']
+
+
+def request_key(generator, preview=False):
+    """Identifies a generation request, so identical concurrent requests can share one run."""
+    params = getattr(generator, 'params', {})
+    return type(generator).__name__, preview, repr(sorted(params.items()))
+
+
+class Job:
+    """One generator run: its status, latest progress and, once finished, its result or error."""
+
+    def __init__(self, job_id, name, generator, memory_bytes, preview=False):
+        self.id = job_id
+        self.name = name
+        self.generator = generator
+        self.preview = preview
+        self.key = request_key(generator, preview)
+        self.memory_bytes = memory_bytes
+        self.status = QUEUED
+        self.stage = 'Queued'
+        self.rows = None
+        self.total_rows = None
+        self.submitted_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.result = None
+        self.table_stats = None # Rows, columns and memory per result table, measured once on success
+        self.error = None
+        self.error_traceback = None
+        self.subscribers = 1 # Sessions waiting for this job's result
+        self.cancel_event = threading.Event()
+        self._stage_started_at = None
+        self._lock = threading.Lock()
+
+    @property
+    def finished(self):
+        return self.status in FINISHED_STATUSES
+
+    def update_progress(self, event):
+        """Records a progress event ({'stage', 'rows', 'total_rows'}) streamed by the generator."""
+        with self._lock:
+            if event.get('stage') != self.stage:
+                self._stage_started_at = time.time()
+                self.stage = event.get('stage', self.stage)
+            self.rows = event.get('rows', self.rows)
+            self.total_rows = event.get('total_rows')
+
+    def elapsed_seconds(self):
+        """Seconds since the job started running (0 while queued)."""
+        if self.started_at is None:
+            return 0.0
+        return (self.finished_at or time.time()) - self.started_at
+
+    def progress_fraction(self):
+        """Fraction of the current stage's rows done, or None when the stage has no row total."""
+        with self._lock:
+            if not self.total_rows or self.rows is None:
+                return None
+            return min(self.rows / self.total_rows, 1.0)
+
+    def eta_seconds(self):
+        """Estimated seconds left in the current stage from its row rate so far, or None if unknown."""
+        fraction = self.progress_fraction()
+        if self.finished or not fraction or self._stage_started_at is None:
+            return None
+        stage_elapsed = time.time() - self._stage_started_at
+        return stage_elapsed * (1 - fraction) / fraction
+
+
+class JobManager:
+    """Schedules generator runs on a bounded worker pool within a memory budget and tracks their jobs by ID."""
+
+    def __init__(self, max_workers=2, memory_budget_bytes=None, max_queued_jobs=MAX_QUEUED_JOBS, cost_model=None):
+        self.max_workers = max_workers
+        self.cost_model = cost_model or CostModel()
+        self.memory_budget_bytes = memory_budget_bytes or default_memory_budget()
+        self.max_queued_jobs = max_queued_jobs
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='generator')
+        self.jobs = {}
+        self.pending = [] # Queued jobs in submission order
+        self.admitted = set() # IDs of jobs holding a worker and their memory reservation
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    @property
+    def reserved_memory_bytes(self):
+        return sum(self.jobs[job_id].memory_bytes for job_id in self.admitted)
+
+    def submit(self, name, generator, preview=False):
+        """
+        Queues generator.generate() (a preview if preview is set) and returns its Job immediately.
+
+        If an identical request is already queued or running, its Job is returned instead and the
+        caller shares that run. Raises AdmissionRejected when the job can never fit in the memory
+        budget or too many jobs are waiting.
+        """
+        key = request_key(generator, preview)
+        with self._lock:
+            for job in self.jobs.values():
+                if job.key == key and not job.finished and not job.cancel_event.is_set():
+                    job.subscribers += 1
+                    return job
+            memory_bytes = estimate_memory_bytes(generator, self.cost_model, preview)
+            if memory_bytes > self.memory_budget_bytes:
+                raise AdmissionRejected(
+                    f"{name} needs an estimated {memory_bytes / 1024**3:.1f} GB, more than the "
+                    f"{self.memory_budget_bytes / 1024**3:.1f} GB available for generation. Reduce the parameters.")
+            if len(self.pending) >= self.max_queued_jobs:
+                raise AdmissionRejected(f"{len(self.pending)} jobs are already waiting. Try again shortly.")
+            job = Job(f"job-{next(self._ids)}", name, generator, memory_bytes, preview)
+            self.jobs[job.id] = job
+            self.pending.append(job)
+            self._dispatch()
+        return job
+
+    def get(self, job_id):
+        """The Job with this ID, or None."""
+        return self.jobs.get(job_id)
+
+    def queue_position(self, job_id):
+        """Number of jobs ahead of a queued job (0 when it is next), or None if it is not waiting."""
+        with self._lock:
+            for position, job in enumerate(self.pending):
+                if job.id == job_id:
+                    return position
+        return None
+
+    def cancel(self, job_id):
+        """
+        Withdraws one session's interest in an unfinished job.
+
+        The job is stopped (its script terminated, or removed from the queue) only once no other
+        session sharing it is still waiting.
+        """
+        with self._lock:
+            job = self.jobs.get(job_id)
+            if job is None or job.finished:
+                return
+            job.subscribers -= 1
+            if job.subscribers > 0:
+                return
+            job.cancel_event.set()
+            if job in self.pending:
+                self.pending.remove(job)
+                job.status, job.stage, job.finished_at = CANCELLED, 'Cancelled', time.time()
+                self.jobs.pop(job.id, None)
+
+    def forget(self, job_id):
+        """Releases one session's hold on a finished job; the job and its result are dropped after the last."""
+        with self._lock:
+            job = self.jobs.get(job_id)
+            if job is None or not job.finished:
+                return
+            job.subscribers -= 1
+            if job.subscribers <= 0:
+                self.jobs.pop(job_id, None)
+
+    def _dispatch(self):
+        # Start waiting jobs in order while workers and memory allow; a large job at the head
+        # holds back smaller ones behind it so it cannot be starved. Called with the lock held.
+        while self.pending and len(self.admitted) < self.max_workers:
+            job = self.pending[0]
+            if self.admitted and self.reserved_memory_bytes + job.memory_bytes > self.memory_budget_bytes:
+                break
+            self.pending.pop(0)
+            self.admitted.add(job.id)
+            self.executor.submit(self._run, job)
+
+    def _run(self, job):
+        job.status, job.started_at = RUNNING, time.time()
+        job.update_progress({'stage': 'Starting'})
+        # The terminal status is published last, under the lock, so a session can only see the job
+        # finished (and forget it) once its worker has released the reservation
+        status, stage = FAILED, 'Failed'
+        try:
+            job.result = job.generator.generate(progress=job.update_progress, cancel_event=job.cancel_event,
+                                                preview=job.preview)
+            seconds = time.time() - job.started_at
+            job.update_progress({'stage': 'Measuring tables'})
+            job.table_stats = table_stats(job.result)
+            self.cost_model.record(job.generator, job.result, seconds, job.table_stats)
+            status, stage = SUCCEEDED, 'Done'
+        except ScriptCancelled:
+            status, stage = CANCELLED, 'Cancelled'
+        except Exception as e:
+            job.error, job.error_traceback = e, traceback.format_exc()
+        finally:
+            with self._lock:
+                job.finished_at = time.time()
+                job.status, job.stage = status, stage
+                self.admitted.discard(job.id)
+                if job.subscribers <= 0: # Every session withdrew while it ran
+                    self.jobs.pop(job.id, None)
+                self._dispatch()
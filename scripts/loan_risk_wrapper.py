@@ -1,14 +1,16 @@
-import subprocess
 import tempfile
 import os
 import pandas as pd
-import sys
 from datetime import datetime
+from .script_runner import run_script
+from .output_profile import OUTPUT_PROFILE_PARAMETER, apply_output_profile
+from .preview import capped, run_preview
 
 class LoanRiskGenerator:
     def __init__(self, **params):
         """Initialize the Loan & Risk Data Generator with parameters."""
         self.params = params
+        self.full_run_estimate = None  # Estimated full-run size per table, set by a preview run
     
     @staticmethod
     def get_config():
@@ -50,12 +52,42 @@ class LoanRiskGenerator:
                     'options': ['All Industries', 'Technology', 'Finance', 'Healthcare', 'Manufacturing', 'Energy', 'Retail', 'Logistics'],
                     'default_index': 0,
                     'help': 'Focus on specific industry or all industries'
-                }
-            }
+                },
+                'output_profile': OUTPUT_PROFILE_PARAMETER
+            },
+            'preview': 'Profiles, history and connections for up to 10 companies'
         }
     
-    def generate(self):
+    # Companies generated in a preview
+    PREVIEW_COMPANIES = 10
+    
+    def preview_params(self):
+        """Preview: the first PREVIEW_COMPANIES companies; every table grows with the number of companies."""
+        params = dict(self.params)
+        params['num_companies'], company_scale = capped(params.get('num_companies', 50), self.PREVIEW_COMPANIES)
+        scale = {'company_profiles': company_scale, 'historical_risk': company_scale,
+                 'network_connections': company_scale}
+        return params, scale
+    
+    # Rows per company: 12 monthly risk scores and 2-5 (mean 3.5) network connections
+    HISTORY_MONTHS = 12
+    MEAN_CONNECTIONS = 3.5
+    
+    def estimate_rows(self):
+        """Expected rows per table, all proportional to the number of companies."""
+        num_companies = self.params.get('num_companies', 50)
+        rows = {'company_profiles': num_companies}
+        if self.params.get('include_historical', True):
+            rows['historical_risk'] = num_companies * self.HISTORY_MONTHS
+        if self.params.get('include_network', True):
+            rows['network_connections'] = num_companies * self.MEAN_CONNECTIONS
+        return rows
+    
+    def generate(self, progress=None, cancel_event=None, preview=False):
         """Execute the original script and return generated DataFrames."""
+        if preview:
+            return run_preview(self, progress, cancel_event)
+        
         with tempfile.TemporaryDirectory() as temp_dir:
             # Copy the original script to temp directory
             script_path = os.path.join(os.path.dirname(__file__), 'LoanandRisk.py')
@@ -131,39 +163,33 @@ class LoanRiskGenerator:
             with open(temp_script_path, 'w') as f:
                 f.write(script_content)
             
-            # Change to temp directory and execute script
-            original_dir = os.getcwd()
-            try:
-                os.chdir(temp_dir)
-                
-                # Execute the script
-                result = subprocess.run(
-                    [sys.executable, 'LoanandRisk.py'],
-                    capture_output=True,
-                    text=True
-                )
-                
-                if result.returncode != 0:
-                    raise Exception(f"Script execution failed: {result.stderr}")
-                
-                # Read the generated CSV files
-                dataframes = {}
-                
-                # Always read company profiles
-                if os.path.exists('company_profiles.csv'):
-                    dataframes['company_profiles'] = pd.read_csv('company_profiles.csv')
-                
-                # Conditionally read other files
-                if self.params.get('include_historical', True) and os.path.exists('historical_risk.csv'):
-                    dataframes['historical_risk'] = pd.read_csv('historical_risk.csv')
-                
-                if self.params.get('include_network', True) and os.path.exists('network_connections.csv'):
-                    dataframes['network_connections'] = pd.read_csv('network_connections.csv')
-                
-                if not dataframes:
-                    raise Exception("No data files were generated")
-                
-                return dataframes
-                
-            finally:
-                os.chdir(original_dir)
\ No newline at end of file
+            # Execute the script in the temp directory
+            result = run_script(
+                ['LoanandRisk.py'],
+                cwd=temp_dir,
+                timeout=None,
+                progress=progress,
+                cancel_event=cancel_event
+            )
+            
+            if result.returncode != 0:
+                raise Exception(f"Script execution failed: {result.stderr}")
+            
+            # Read the generated CSV files
+            dataframes = {}
+            
+            # Always read company profiles
+            if os.path.exists(os.path.join(temp_dir, 'company_profiles.csv')):
+                dataframes['company_profiles'] = pd.read_csv(os.path.join(temp_dir, 'company_profiles.csv'))
+            
+            # Conditionally read other files
+            if self.params.get('include_historical', True) and os.path.exists(os.path.join(temp_dir, 'historical_risk.csv')):
+                dataframes['historical_risk'] = pd.read_csv(os.path.join(temp_dir, 'historical_risk.csv'))
+            
+            if self.params.get('include_network', True) and os.path.exists(os.path.join(temp_dir, 'network_connections.csv')):
+                dataframes['network_connections'] = pd.read_csv(os.path.join(temp_dir, 'network_connections.csv'))
+            
+            if not dataframes:
+                raise Exception("No data files were generated")
+            
+            return apply_output_profile(dataframes, self.params.get('output_profile', 'Compact'))
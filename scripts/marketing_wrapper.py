@@ -1,14 +1,19 @@
-import subprocess
+import json
+import math
 import tempfile
 import os
 import pandas as pd
-import sys
-from datetime import datetime
+from datetime import datetime, timedelta
+from .partitioned_writer import read_partitioned_csv
+from .script_runner import run_script, script_constants
+from .output_profile import OUTPUT_PROFILE_PARAMETER, apply_output_profile
+from .preview import date_window, run_preview
 
 class MarketingDataGenerator:
     def __init__(self, **params):
         """Initialize the Marketing Data Generator with parameters."""
         self.params = params
+        self.full_run_estimate = None  # Estimated full-run size per table, set by a preview run
     
     @staticmethod
     def get_config():
@@ -49,127 +54,187 @@ class MarketingDataGenerator:
                     'options': ['All Channels', 'Organic', 'Paid', 'Email', 'Social'],
                     'default_index': 0,
                     'help': 'Focus on specific marketing channels'
-                }
-            }
+                },
+                'include_rollups': {
+                    'type': 'boolean',
+                    'label': 'Include Rollup Tables',
+                    'default': False,
+                    'help': 'Also return pre-aggregated rollups (month/year by channel, region, content type, etc.) computed during generation'
+                },
+                'include_events': {
+                    'type': 'boolean',
+                    'label': 'Include Funnel Events',
+                    'default': False,
+                    'help': 'Also expand daily counts into individual click/lead/MQL/SQL/opportunity/win events (roughly one row per click)'
+                },
+                'output_profile': OUTPUT_PROFILE_PARAMETER
+            },
+            'preview': 'First 30 days of the date range for every channel and region'
         }
     
-    def generate(self):
-        """Execute the original script and return generated DataFrames."""
+    # Channel subsets for the 'channel_focus' option
+    CHANNEL_FOCUS = {
+        'Organic': ["Organic Search", "Referral", "Direct"],
+        'Paid': ["Paid Search", "Paid Social - ConnectSphere", "Paid Social - PixelVerse"],
+        'Email': ["Email Marketing"],
+        'Social': ["Paid Social - ConnectSphere", "Paid Social - PixelVerse"],
+    }
+    
+    def build_scenario(self):
+        """Scenario config passed to MarketingFunnelData.py --config; overrides only what the parameters set."""
+        scenario = {
+            'output_filename': 'marketing_funnel_data.csv',
+            'include_future_campaigns': self.params.get('include_future_campaigns', True),
+            'emit_rollups': self.params.get('include_rollups', False),
+            'emit_events': self.params.get('include_events', False),
+        }
+        
+        # Date range (the script stops *before* end_date)
+        if 'start_date' in self.params:
+            scenario['start_date'] = self.params['start_date'].strftime('%Y-%m-%d')
+        if 'end_date' in self.params:
+            scenario['end_date'] = self.params['end_date'].strftime('%Y-%m-%d')
+        
+        # Handle channel focus
+        channel_focus = self.params.get('channel_focus')
+        if channel_focus in self.CHANNEL_FOCUS:
+            scenario['channels'] = self.CHANNEL_FOCUS[channel_focus]
+        
+        return scenario
+    
+    def preview_params(self):
+        """Preview: the first PREVIEW_DAYS days of the date range; rollup tables keep their preview size."""
+        params = dict(self.params)
+        start_date = params.setdefault('start_date', datetime(2023, 1, 1))
+        params['end_date'], day_scale = date_window(start_date, params.get('end_date', datetime(2025, 12, 31)))
+        return params, {'marketing_funnel_data': day_scale, 'marketing_events': day_scale}
+    
+    # Funnel stages after the click, in order, as named in MarketingFunnelData.py's CONVERSION_RATES
+    FUNNEL_RATES = ['lead_from_click', 'mql_from_lead', 'sql_from_mql', 'opp_from_sql', 'win_from_opp']
+    
+    def channels(self):
+        """Channels the script generates: the channel focus subset or the script's full list."""
+        return self.CHANNEL_FOCUS.get(self.params.get('channel_focus'), script_constants('MarketingFunnelData.py')['CHANNELS'])
+    
+    def events_per_funnel_row(self):
+        """
+        Expected funnel events (clicks, leads, MQLs, SQLs, opportunities and wins) per (day, channel,
+        region) row, from MarketingFunnelData.py's base metrics, funnel rates, region factors, growth,
+        seasonality and dimension modifiers.
+        
+        Clicks scale with each row's impression and CTR multipliers and every later stage with another
+        power of its conversion multiplier; dimensions are drawn independently, so each expectation is
+        a product over dimensions. Campaigns, channel story lines and noise are left out.
+        """
+        constants = script_constants('MarketingFunnelData.py')
+        start_date = self.params.get('start_date', datetime(2023, 1, 1))
+        days = max((self.params.get('end_date', datetime(2025, 12, 31)) - start_date).days, 0)
+        if days == 0:
+            return 0.0
+        # Mean of the script's per-day global factor: growth trend x seasonality x weekend dip
+        global_factor = 0.0
+        for offset in range(days):
+            date = start_date + timedelta(days=offset)
+            seasonal = 1 + 0.15 * math.sin(2 * math.pi * (date.timetuple().tm_yday + 75) / 365.25)
+            weekly = {5: 0.85, 6: 0.80}.get(date.weekday(), 1.0)
+            global_factor += (1 + constants['GROWTH_RATE_PER_DAY']) ** offset * seasonal * weekly
+        global_factor /= days
+        regions = constants['REGIONS']
+        mean_region = sum(constants['REGION_FACTORS'].get(region, 1.0) for region in regions) / len(regions)
+        
+        rates = constants['CONVERSION_RATES']
+        stage_rates = [1.0] # Rate of each stage relative to clicks, before conversion multipliers
+        for name in self.FUNNEL_RATES:
+            stage_rates.append(stage_rates[-1] * rates[name])
+        
+        events = 0.0
+        for channel in self.channels():
+            base = constants['BASE_METRICS'][channel]
+            for stage, stage_rate in enumerate(stage_rates):
+                events += base['impressions'] * base['ctr'] * stage_rate * self.expected_modifier(constants, channel, stage)
+        return events / len(self.channels()) * global_factor * mean_region
+    
+    @staticmethod
+    def expected_modifier(constants, channel, stage):
+        """Mean of imp_mult * ctr_mult * conv_mult ** stage over a channel's dimension draws."""
+        expected = 1.0
+        for category, table in constants['DIMENSION_PROBS'].items():
+            # Same fallbacks as the script: 'default' probabilities, uniform if every weight is zero
+            probs = table.get(channel, table.get('default', next(iter(table.values()))))
+            weights = {value: max(0.0, p) for value, p in probs.items()}
+            if not sum(weights.values()):
+                weights = dict.fromkeys(probs, 1.0)
+            modifiers = constants['DIMENSION_MODIFIERS'][category]
+            expected *= sum(weight * modifiers.get(value, {}).get('imp_mult', 1.0) * modifiers.get(value, {}).get('ctr_mult', 1.0)
+                            * modifiers.get(value, {}).get('conv_mult', 1.0) ** stage
+                            for value, weight in weights.items()) / sum(weights.values())
+        return expected
+    
+    def estimate_rows(self):
+        """Expected rows per table: one funnel row per day, channel and region; events per funnel row."""
+        days = (self.params.get('end_date', datetime(2025, 12, 31)) - self.params.get('start_date', datetime(2023, 1, 1))).days
+        regions = script_constants('MarketingFunnelData.py')['REGIONS']
+        funnel_rows = max(days, 0) * len(self.channels()) * len(regions)
+        rows = {'marketing_funnel_data': funnel_rows}
+        if self.params.get('include_events', False):
+            rows['marketing_events'] = funnel_rows * self.events_per_funnel_row()
+        return rows
+    
+    def generate(self, progress=None, cancel_event=None, preview=False):
+        """Execute the original script with a scenario config and return generated DataFrames."""
+        if preview:
+            return run_preview(self, progress, cancel_event)
+        
         with tempfile.TemporaryDirectory() as temp_dir:
-            # Copy the original script to temp directory
-            script_path = os.path.join(os.path.dirname(__file__), 'MarketingFunnelData.py')
-            temp_script_path = os.path.join(temp_dir, 'MarketingFunnelData.py')
+            script_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'MarketingFunnelData.py')
             
-            # Read the original script
-            with open(script_path, 'r') as f:
-                script_content = f.read()
+            # Write the scenario config instead of editing the script source
+            config_path = os.path.join(temp_dir, 'scenario.json')
+            with open(config_path, 'w') as f:
+                json.dump(self.build_scenario(), f, indent=2)
             
-            # Modify configuration based on parameters
-            modifications = []
+            # Execute the script in the temp directory
+            result = run_script(
+                [script_path, '--config', config_path],
+                cwd=temp_dir,
+                timeout=None,
+                progress=progress,
+                cancel_event=cancel_event
+            )
             
-            # Modify date range if specified
-            if 'start_date' in self.params:
-                # Format date without leading zeros
-                start_date = self.params['start_date']
-                start_date_str = f"{start_date.year}, {start_date.month}, {start_date.day}"
-                modifications.append(
-                    ('START_DATE = TODAY - datetime.timedelta(days=3*365)',
-                     f'START_DATE = datetime.date({start_date_str})')
-                )
+            if result.returncode != 0:
+                raise Exception(f"Script execution failed: {result.stderr}")
             
-            if 'end_date' in self.params:
-                # Format date without leading zeros
-                end_date = self.params['end_date']
-                end_date_str = f"{end_date.year}, {end_date.month}, {end_date.day}"
-                modifications.append(
-                    ('END_DATE = TODAY + datetime.timedelta(days=1*365)',
-                     f'END_DATE = datetime.date({end_date_str})')
-                )
+            # Read the generated CSV file
+            csv_path = os.path.join(temp_dir, 'marketing_funnel_data.csv')
             
-            # Handle channel focus
-            if self.params.get('channel_focus') and self.params['channel_focus'] != 'All Channels':
-                channel_focus = self.params['channel_focus']
-                if channel_focus == 'Organic':
-                    new_channels = ["Organic Search", "Referral", "Direct"]
-                elif channel_focus == 'Paid':
-                    new_channels = ["Paid Search", "Paid Social - ConnectSphere", "Paid Social - PixelVerse"]
-                elif channel_focus == 'Email':
-                    new_channels = ["Email Marketing"]
-                elif channel_focus == 'Social':
-                    new_channels = ["Paid Social - ConnectSphere", "Paid Social - PixelVerse"]
-                
-                channels_str = str(new_channels)
-                modifications.append(
-                    ('CHANNELS = ["Organic Search", "Paid Search", "Paid Social - ConnectSphere", "Paid Social - PixelVerse", "Email Marketing", "Referral", "Direct", "AI ContentSynergy"]',
-                     f'CHANNELS = {channels_str}')
-                )
+            if not os.path.exists(csv_path):
+                raise Exception("CSV file was not generated")
             
-            # Filter out future campaigns if requested
-            if not self.params.get('include_future_campaigns', True):
-                modifications.append(
-                    ('# --- Future Campaigns ---',
-                     '# --- Future Campaigns --- (Disabled)\n    """\n')
-                )
-                # Find and comment out future campaigns
-                future_campaign_start = script_content.find('# --- Future Campaigns ---')
-                if future_campaign_start != -1:
-                    future_campaign_end = script_content.find(']', future_campaign_start)
-                    if future_campaign_end != -1:
-                        # Comment out the future campaigns section
-                        before = script_content[:future_campaign_start]
-                        future_section = script_content[future_campaign_start:future_campaign_end]
-                        after = script_content[future_campaign_end:]
-                        
-                        # Comment out the future campaigns
-                        commented_section = '\n'.join(['    # ' + line for line in future_section.split('\n')])
-                        script_content = before + commented_section + '\n    # End commented section\n' + after
+            # Read the CSV
+            df = pd.read_csv(csv_path)
             
-            # Apply modifications
-            for old_text, new_text in modifications:
-                script_content = script_content.replace(old_text, new_text)
+            # Convert date column to datetime if it exists
+            if 'Date' in df.columns:
+                df['Date'] = pd.to_datetime(df['Date'])
             
-            # Change output filename
-            script_content = script_content.replace(
-                'OUTPUT_FILENAME = "marketing_funnel_data_v3.csv"',
-                'OUTPUT_FILENAME = "marketing_funnel_data.csv"'
-            )
+            dataframes = {
+                'marketing_funnel_data': df
+            }
+            
+            # Read funnel events if they were emitted
+            # Partitions are in date order, so sorting each one as it is read orders the whole table
+            events_df = read_partitioned_csv(os.path.join(temp_dir, 'events'), sort_by='EventTimestamp',
+                                             dtype={'ParentEventID': str}, parse_dates=['EventTimestamp'])
+            if not events_df.empty:
+                dataframes['marketing_events'] = events_df
             
-            # Write modified script
-            with open(temp_script_path, 'w') as f:
-                f.write(script_content)
+            # Read rollup tables if they were emitted
+            rollup_dir = os.path.join(temp_dir, 'rollups')
+            if os.path.isdir(rollup_dir):
+                for rollup_file in sorted(os.listdir(rollup_dir)):
+                    if rollup_file.endswith('.csv'):
+                        rollup_name = os.path.splitext(rollup_file)[0]
+                        dataframes[f'rollup_{rollup_name}'] = pd.read_csv(os.path.join(rollup_dir, rollup_file))
             
-            # Change to temp directory and execute script
-            original_dir = os.getcwd()
-            try:
-                os.chdir(temp_dir)
-                
-                # Execute the script
-                result = subprocess.run(
-                    [sys.executable, 'MarketingFunnelData.py'],
-                    capture_output=True,
-                    text=True
-                )
-                
-                if result.returncode != 0:
-                    raise Exception(f"Script execution failed: {result.stderr}")
-                
-                # Read the generated CSV file
-                csv_path = os.path.join(temp_dir, 'marketing_funnel_data.csv')
-                
-                if not os.path.exists(csv_path):
-                    raise Exception("CSV file was not generated")
-                
-                # Read the CSV
-                df = pd.read_csv(csv_path)
-                
-                # Convert date column to datetime if it exists
-                if 'Date' in df.columns:
-                    df['Date'] = pd.to_datetime(df['Date'])
-                
-                # Return as a dictionary with a single DataFrame
-                return {
-                    'marketing_funnel_data': df
-                }
-                
-            finally:
-                os.chdir(original_dir)
\ No newline at end of file
+            return apply_output_profile(dataframes, self.params.get('output_profile', 'Compact'))
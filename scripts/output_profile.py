@@ -0,0 +1,89 @@
+# scripts/output_profile.py
+"""
+Output dtype profiles applied to every generator's tables before they are returned.
+
+The scripts hand their tables over as CSV, so they come back as int64, float64 and
+object strings. The 'Compact' profile stores them in the smallest dtypes that hold
+the same values:
+
+- low-cardinality string columns (states, statuses, channels, divisions, ...) as categoricals;
+- integers in the narrowest signed width (0-100 risk scores become int8);
+- floats as float32 when every value round-trips at its decimal precision (amounts in cents);
+- ISO date/timestamp strings and Python date objects as datetime64.
+
+Every later step (previews, table statistics, the cost model and exports) sees the
+same dtypes. 'Standard' leaves the tables as read.
+"""
+
+import datetime
+import re
+
+import numpy as np
+import pandas as pd
+
+OUTPUT_PROFILES = ['Compact', 'Standard']
+MAX_CATEGORY_RATIO = 0.5 # String columns with at most this share of distinct values become categoricals
+FLOAT32_MAX_DECIMALS = 4 # Floats with more decimals than this stay float64
+DATE_SAMPLE_SIZE = 1000 # Values checked before attempting to parse a string column as dates
+ISO_DATE_PATTERN = re.compile(r'^\d{4}-\d{2}-\d{2}([ T]\d{2}:\d{2}(:\d{2}(\.\d+)?)?)?$')
+
+# Shared 'output_profile' entry for the wrappers' get_config() parameters
+OUTPUT_PROFILE_PARAMETER = {
+    'type': 'select',
+    'label': 'Output Profile',
+    'options': OUTPUT_PROFILES,
+    'default_index': 0,
+    'help': 'Compact stores categories, narrow integers, float32 and datetimes (several times less memory); '
+            'Standard keeps int64, float64 and plain strings'
+}
+
+
+def float32_safe(values):
+    """True if every finite value survives a float32 round trip at its decimal precision."""
+    finite = values[np.isfinite(values)]
+    round_trip = finite.astype(np.float32).astype(np.float64)
+    for decimals in range(FLOAT32_MAX_DECIMALS + 1):
+        if np.array_equal(np.round(finite, decimals), finite):
+            return np.array_equal(np.round(round_trip, decimals), finite)
+    return False
+
+
+def looks_like_dates(column):
+    """True if a sample of an object column's values are all ISO date strings or date objects."""
+    sample = column.dropna().iloc[:DATE_SAMPLE_SIZE]
+    if sample.empty:
+        return False
+    if all(isinstance(value, datetime.date) for value in sample):
+        return True
+    return all(isinstance(value, str) and ISO_DATE_PATTERN.match(value) for value in sample)
+
+
+def compact_column(column):
+    """The column in the smallest dtype that holds the same values."""
+    if pd.api.types.is_bool_dtype(column) or isinstance(column.dtype, pd.CategoricalDtype):
+        return column
+    if pd.api.types.is_integer_dtype(column):
+        return pd.to_numeric(column, downcast='integer')
+    if pd.api.types.is_float_dtype(column):
+        values = column.to_numpy(dtype=np.float64)
+        if column.dtype != np.float32 and float32_safe(values):
+            return column.astype(np.float32)
+        return column
+    if pd.api.types.is_object_dtype(column) or pd.api.types.is_string_dtype(column):
+        if looks_like_dates(column):
+            parsed = pd.to_datetime(column, format='ISO8601', errors='coerce')
+            if parsed.notna().sum() == column.notna().sum():
+                return parsed
+        if len(column) and column.nunique(dropna=True) <= MAX_CATEGORY_RATIO * len(column):
+            return column.astype('category')
+    return column
+
+
+def apply_output_profile(frames, profile='Compact'):
+    """Applies an output profile to a dict of DataFrames and returns it."""
+    if profile not in OUTPUT_PROFILES:
+        raise ValueError(f"Unknown output profile '{profile}'. Use one of {OUTPUT_PROFILES}")
+    if profile == 'Standard':
+        return frames
+    return {name: pd.DataFrame({column: compact_column(df[column]) for column in df.columns}, index=df.index)
+            for name, df in frames.items()}
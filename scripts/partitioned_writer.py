@@ -0,0 +1,91 @@
+# scripts/partitioned_writer.py
+"""
+Date-partitioned CSV output for large generated tables.
+
+Rows are appended to ``<base_dir>/<partition_name>=<value>/part-00000.csv`` as
+they are produced, so a table never has to be held in memory or sorted globally.
+"""
+
+import glob
+import os
+
+import numpy as np
+import pandas as pd
+
+# Partition frequency -> (numpy datetime unit, default partition directory name)
+PARTITION_UNITS = {
+    'D': ('datetime64[D]', 'date'),
+    'M': ('datetime64[M]', 'month'),
+    'Y': ('datetime64[Y]', 'year'),
+}
+
+
+class PartitionedCsvWriter:
+    """Appends DataFrame chunks to one CSV file per date partition."""
+
+    def __init__(self, base_dir, partition_column, freq='D', partition_name=None, date_format=None):
+        if freq not in PARTITION_UNITS:
+            raise ValueError(f"Unsupported partition frequency '{freq}'. Use one of {list(PARTITION_UNITS)}")
+        self.base_dir = base_dir
+        self.partition_column = partition_column
+        self.freq = freq
+        self.partition_name = partition_name or PARTITION_UNITS[freq][1]
+        self.date_format = date_format
+        self.rows_written = 0
+        self.partition_rows = {}  # partition value -> rows written
+        os.makedirs(base_dir, exist_ok=True)
+
+    def partition_path(self, value):
+        """Path of the CSV file holding a partition value (e.g. '2024-05')."""
+        return os.path.join(self.base_dir, f"{self.partition_name}={value}", 'part-00000.csv')
+
+    def write(self, df):
+        """Split a chunk by partition and append each piece to its partition file."""
+        if df.empty:
+            return
+        unit = PARTITION_UNITS[self.freq][0]
+        keys = df[self.partition_column].values.astype(unit)
+        unique_keys, inverse = np.unique(keys, return_inverse=True)
+        order = np.argsort(inverse, kind='stable')
+        bounds = np.searchsorted(inverse[order], np.arange(len(unique_keys) + 1))
+
+        for i, key in enumerate(np.datetime_as_string(unique_keys)):
+            part = df.iloc[order[bounds[i]:bounds[i + 1]]]
+            path = self.partition_path(key)
+            is_new = key not in self.partition_rows
+            if is_new:
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+            part.to_csv(path, mode='w' if is_new else 'a', header=is_new, index=False,
+                        date_format=self.date_format)
+            self.partition_rows[key] = self.partition_rows.get(key, 0) + len(part)
+            self.rows_written += len(part)
+
+    def sort_partitions(self, by=None):
+        """Sort each partition file in place, one partition in memory at a time."""
+        by = by or self.partition_column
+        for key in sorted(self.partition_rows):
+            path = self.partition_path(key)
+            part = pd.read_csv(path, parse_dates=[self.partition_column])
+            part.sort_values(by=by, kind='stable').to_csv(path, index=False, date_format=self.date_format)
+
+
+def list_partitions(base_dir):
+    """Return partition file paths under base_dir in partition order."""
+    return sorted(glob.glob(os.path.join(base_dir, '*=*', 'part-*.csv')))
+
+
+def read_partitioned_csv(base_dir, sort_by=None, **read_csv_kwargs):
+    """
+    Load all partitions of a table written by PartitionedCsvWriter into one DataFrame.
+
+    Partitions are concatenated in partition (date) order; with sort_by, each partition is sorted
+    by that column as it is read, so the whole table is ordered without a global sort.
+    """
+    paths = list_partitions(base_dir)
+    if not paths:
+        return pd.DataFrame()
+    parts = []
+    for path in paths:
+        part = pd.read_csv(path, **read_csv_kwargs)
+        parts.append(part.sort_values(sort_by, kind='stable') if sort_by else part)
+    return pd.concat(parts, ignore_index=True)
@@ -0,0 +1,65 @@
+# scripts/preview.py
+"""
+Fast previews of a generator's output before committing to a full run.
+
+A preview runs the same generator with reduced parameters: the first
+PREVIEW_DAYS days of a date range, or a capped entity/row count whose records
+are still drawn from the full run's distributions. Each wrapper's
+preview_params() returns those parameters with a scale factor per table (full
+run size / preview size). The full run's row counts and in-memory bytes are then
+extrapolated from the preview tables.
+"""
+
+from datetime import timedelta
+
+import pandas as pd
+
+PREVIEW_DAYS = 30 # Days generated when a preview covers the start of a date range
+PREVIEW_MAX_ROWS = 5000 # Cap on row-count parameters (transactions, filings) in a preview
+PREVIEW_MAX_ENTITIES = 1000 # Cap on entity-count parameters (cardholders, locations) in a preview
+
+
+def capped(value, cap):
+    """(preview value, scale factor) for a count parameter capped for the preview."""
+    preview_value = min(value, cap)
+    return preview_value, value / preview_value if preview_value else 1.0
+
+
+def date_window(start_date, end_date, days=PREVIEW_DAYS):
+    """(preview end date, scale factor) for a preview covering the first `days` days of start..end."""
+    full_days = max((end_date - start_date).days, 1)
+    preview_days = min(days, full_days)
+    return start_date + timedelta(days=preview_days), full_days / preview_days
+
+
+def estimate_full_run(frames, scale):
+    """
+    Estimated full-run size of each preview table.
+
+    scale maps table names to the factor their row count grows by in the full run; tables not
+    listed keep their preview size. Bytes assume the full table keeps the preview's bytes per row.
+    """
+    rows = []
+    for name, df in frames.items():
+        factor = scale.get(name, 1.0)
+        preview_bytes = int(df.memory_usage(deep=True).sum())
+        estimated_rows = int(round(len(df) * factor))
+        rows.append({
+            'Table': name,
+            'PreviewRows': len(df),
+            'EstimatedRows': estimated_rows,
+            'EstimatedBytes': int(preview_bytes / len(df) * estimated_rows) if len(df) else 0,
+        })
+    return pd.DataFrame(rows, columns=['Table', 'PreviewRows', 'EstimatedRows', 'EstimatedBytes'])
+
+
+def run_preview(generator, progress=None, cancel_event=None):
+    """
+    Generates a generator's preview sample and returns its DataFrames.
+
+    The estimated full-run size per table is stored on generator.full_run_estimate.
+    """
+    preview_params, scale = generator.preview_params()
+    frames = type(generator)(**preview_params).generate(progress=progress, cancel_event=cancel_event)
+    generator.full_run_estimate = estimate_full_run(frames, scale)
+    return frames
@@ -0,0 +1,33 @@
+# scripts/progress.py
+"""
+Progress events printed by the generator scripts for the wrappers to stream.
+
+Each event is one stdout line: PROGRESS_PREFIX followed by a JSON object with
+the current stage and, when known, the rows generated so far and the rows
+expected in that stage. Scripts call report_progress; the runner parses the
+lines back with parse_progress while the script is still running.
+"""
+
+import json
+
+PROGRESS_PREFIX = "@@progress "
+
+
+def report_progress(stage, rows=None, total_rows=None):
+    """Prints a progress event and flushes it so the wrapper sees it immediately."""
+    event = {'stage': stage}
+    if rows is not None:
+        event['rows'] = int(rows)
+    if total_rows is not None:
+        event['total_rows'] = int(total_rows)
+    print(PROGRESS_PREFIX + json.dumps(event), flush=True)
+
+
+def parse_progress(line):
+    """The event dict for a progress line, or None for ordinary output."""
+    if not line.startswith(PROGRESS_PREFIX):
+        return None
+    try:
+        return json.loads(line[len(PROGRESS_PREFIX):])
+    except ValueError:
+        return None
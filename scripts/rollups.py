@@ -0,0 +1,83 @@
+# scripts/rollups.py
+"""
+Incremental rollup aggregation shared by the generator scripts.
+
+Rows are added block by block as integer dimension codes plus measure arrays,
+and each rollup keeps dense sum arrays indexed by the combined codes
+(np.bincount), so aggregates are exact and never need a second pass over the
+detailed table.
+"""
+
+import os
+
+import numpy as np
+import pandas as pd
+
+
+class RollupAccumulator:
+    """Running sums of measures over one combination of dimensions."""
+
+    def __init__(self, name, dimensions, measures):
+        self.name = name
+        self.columns = [column for column, _ in dimensions]
+        self.labels = [np.asarray(labels) for _, labels in dimensions]
+        self.shape = tuple(len(labels) for labels in self.labels)
+        self.measures = list(measures)
+        size = int(np.prod(self.shape)) if self.shape else 1
+        self.row_counts = np.zeros(size, dtype=np.int64)
+        self.sums = {measure: np.zeros(size) for measure in self.measures}
+        self.integer_measures = set()
+
+    def add(self, codes, values):
+        """Adds a block of rows given {dimension: int codes} and {measure: values} arrays of equal length."""
+        n = len(next(iter(values.values()))) if values else 0
+        if n == 0:
+            return
+        if self.columns:
+            flat = np.ravel_multi_index([np.asarray(codes[column]) for column in self.columns], self.shape)
+        else:
+            flat = np.zeros(n, dtype=np.intp)
+        self.row_counts += np.bincount(flat, minlength=len(self.row_counts))
+        for measure in self.measures:
+            measure_values = np.asarray(values[measure])
+            if np.issubdtype(measure_values.dtype, np.integer):
+                self.integer_measures.add(measure)
+            self.sums[measure] += np.bincount(flat, weights=measure_values, minlength=len(self.row_counts))
+
+    def to_frame(self):
+        """Non-empty cells as a DataFrame: dimension labels, summed measures and a Rows count."""
+        filled = np.flatnonzero(self.row_counts)
+        frame = pd.DataFrame({
+            column: labels[cell_codes]
+            for column, labels, cell_codes in zip(self.columns, self.labels, np.unravel_index(filled, self.shape))
+        })
+        for measure in self.measures:
+            totals = self.sums[measure][filled]
+            frame[measure] = np.round(totals).astype(np.int64) if measure in self.integer_measures else np.round(totals, 2)
+        frame['Rows'] = self.row_counts[filled]
+        return frame
+
+
+class RollupCube:
+    """A set of named rollups over shared dimension label tables, updated together."""
+
+    def __init__(self, rollup_specs, dimension_labels, measures):
+        self.rollups = {
+            name: RollupAccumulator(name, [(column, dimension_labels[column]) for column in columns], measures)
+            for name, columns in rollup_specs.items()
+        }
+
+    def add(self, codes, values):
+        """Adds a block of rows to every rollup."""
+        for rollup in self.rollups.values():
+            rollup.add(codes, values)
+
+    def frames(self):
+        """All rollups as {name: DataFrame}."""
+        return {name: rollup.to_frame() for name, rollup in self.rollups.items()}
+
+    def write_csv(self, output_dir):
+        """Writes each rollup to <output_dir>/<name>.csv."""
+        os.makedirs(output_dir, exist_ok=True)
+        for name, frame in self.frames().items():
+            frame.to_csv(os.path.join(output_dir, f"{name}.csv"), index=False)
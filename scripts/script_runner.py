@@ -0,0 +1,100 @@
+# scripts/script_runner.py
+"""
+Helpers shared by the wrappers for running generator scripts as subprocesses.
+"""
+
+import ast
+import functools
+import os
+import subprocess
+import sys
+import threading
+import time
+
+from .progress import parse_progress
+
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+POLL_INTERVAL_SECONDS = 0.2 # How often a running script is checked for cancellation and timeout
+
+
+class ScriptCancelled(Exception):
+    """Raised when a generator script is stopped through its cancel event."""
+
+
+def script_env():
+    """Environment for generator subprocesses so copied scripts can import the shared helper modules."""
+    env = dict(os.environ)
+    existing = env.get('PYTHONPATH')
+    env['PYTHONPATH'] = SCRIPTS_DIR + (os.pathsep + existing if existing else '')
+    env['PYTHONUNBUFFERED'] = '1'
+    return env
+
+
+@functools.lru_cache(maxsize=None)
+def script_constants(script_name):
+    """
+    The literal module-level constants (numbers, strings, lists and dicts of them) of a generator script.
+
+    The script is parsed, not run, so wrappers can read its catalogue without importing its dependencies.
+    """
+    with open(os.path.join(SCRIPTS_DIR, script_name)) as f:
+        tree = ast.parse(f.read())
+    constants = {}
+    for node in tree.body:
+        if isinstance(node, ast.Assign) and len(node.targets) == 1 and isinstance(node.targets[0], ast.Name):
+            try:
+                constants[node.targets[0].id] = ast.literal_eval(node.value)
+            except (ValueError, TypeError):
+                pass # Computed from other names, e.g. dates
+    return constants
+
+
+def run_script(args, cwd=None, timeout=300, progress=None, cancel_event=None):
+    """
+    Runs a generator script, streaming its output instead of buffering it until exit.
+
+    args are appended to the Python interpreter, e.g. ['TaxData.py'], and the script runs in cwd; the
+    caller's working directory is never changed, so scripts can run from several threads at once.
+    Progress events printed by the script are passed to progress(event) as they arrive. Setting
+    cancel_event terminates the script and raises ScriptCancelled; exceeding timeout raises
+    subprocess.TimeoutExpired as subprocess.run would. Returns a subprocess.CompletedProcess with
+    the captured stdout and stderr.
+    """
+    process = subprocess.Popen([sys.executable] + list(args), stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                               text=True, bufsize=1, cwd=cwd, env=script_env())
+    stdout_lines, stderr_lines = [], []
+
+    def read_stdout():
+        for line in process.stdout:
+            event = parse_progress(line)
+            if event is None:
+                stdout_lines.append(line)
+            elif progress is not None:
+                progress(event)
+
+    def read_stderr():
+        stderr_lines.extend(process.stderr)
+
+    readers = [threading.Thread(target=read_stdout, daemon=True), threading.Thread(target=read_stderr, daemon=True)]
+    for reader in readers:
+        reader.start()
+
+    started = time.monotonic()
+    try:
+        while True:
+            try:
+                process.wait(timeout=POLL_INTERVAL_SECONDS)
+                break
+            except subprocess.TimeoutExpired:
+                pass
+            if cancel_event is not None and cancel_event.is_set():
+                raise ScriptCancelled("Generation was cancelled")
+            if timeout is not None and time.monotonic() - started > timeout:
+                raise subprocess.TimeoutExpired(process.args, timeout)
+    finally:
+        if process.poll() is None:
+            process.kill()
+            process.wait()
+        for reader in readers:
+            reader.join()
+    return subprocess.CompletedProcess(process.args, process.returncode, ''.join(stdout_lines), ''.join(stderr_lines))
@@ -0,0 +1,21 @@
+# scripts/table_stats.py
+"""
+Size statistics of generated tables, computed once when a run finishes.
+
+A deep memory figure walks every Python string in object columns, which takes
+seconds on multi-million-row tables, so the results panel reads these cached
+numbers instead of measuring on every Streamlit rerun. Arrow-backed columns
+report their buffer sizes, which is cheap.
+"""
+
+
+def table_stats(frames):
+    """{table name: {'rows', 'columns', 'memory_bytes'}} for a dict of DataFrames."""
+    return {
+        name: {
+            'rows': len(df),
+            'columns': len(df.columns),
+            'memory_bytes': int(df.memory_usage(deep=True).sum()),
+        }
+        for name, df in frames.items()
+    }
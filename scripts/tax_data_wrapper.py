@@ -2,13 +2,16 @@ import subprocess
 import tempfile
 import os
 import pandas as pd
-import sys
-from datetime import datetime
+from datetime import date, datetime
+from .script_runner import run_script
+from .output_profile import OUTPUT_PROFILE_PARAMETER, apply_output_profile
+from .preview import PREVIEW_MAX_ENTITIES, PREVIEW_MAX_ROWS, capped, run_preview
 
 class TaxDataGenerator:
     def __init__(self, **params):
         """Initialize the Tax Data Generator with parameters."""
         self.params = params
+        self.full_run_estimate = None  # Estimated full-run size per table, set by a preview run
     
     @staticmethod
     def get_config():
@@ -21,7 +24,7 @@ class TaxDataGenerator:
                     'type': 'number',
                     'label': 'Number of Locations',
                     'min': 50,
-                    'max': 500,
+                    'max': 100000,
                     'default': 150,
                     'help': 'Number of tax service locations to generate'
                 },
@@ -29,7 +32,7 @@ class TaxDataGenerator:
                     'type': 'number',
                     'label': 'Number of Filings',
                     'min': 1000,
-                    'max': 200000,
+                    'max': 5000000,
                     'default': 50000,
                     'help': 'Total number of tax filings to generate'
                 },
@@ -66,13 +69,69 @@ class TaxDataGenerator:
                     'min': 20,
                     'max': 80,
                     'default': 50,
-                    'help': 'Approximate percentage of returning customers'
-                }
-            }
+                    'help': 'Year-over-year taxpayer retention; also the approximate percentage of returning customers each year'
+                },
+                'daily_volumes_only': {
+                    'type': 'boolean',
+                    'label': 'Daily Volumes Only',
+                    'default': False,
+                    'help': 'Only generate per-day filing counts from the filing season curve, without individual filings'
+                },
+                'output_profile': OUTPUT_PROFILE_PARAMETER
+            },
+            'preview': 'Up to 5,000 filings across every tax year, from up to 1,000 locations'
         }
     
-    def generate(self):
+    def preview_params(self):
+        """Preview: at most PREVIEW_MAX_ROWS filings from at most PREVIEW_MAX_ENTITIES locations, across every tax year."""
+        params = dict(self.params)
+        params['num_filings'], filing_scale = capped(params.get('num_filings', 50000), PREVIEW_MAX_ROWS)
+        params['num_locations'], location_scale = capped(params.get('num_locations', 150), PREVIEW_MAX_ENTITIES)
+        # Taxpayers are drawn per filing; daily volumes have one row per day either way
+        scale = {'locations': location_scale, 'taxpayers': filing_scale, 'filings': filing_scale}
+        return params, scale
+    
+    # Tax years generated for each 'tax_years' option
+    TAX_YEARS_OPTIONS = {
+        '2022-2024': [2022, 2023, 2024],
+        '2021-2023': [2021, 2022, 2023],
+        '2023-2025': [2023, 2024, 2025],
+        '2022-2025': [2022, 2023, 2024, 2025],
+    }
+    
+    def filing_season_days(self):
+        """
+        Filing season days per tax year generated, as in TaxData.py: January 1 to April 15 of the
+        following year, cut off at the current date; years whose season has not started are left out.
+        """
+        current_date = self.params.get('current_date', datetime(2025, 4, 1))
+        current_date = date(current_date.year, current_date.month, current_date.day) # The UI passes dates, scripts datetimes
+        season_days = {}
+        for year in self.TAX_YEARS_OPTIONS.get(self.params.get('tax_years'), self.TAX_YEARS_OPTIONS['2022-2024']):
+            season_start = date(year + 1, 1, 1)
+            if season_start <= current_date:
+                season_days[year] = (min(date(year + 1, 4, 15), current_date) - season_start).days + 1
+        return season_days
+    
+    def estimate_rows(self):
+        """Expected rows per table: filings as requested, taxpayers net of those returning in later years."""
+        season_days = self.filing_season_days()
+        rows = {'daily_filing_volumes': sum(season_days.values())}
+        if self.params.get('daily_volumes_only', False) or not season_days:
+            return rows
+        num_filings = self.params.get('num_filings', 50000)
+        retention = self.params.get('customer_type_ratio', 50) / 100.0
+        num_years = len(season_days)
+        rows['locations'] = self.params.get('num_locations', 150)
+        rows['taxpayers'] = num_filings * (1 - retention * (num_years - 1) / num_years)
+        rows['filings'] = num_filings
+        return rows
+    
+    def generate(self, progress=None, cancel_event=None, preview=False):
         """Execute the original script and return generated DataFrames."""
+        if preview:
+            return run_preview(self, progress, cancel_event)
+        
         with tempfile.TemporaryDirectory() as temp_dir:
             # Copy the original script to temp directory
             script_path = os.path.join(os.path.dirname(__file__), 'TaxData.py')
@@ -112,15 +171,7 @@ class TaxDataGenerator:
             
             # Modify tax years
             if self.params.get('tax_years'):
-                tax_years_range = self.params['tax_years']
-                if tax_years_range == '2022-2024':
-                    tax_years_list = '[2022, 2023, 2024]'
-                elif tax_years_range == '2021-2023':
-                    tax_years_list = '[2021, 2022, 2023]'
-                elif tax_years_range == '2023-2025':
-                    tax_years_list = '[2023, 2024, 2025]'
-                elif tax_years_range == '2022-2025':
-                    tax_years_list = '[2022, 2023, 2024, 2025]'
+                tax_years_list = self.TAX_YEARS_OPTIONS[self.params['tax_years']]
                 
                 modifications.append(
                     ('TAX_YEARS = [2022, 2023, 2024]',
@@ -130,89 +181,44 @@ class TaxDataGenerator:
             # Filter by region if specified
             if self.params.get('region_focus') and self.params['region_focus'] != 'All Regions':
                 region_focus = self.params['region_focus']
-                
-                # Filter states by region
-                region_states = {
-                    'Northeast': "['CT', 'ME', 'MA', 'NH', 'NJ', 'NY', 'PA', 'RI', 'VT']",
-                    'South': "['DE', 'FL', 'GA', 'MD', 'NC', 'SC', 'VA', 'WV', 'AL', 'KY', 'MS', 'TN', 'AR', 'LA', 'OK', 'TX']",
-                    'Midwest': "['IL', 'IN', 'IA', 'KS', 'MI', 'MN', 'MO', 'NE', 'ND', 'OH', 'SD', 'WI']",
-                    'West': "['ID', 'MT', 'WY', 'CO', 'NM', 'AZ', 'UT', 'NV', 'CA', 'OR', 'WA']"
-                }
-                
-                if region_focus in region_states:
-                    # Add code to filter states after the states list is created
-                    filter_code = f"""
-# Filter states by region focus
-states = {region_states[region_focus]}
-# Update states_cities to only include selected states
-filtered_states_cities = {{}}
-for state in states:
-    if state in states_cities:
-        filtered_states_cities[state] = states_cities[state]
-states_cities = filtered_states_cities
-"""
-                    script_content = script_content.replace(
-                        'states = list(states_cities.keys())',
-                        f'states = list(states_cities.keys())\n{filter_code}'
-                    )
+                modifications.append(
+                    ('REGION_FOCUS = None',
+                     f'REGION_FOCUS = {region_focus!r}')
+                )
             
             # Modify complexity bias
             if self.params.get('complexity_bias'):
                 complexity_bias = self.params['complexity_bias']
                 if complexity_bias == 'More Simple':
-                    # Adjust AGI distribution to favor lower incomes
-                    modifications.append(
-                        ('agi = max(1000, round(np.random.lognormal(mean=10.5, sigma=0.6), -2))',
-                         'agi = max(1000, round(np.random.lognormal(mean=9.8, sigma=0.5), -2))')
-                    )
-                    # Adjust Schedule C probability
-                    modifications.append(
-                        ('schedule_c_prob = 0.1 + (0.2 if 20000 < agi < 100000 else 0)',
-                         'schedule_c_prob = 0.05 + (0.1 if 20000 < agi < 100000 else 0)')
-                    )
+                    # Adjust AGI distribution to favor lower incomes and lower Schedule C probability
+                    agi_mean, agi_sigma, schedule_c_base, schedule_c_bonus = 9.8, 0.5, 0.05, 0.1
                 elif complexity_bias == 'More Complex':
-                    # Adjust AGI distribution to favor higher incomes
-                    modifications.append(
-                        ('agi = max(1000, round(np.random.lognormal(mean=10.5, sigma=0.6), -2))',
-                         'agi = max(1000, round(np.random.lognormal(mean=11.2, sigma=0.7), -2))')
-                    )
-                    # Adjust Schedule C probability
-                    modifications.append(
-                        ('schedule_c_prob = 0.1 + (0.2 if 20000 < agi < 100000 else 0)',
-                         'schedule_c_prob = 0.2 + (0.3 if 20000 < agi < 100000 else 0)')
-                    )
+                    # Adjust AGI distribution to favor higher incomes and raise Schedule C probability
+                    agi_mean, agi_sigma, schedule_c_base, schedule_c_bonus = 11.2, 0.7, 0.2, 0.3
+                else:
+                    agi_mean = None
+                
+                if agi_mean is not None:
+                    modifications.extend([
+                        ('AGI_LOGNORMAL_MEAN = 10.5', f'AGI_LOGNORMAL_MEAN = {agi_mean}'),
+                        ('AGI_LOGNORMAL_SIGMA = 0.6', f'AGI_LOGNORMAL_SIGMA = {agi_sigma}'),
+                        ('SCHEDULE_C_BASE_PROB = 0.1', f'SCHEDULE_C_BASE_PROB = {schedule_c_base}'),
+                        ('SCHEDULE_C_MID_AGI_BONUS = 0.2', f'SCHEDULE_C_MID_AGI_BONUS = {schedule_c_bonus}'),
+                    ])
             
-            # Implement returning customer ratio
+            # Returning customer ratio maps to year-over-year taxpayer retention
             if 'customer_type_ratio' in self.params:
                 ratio = self.params['customer_type_ratio'] / 100.0
-                # Add code to bias customer type assignment
-                customer_logic = f"""
-    # Modified customer type logic with custom ratio
-    if first_seen_year is None:
-        if random.random() < {ratio}:
-            # Pretend they're returning by assigning an earlier year
-            customer_type = 'Returning'
-            customer_first_year[customer_proxy_key] = tax_year - 1
-        else:
-            customer_type = 'New'
-            customer_first_year[customer_proxy_key] = tax_year
-    elif tax_year == first_seen_year:
-        customer_type = 'New'
-    else:
-        customer_type = 'Returning'
-"""
-                # Replace the original customer type logic
-                script_content = script_content.replace(
-                    """    first_seen_year = customer_first_year.get(customer_proxy_key)
-    if first_seen_year is None:
-        customer_type = 'New'
-        customer_first_year[customer_proxy_key] = tax_year
-    elif tax_year == first_seen_year:
-        customer_type = 'New'
-    else:
-        customer_type = 'Returning'""",
-                    f"""    first_seen_year = customer_first_year.get(customer_proxy_key)
-{customer_logic}"""
+                modifications.append(
+                    ('TAXPAYER_RETENTION_RATE = 0.5',
+                     f'TAXPAYER_RETENTION_RATE = {ratio}')
+                )
+            
+            # Skip the filings and only export per-day volumes
+            if self.params.get('daily_volumes_only'):
+                modifications.append(
+                    ('DAILY_VOLUMES_ONLY = False',
+                     'DAILY_VOLUMES_ONLY = True')
                 )
             
             # Apply modifications
@@ -223,17 +229,14 @@ states_cities = filtered_states_cities
             with open(temp_script_path, 'w') as f:
                 f.write(script_content)
             
-            # Change to temp directory and execute script
-            original_dir = os.getcwd()
             try:
-                os.chdir(temp_dir)
-                
-                # Execute the script
-                result = subprocess.run(
-                    [sys.executable, 'TaxData.py'],
-                    capture_output=True,
-                    text=True,
-                    timeout=300  # Add timeout
+                # Execute the script in the temp directory
+                result = run_script(
+                    ['TaxData.py'],
+                    cwd=temp_dir,
+                    timeout=300,
+                    progress=progress,
+                    cancel_event=cancel_event
                 )
                 
                 if result.returncode != 0:
@@ -243,23 +246,29 @@ states_cities = filtered_states_cities
                 dataframes = {}
                 
                 # Read locations
-                if os.path.exists('locations.csv'):
-                    dataframes['locations'] = pd.read_csv('locations.csv')
+                if os.path.exists(os.path.join(temp_dir, 'locations.csv')):
+                    dataframes['locations'] = pd.read_csv(os.path.join(temp_dir, 'locations.csv'))
+                
+                # Read taxpayers
+                if os.path.exists(os.path.join(temp_dir, 'taxpayers.csv')):
+                    dataframes['taxpayers'] = pd.read_csv(os.path.join(temp_dir, 'taxpayers.csv'), dtype={'Zip_Code': str})
                 
                 # Read filings
-                if os.path.exists('filings.csv'):
-                    df = pd.read_csv('filings.csv')
+                if os.path.exists(os.path.join(temp_dir, 'filings.csv')):
+                    df = pd.read_csv(os.path.join(temp_dir, 'filings.csv'))
                     # Convert date column
                     if 'Filing_Date' in df.columns:
                         df['Filing_Date'] = pd.to_datetime(df['Filing_Date'])
                     dataframes['filings'] = df
                 
+                # Read daily filing volumes
+                if os.path.exists(os.path.join(temp_dir, 'daily_filing_volumes.csv')):
+                    dataframes['daily_filing_volumes'] = pd.read_csv(os.path.join(temp_dir, 'daily_filing_volumes.csv'), parse_dates=['Filing_Date'])
+                
                 if not dataframes:
                     raise Exception("No data files were generated")
                 
-                return dataframes
+                return apply_output_profile(dataframes, self.params.get('output_profile', 'Compact'))
                 
             except subprocess.TimeoutExpired:
                 raise Exception("Script execution timed out. Try reducing the number of filings.")
-            finally:
-                os.chdir(original_dir)
\ No newline at end of file
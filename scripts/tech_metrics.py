@@ -2,14 +2,16 @@ import pandas as pd
 import numpy as np
 import datetime
 import random
-import uuid
 import hashlib
+from id_service import IdService
+from progress import report_progress
 
 # --- Configuration ---
 NUM_PRODUCTS = 15
 NUM_TEAMS = 10
 NUM_CAMPAIGNS = 10
 NUM_CUSTOMERS = 5000 # Number of unique customer hashes to generate feedback/tickets for
+ID_KEY = "tech-metrics" # Key for the feedback/ticket ID permutation
 
 # Define Date Range (Approx 3 years past, 1 year future from May 12, 2025)
 CURRENT_DATE = datetime.date(2025, 5, 14)
@@ -69,6 +71,7 @@ def main():
 
     # 1. Dim_Product
     print("Generating Dim_Product...")
+    report_progress("Generating products")
     products_data = []
     product_names = ["QuantumLeap Platform", "MobileConnect App", "AI Insights Engine", "Core Infra Suite", "DataStream API", "SecureAuth Service", "Project Phoenix"]
     categories = ["B2B SaaS", "Mobile App", "AI Service", "Core Infrastructure", "API Service", "Security", "Internal Platform"]
@@ -98,6 +101,7 @@ def main():
 
     # 2. Dim_Team
     print("Generating Dim_Team...")
+    report_progress("Generating teams")
     teams_data = []
     team_names = ["Platform Core", "Mobile Innovators", "AI Research Guild", "Ops Guardians", "Customer Success NA", "Frontend Wizards"]
     leads = ["Charles Xavier", "Diana Prince", "Clark Kent", "Bruce Wayne"]
@@ -118,6 +122,7 @@ def main():
 
     # 3. Dim_Campaign
     print("Generating Dim_Campaign...")
+    report_progress("Generating campaigns")
     campaigns_data = []
     campaign_types = ["Digital Advertising", "Content Marketing", "Email Campaign", "Launch Event", "Webinar Series", "Partner Promotion"]
     campaign_name_templates = ["{} Growth Push", "{} Awareness Q{}", "{} User Acquisition", "{} Feature Launch"]
@@ -169,6 +174,7 @@ def main():
             event_dates[pid][event_date] = event_type
 
     print("Generating Fact_Daily_Product_Metrics, Log_Customer_Feedback, Log_Support_Ticket...")
+    report_progress("Generating daily metrics, feedback and support tickets")
     for metric_date_ts in DATE_RANGE:
         metric_date_obj = metric_date_ts.date()
 
@@ -275,7 +281,6 @@ def main():
                     if feature_a_adopt > 0.5 and random.random() < 0.3: topics.append("FeatureA")
 
                 feedback_record = {
-                    "FeedbackID": f"FDBK_{uuid.uuid4().hex[:10]}",
                     "FeedbackTimestamp": feedback_ts,
                     "ProductID": product_id,
                     "CustomerID_Hashed": customer_hash,
@@ -322,7 +327,6 @@ def main():
                         first_resp_time = round(random.uniform(5, 120), 1)
 
                 ticket_record = {
-                    "TicketID": f"SUP_{uuid.uuid4().hex[:10]}",
                     "CreationTimestamp": creation_ts,
                     "ProductID": product_id,
                     "CustomerID_Hashed": customer_hash,
@@ -341,10 +345,18 @@ def main():
 
 
     print("Converting generated lists to DataFrames...")
+    report_progress("Building tables")
     fact_daily_metrics = pd.DataFrame(all_daily_metrics)
     log_customer_feedback = pd.DataFrame(all_feedback_logs)
     log_support_ticket = pd.DataFrame(all_support_tickets)
 
+    # Mint record IDs in bulk once the row counts are known
+    id_service = IdService(key=ID_KEY)
+    id_service.register("FDBK_", width=10, lowercase=True)
+    id_service.register("SUP_", width=10, lowercase=True)
+    log_customer_feedback.insert(0, "FeedbackID", id_service.mint("FDBK_", len(log_customer_feedback)))
+    log_support_ticket.insert(0, "TicketID", id_service.mint("SUP_", len(log_support_ticket)))
+
     print("Performing final data type conversions...")
     dim_product['LaunchDate'] = pd.to_datetime(dim_product['LaunchDate']).dt.date
 
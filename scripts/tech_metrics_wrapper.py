@@ -1,6 +1,5 @@
 # scripts/tech_metrics_wrapper.py
 
-import sys
 import os
 from io import StringIO
 from contextlib import redirect_stdout, redirect_stderr
@@ -8,7 +7,9 @@ import pandas as pd
 from typing import Dict, Any
 import tempfile
 import shutil
-import subprocess
+from .script_runner import run_script
+from .output_profile import OUTPUT_PROFILE_PARAMETER, apply_output_profile
+from .preview import capped, run_preview
 
 
 class TechMetricsGenerator:
@@ -17,6 +18,7 @@ class TechMetricsGenerator:
     def __init__(self, **params):
         """Initialize with parameters that will override script defaults"""
         self.params = params
+        self.full_run_estimate = None  # Estimated full-run size per table, set by a preview run
         
     @staticmethod
     def get_config() -> Dict[str, Any]:
@@ -56,12 +58,45 @@ class TechMetricsGenerator:
                     'min': 100,
                     'max': 50000,
                     'help': 'Number of unique customers'
-                }
-            }
+                },
+                'output_profile': OUTPUT_PROFILE_PARAMETER
+            },
+            'preview': 'Full date range for up to 3 products'
+        }
+    
+    # Products generated in a preview
+    PREVIEW_PRODUCTS = 3
+    
+    def preview_params(self):
+        """Preview: the full date range for PREVIEW_PRODUCTS products; daily metrics and logs grow per product."""
+        params = dict(self.params)
+        params['num_products'], product_scale = capped(params.get('num_products', 15), self.PREVIEW_PRODUCTS)
+        scale = {'dim_product': product_scale, 'fact_daily_metrics': product_scale,
+                 'log_customer_feedback': product_scale, 'log_support_ticket': product_scale}
+        return params, scale
+    
+    # Days in the script's date range, and feedback / support tickets per product per day at typical user counts
+    NUM_DAYS = 4 * 365 + 1
+    FEEDBACK_PER_PRODUCT_DAY = 0.75
+    TICKETS_PER_PRODUCT_DAY = 1.25
+    
+    def estimate_rows(self):
+        """Expected rows per table: daily metrics and logs per product per day, dimensions as requested."""
+        num_products = self.params.get('num_products', 15)
+        return {
+            'dim_product': num_products,
+            'dim_team': self.params.get('num_teams', 10),
+            'dim_campaign': self.params.get('num_campaigns', 10),
+            'fact_daily_metrics': num_products * self.NUM_DAYS,
+            'log_customer_feedback': num_products * self.NUM_DAYS * self.FEEDBACK_PER_PRODUCT_DAY,
+            'log_support_ticket': num_products * self.NUM_DAYS * self.TICKETS_PER_PRODUCT_DAY,
         }
     
-    def generate(self) -> Dict[str, pd.DataFrame]:
+    def generate(self, progress=None, cancel_event=None, preview=False) -> Dict[str, pd.DataFrame]:
         """Run the original script and capture the generated DataFrames"""
+        if preview:
+            return run_preview(self, progress, cancel_event)
+        
         # Create a temporary directory for output files
         with tempfile.TemporaryDirectory() as temp_dir:
             # Copy the original script to temp directory
@@ -88,45 +123,40 @@ NUM_CUSTOMERS = {self.params.get('num_customers', 5000)}
             with open(temp_script, 'w') as f:
                 f.write(script_content)
             
-            # Change to temp directory and run the script
-            original_dir = os.getcwd()
-            try:
-                os.chdir(temp_dir)
-                
-                # Execute the script using subprocess to isolate it
-                result = subprocess.run([sys.executable, 'tech_metrics.py'], 
-                                      capture_output=True, 
-                                      text=True)
-                
-                if result.returncode != 0:
-                    print(f"Script error: {result.stderr}")
-                    raise Exception(f"Script execution failed: {result.stderr}")
-                
-                # Read the generated CSV files
-                dataframes = {}
-                
-                csv_files = {
-                    'dim_product': 'dim_product.csv',
-                    'dim_team': 'dim_team.csv',
-                    'dim_campaign': 'dim_campaign.csv',
-                    'fact_daily_metrics': 'fact_daily_product_metrics.csv',
-                    'log_customer_feedback': 'log_customer_feedback.csv',
-                    'log_support_ticket': 'log_support_ticket.csv'
-                }
-                
-                for key, filename in csv_files.items():
-                    file_path = os.path.join(temp_dir, filename)
-                    if os.path.exists(file_path):
-                        dataframes[key] = pd.read_csv(file_path)
-                        print(f"Loaded {filename}: {len(dataframes[key])} rows")
-                    else:
-                        print(f"Warning: {filename} not found")
-                
-                if not dataframes:
-                    raise Exception("No data files were generated")
-                
-                return dataframes
-                
-            finally:
-                # Restore original directory
-                os.chdir(original_dir)
\ No newline at end of file
+            # Execute the script in the temp directory using a subprocess to isolate it
+            result = run_script(
+                ['tech_metrics.py'],
+                cwd=temp_dir,
+                timeout=None,
+                progress=progress,
+                cancel_event=cancel_event
+            )
+            
+            if result.returncode != 0:
+                print(f"Script error: {result.stderr}")
+                raise Exception(f"Script execution failed: {result.stderr}")
+            
+            # Read the generated CSV files
+            dataframes = {}
+            
+            csv_files = {
+                'dim_product': 'dim_product.csv',
+                'dim_team': 'dim_team.csv',
+                'dim_campaign': 'dim_campaign.csv',
+                'fact_daily_metrics': 'fact_daily_product_metrics.csv',
+                'log_customer_feedback': 'log_customer_feedback.csv',
+                'log_support_ticket': 'log_support_ticket.csv'
+            }
+            
+            for key, filename in csv_files.items():
+                file_path = os.path.join(temp_dir, filename)
+                if os.path.exists(file_path):
+                    dataframes[key] = pd.read_csv(file_path)
+                    print(f"Loaded {filename}: {len(dataframes[key])} rows")
+                else:
+                    print(f"Warning: {filename} not found")
+            
+            if not dataframes:
+                raise Exception("No data files were generated")
+            
+            return apply_output_profile(dataframes, self.params.get('output_profile', 'Compact'))